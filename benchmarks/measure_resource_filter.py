@@ -0,0 +1,148 @@
+"""
+资源过滤效果测量
+
+用已保存的登录数据打开真实平台，分别在关闭和开启资源过滤（BLOCK_UNNEEDED_RESOURCES）时
+多次重新加载聊天页面，记录页面加载耗时（DOMContentLoaded / load），并在页面空闲期间
+用资源监测（需安装 psutil）采样浏览器的稳态 CPU 与内存，输出开启前后的对比
+
+两次运行各使用一份去掉 HTTP 缓存的登录数据副本，首次加载都从冷缓存开始，
+避免后一次运行因缓存更快而夸大过滤的效果；首次加载的耗时单独列出
+
+用法:
+    python benchmarks/measure_resource_filter.py --platform chatgpt --loads 5 --idle 60
+    python benchmarks/measure_resource_filter.py --platform gemini --headless --json filter.json
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from statistics import mean, median
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+
+# 复制登录数据时跳过的缓存目录（Cookie、Local Storage 等登录状态保留）
+_CACHE_DIRS = ('Cache', 'Code Cache', 'GPUCache', 'CacheStorage', 'ScriptCache',
+               'ShaderCache', 'GrShaderCache', 'GraphiteDawnCache', 'DawnCache')
+
+
+def fresh_profile(source: Path, workdir: Path, name: str) -> Path:
+    """复制一份不含 HTTP / 代码缓存的登录数据"""
+    target = workdir / name
+    shutil.copytree(source, target, ignore=shutil.ignore_patterns(*_CACHE_DIRS, 'Singleton*'))
+    return target
+
+
+_NAVIGATION_TIMING_SCRIPT = '''
+    () => {
+        const nav = performance.getEntriesByType('navigation')[0];
+        if (!nav) return null;
+        return {
+            dcl_ms: Math.round(nav.domContentLoadedEventEnd),
+            load_ms: Math.round(nav.loadEventEnd),
+            requests: performance.getEntriesByType('resource').length,
+        };
+    }
+'''
+
+
+async def measure(platform: str, block: bool, args, profile: Path) -> dict:
+    """用给定的登录数据副本启动一次浏览器，测量页面加载耗时与空闲期间的资源占用"""
+    from src.platform_factory import get_automation
+
+    config.BROWSER_DATA_DIR = profile
+    config.BLOCK_UNNEEDED_RESOURCES = block
+    config.RESOURCE_MONITOR = True
+    config.RESOURCE_MONITOR_INTERVAL = args.interval
+
+    samples = []
+    bot = get_automation(platform)
+    bot.on_resource_sample = samples.append
+    await bot.start_browser(headless=args.headless)
+    loads = []
+    try:
+        for index in range(args.loads):
+            try:
+                await bot.page.reload(wait_until='load', timeout=60000)
+            except Exception as e:
+                print(f"[{bot.PLATFORM_NAME}] 等待 load 事件超时: {e}")
+            timing = await bot.page.evaluate(_NAVIGATION_TIMING_SCRIPT)
+            if timing:
+                loads.append(timing)
+                print(f"[{bot.PLATFORM_NAME}] 过滤{'开' if block else '关'} 第 {index + 1} 次加载: "
+                      f"DOMContentLoaded {timing['dcl_ms']}ms, load {timing['load_ms']}ms, "
+                      f"{timing['requests']} 个资源请求")
+
+        # 空闲期间的稳态占用（丢弃第一次采样，其中可能包含页面加载的尾声）
+        samples.clear()
+        print(f"[{bot.PLATFORM_NAME}] 空闲采样 {args.idle}s...")
+        await asyncio.sleep(args.idle)
+    finally:
+        blocked = bot.resource_filter.blocked_count if bot.resource_filter else 0
+        await bot.close()
+
+    steady = [s for s in samples[1:] if s.get('total')]
+    load_ms = [t['load_ms'] for t in loads if t['load_ms'] > 0]
+    return {
+        'block': block,
+        'cold_dcl_ms': loads[0]['dcl_ms'] if loads else None,
+        'cold_load_ms': loads[0]['load_ms'] if loads else None,
+        'dcl_ms': median([t['dcl_ms'] for t in loads]) if loads else None,
+        'load_ms': median(load_ms) if load_ms else None,
+        'requests': median([t['requests'] for t in loads]) if loads else None,
+        'cpu_percent': round(mean(s['total']['cpu'] for s in steady), 1) if steady else None,
+        'rss_mb': round(mean(s['total']['rss_mb'] for s in steady), 1) if steady else None,
+        'blocked_requests': blocked,
+    }
+
+
+def print_report(platform: str, before: dict, after: dict) -> None:
+    print()
+    print(f"平台: {platform}  （中位数；CPU / 内存为空闲期间所有浏览器进程的平均值）")
+    print(f"{'指标':<16}{'过滤关':>12}{'过滤开':>12}{'变化':>10}")
+    for key, label in (('cold_dcl_ms', '首次 DCL (ms)'), ('cold_load_ms', '首次 load (ms)'),
+                       ('dcl_ms', 'DOMContentLoaded'), ('load_ms', 'load (ms)'), ('requests', '资源请求数'),
+                       ('cpu_percent', 'CPU (%)'), ('rss_mb', '内存 (MB)'), ('blocked_requests', '拦截请求数')):
+        a, b = before.get(key), after.get(key)
+        change = f"{(b - a) / a * 100:+.0f}%" if a and b is not None else "-"
+        print(f"{label:<16}{str(a):>12}{str(b):>12}{change:>10}")
+
+
+async def run(args) -> dict:
+    # 只复用登录数据（每次运行一份无缓存的副本），运行指标写到临时目录
+    source = config.BROWSER_DATA_DIR
+    workdir = Path(tempfile.mkdtemp(prefix="pdfai_filter_"))
+    config.RUN_METRICS_DIR = workdir / "metrics"
+    try:
+        before = await measure(args.platform, False, args, fresh_profile(source, workdir, "profile_off"))
+        after = await measure(args.platform, True, args, fresh_profile(source, workdir, "profile_on"))
+    finally:
+        config.BROWSER_DATA_DIR = source
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {'platform': args.platform, 'loads': args.loads, 'idle_s': args.idle,
+            'before': before, 'after': after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='资源过滤开启前后的页面加载与稳态 CPU 对比')
+    parser.add_argument('--platform', choices=['chatgpt', 'claude', 'gemini', 'deepseek'], default='chatgpt')
+    parser.add_argument('--loads', type=int, default=5, help='每种模式重新加载页面的次数')
+    parser.add_argument('--idle', type=int, default=60, help='空闲采样时长（秒）')
+    parser.add_argument('--interval', type=float, default=5, help='资源采样间隔（秒）')
+    parser.add_argument('--headless', action='store_true', help='无头模式（需已登录）')
+    parser.add_argument('--json', type=Path, help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(args.platform, result['before'], result['after'])
+    if args.json:
+        args.json.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"结果已写入 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
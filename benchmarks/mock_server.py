@@ -0,0 +1,545 @@
+"""
+本地模拟聊天服务器
+
+为每个平台提供一个页面，实现各自动化类依赖的 DOM 约定（输入框、文件输入框、
+发送/停止按钮、附件缩略图、回复容器、错误提示）和流式回复接口路径，
+并提供 OpenAI 兼容的 /v1/chat/completions 接口（API 模式），
+用于在没有真实账号的情况下离线测量自动化流程的性能
+
+流式速度、首字延迟、失败率、空白回复与频率限制都可以通过 MockScenario 配置
+
+用法:
+    python benchmarks/mock_server.py --port 8765 --cps 800
+    浏览器打开 http://127.0.0.1:8765/chatgpt/
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+@dataclass
+class MockScenario:
+    """模拟服务器的行为配置"""
+    first_token_ms: int = 800        # 首字延迟（毫秒）
+    chars_per_second: int = 600      # 流式输出速度（字符/秒）
+    response_chars: int = 1200       # 每条回复的长度（字符）
+    chunk_chars: int = 24            # 每个流式分块的长度（字符）
+    upload_ms: int = 300             # 附件出现前的上传耗时（毫秒）
+    parse_ms: int = 1500             # DeepSeek 附件解析耗时（毫秒）
+    failure_rate: float = 0.0        # 流式接口返回 500 的概率
+    empty_rate: float = 0.0          # 返回空白回复的概率
+    rate_limit_after: int = 0        # 第 N 条消息之后返回 429（0 表示不限制）
+    upload_limit_after: int = 0      # 累计上传 N 张图片之后拒绝上传（0 表示不限制）
+    seed: Optional[int] = None       # 随机种子（失败/空白回复可复现）
+
+
+# ═══════════════════════════════════════════════════════════
+# 各平台的 DOM 约定（与 src/*_automation.py 的 SELECTORS 对应）
+# ═══════════════════════════════════════════════════════════
+
+PROFILES = {
+    "chatgpt": {
+        "title": "ChatGPT",
+        "stream_path": "backend-api/conversation",
+        "composer": '''
+            <form id="composer">
+                <div id="attachments"></div>
+                <input type="file" id="file-input" accept="image/*" multiple hidden>
+                <button type="button" data-testid="attachment-button" aria-label="Attach files" id="attach">+</button>
+                <div id="prompt-textarea" class="editor" contenteditable="true"></div>
+                <button type="button" data-testid="send-button" aria-label="Send prompt" id="send">↑</button>
+                <button type="button" data-testid="stop-button" aria-label="Stop streaming" id="stop" hidden>■</button>
+            </form>
+            <a data-testid="create-new-chat-button" href="/chatgpt/">New chat</a>
+        ''',
+        "attachment": '<span class="chip" data-testid="attachment-chip"><img alt=""><button type="button" aria-label="Remove file">×</button></span>',
+        "user_turn": '<div data-message-author-role="user"></div>',
+        "assistant_turn": '<div data-message-author-role="assistant"></div>',
+        "toast": '<div role="alert"></div>',
+        "hide_send_while_streaming": True,
+        "new_chat_shortcut": True,
+    },
+    "claude": {
+        "title": "Claude",
+        "stream_path": "api/organizations/mock/chat_conversations/conv/completion",
+        "composer": '''
+            <fieldset id="composer">
+                <div id="attachments"></div>
+                <input type="file" id="file-input" accept="image/*" multiple hidden>
+                <div class="ProseMirror editor" contenteditable="true"></div>
+                <button type="button" aria-label="Send message" id="send">↑</button>
+                <button type="button" aria-label="Stop response" id="stop" hidden>■</button>
+            </fieldset>
+        ''',
+        "attachment": '<div class="chip" data-testid="file-thumbnail"><img alt=""><button type="button" aria-label="Remove">×</button></div>',
+        "user_turn": '<div class="user-turn"></div>',
+        "assistant_turn": '<div class="claude-response" data-is-streaming="true"></div>',
+        "toast": '<div role="alert"></div>',
+    },
+    "gemini": {
+        "title": "Gemini",
+        "stream_path": "_/BardChatUi/data/assistant.lamda.BardFrontendService/StreamGenerate",
+        "composer": '''
+            <div id="composer">
+                <div id="attachments"></div>
+                <rich-textarea><div class="ql-editor editor" contenteditable="true"></div></rich-textarea>
+                <button type="button" class="send-button" aria-label="Send message" id="send">↑</button>
+                <button type="button" aria-label="Stop response" id="stop" hidden>■</button>
+            </div>
+        ''',
+        "attachment": '<uploader-file-preview class="chip"><img alt=""><button type="button" aria-label="Remove file">×</button></uploader-file-preview>',
+        "user_turn": '<div class="user-turn"></div>',
+        "assistant_turn": '<div class="model-response-text"></div>',
+        "toast": '<mat-snack-bar-container></mat-snack-bar-container>',
+    },
+    "deepseek": {
+        "title": "DeepSeek",
+        "stream_path": "api/v0/chat/completion",
+        "composer": '''
+            <div id="composer">
+                <div id="attachments"></div>
+                <input type="file" id="file-input" accept="image/*" multiple hidden>
+                <textarea id="chat-input" class="editor" placeholder="Message DeepSeek"></textarea>
+                <button type="button" class="send-button" aria-label="Send" id="send">↑</button>
+            </div>
+        ''',
+        "attachment": '<div class="chip image-preview"><img alt=""><span class="parsing">…</span></div>',
+        "user_turn": '<div class="user-turn"></div>',
+        "assistant_turn": '<div class="ds-markdown"></div>',
+        "toast": '<div class="ds-toast" role="alert"></div>',
+        "parse_attachments": True,
+        "disable_send_while_streaming": True,
+    },
+}
+
+
+_PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__ (mock)</title>
+<style>
+    body { font-family: sans-serif; margin: 0; display: flex; flex-direction: column; height: 100vh; }
+    #thread { flex: 1; overflow-y: auto; padding: 16px; }
+    #thread > div { margin: 8px 0; padding: 8px; border-radius: 6px; white-space: pre-wrap; }
+    .user-turn, [data-message-author-role="user"] { background: #eef; }
+    #composer { display: flex; flex-wrap: wrap; gap: 8px; padding: 12px; border-top: 1px solid #ccc; margin: 0; }
+    #attachments { width: 100%; display: flex; gap: 6px; }
+    .chip { display: inline-flex; align-items: center; gap: 2px; }
+    .chip img { width: 48px; height: 48px; object-fit: cover; }
+    .editor { flex: 1; min-height: 40px; border: 1px solid #aaa; padding: 6px; }
+    #toasts { position: fixed; top: 8px; right: 8px; }
+    #toasts > * { display: block; background: #fdd; padding: 8px; margin-bottom: 4px; }
+</style>
+</head>
+<body>
+<div id="thread"></div>
+__COMPOSER__
+<div id="toasts"></div>
+<script>
+(() => {
+    const PROFILE = __PROFILE__;
+    const SCENARIO = __SCENARIO__;
+    const BASE = __BASE__;
+
+    const $ = (sel) => document.querySelector(sel);
+    const thread = $('#thread');
+    const editor = $('.editor') || $('#prompt-textarea');
+    const sendBtn = $('#send');
+    const stopBtn = $('#stop');
+    const fileInput = $('#file-input');
+    const attachments = $('#attachments');
+    const fromHTML = (html) => {
+        const t = document.createElement('template');
+        t.innerHTML = html.trim();
+        return t.content.firstElementChild;
+    };
+
+    let streaming = false;
+    let parsing = 0;
+    let uploadedTotal = 0;
+    let controller = null;
+
+    const setSendState = () => {
+        const busy = parsing > 0 || (streaming && PROFILE.disable_send_while_streaming);
+        sendBtn.disabled = busy;
+        if (PROFILE.hide_send_while_streaming) {
+            sendBtn.hidden = streaming;
+        }
+        if (stopBtn) stopBtn.hidden = !streaming;
+    };
+
+    const toast = (text) => {
+        const el = fromHTML(PROFILE.toast);
+        el.textContent = text;
+        $('#toasts').appendChild(el);
+        setTimeout(() => el.remove(), 6000);
+    };
+
+    // ───────── 附件 ─────────
+    const addFiles = (files) => {
+        for (const file of files) {
+            if (!file.type.startsWith('image/')) continue;
+            if (SCENARIO.upload_limit_after && uploadedTotal >= SCENARIO.upload_limit_after) {
+                toast('Unable to upload ' + file.name + ': upload limit reached. 最多可上传 0 个文件');
+                continue;
+            }
+            uploadedTotal += 1;
+            const chip = fromHTML(PROFILE.attachment);
+            const parsingEl = chip.querySelector('.parsing');
+            if (parsingEl) parsingEl.remove();
+            const remove = chip.querySelector('button');
+            if (remove) remove.addEventListener('click', () => chip.remove());
+            setTimeout(() => {
+                chip.querySelector('img').src = URL.createObjectURL(file);
+                attachments.appendChild(chip);
+                if (PROFILE.parse_attachments && parsingEl) {
+                    chip.appendChild(parsingEl);
+                    parsing += 1;
+                    setSendState();
+                    setTimeout(() => {
+                        parsingEl.remove();
+                        parsing -= 1;
+                        setSendState();
+                    }, SCENARIO.parse_ms);
+                }
+            }, SCENARIO.upload_ms);
+        }
+    };
+
+    if (fileInput) {
+        fileInput.addEventListener('change', () => {
+            addFiles(Array.from(fileInput.files));
+            fileInput.value = '';
+        });
+    }
+    const attach = $('#attach');
+    if (attach && fileInput) attach.addEventListener('click', () => fileInput.click());
+
+    editor.addEventListener('paste', (e) => {
+        const data = e.clipboardData;
+        if (!data) return;
+        if (data.files && data.files.length) {
+            e.preventDefault();
+            addFiles(Array.from(data.files));
+            return;
+        }
+        // 合成的粘贴事件不会触发默认行为，手动插入文本
+        if (!e.isTrusted) {
+            const text = data.getData('text/plain');
+            if (text) {
+                e.preventDefault();
+                editor.focus();
+                document.execCommand('insertText', false, text);
+            }
+        }
+    });
+    editor.addEventListener('dragover', (e) => e.preventDefault());
+    editor.addEventListener('drop', (e) => {
+        e.preventDefault();
+        if (e.dataTransfer) addFiles(Array.from(e.dataTransfer.files));
+    });
+
+    // ───────── 发送与流式回复 ─────────
+    const composerText = () => (editor.value !== undefined ? editor.value : editor.innerText).trim();
+    const clearComposer = () => {
+        if (editor.value !== undefined) editor.value = '';
+        else editor.innerHTML = '';
+        attachments.innerHTML = '';
+    };
+
+    const send = async () => {
+        const text = composerText();
+        const images = attachments.children.length;
+        if (streaming || sendBtn.disabled || (!text && !images)) return;
+
+        const user = fromHTML(PROFILE.user_turn);
+        user.textContent = text + (images ? '  [' + images + ' image(s)]' : '');
+        thread.appendChild(user);
+        clearComposer();
+
+        const reply = fromHTML(PROFILE.assistant_turn);
+        thread.appendChild(reply);
+        streaming = true;
+        setSendState();
+        controller = new AbortController();
+
+        try {
+            const resp = await fetch(BASE + PROFILE.stream_path, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ prompt: text, images }),
+                signal: controller.signal,
+            });
+            if (!resp.ok) {
+                let message = 'Something went wrong (' + resp.status + ')';
+                try { message = (await resp.json()).error || message; } catch (e) {}
+                toast(message);
+            } else {
+                const reader = resp.body.getReader();
+                const decoder = new TextDecoder();
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    reply.textContent += decoder.decode(value, { stream: true });
+                    thread.scrollTop = thread.scrollHeight;
+                }
+            }
+        } catch (e) {
+            if (e.name !== 'AbortError') toast('Network error');
+        } finally {
+            streaming = false;
+            controller = null;
+            if (reply.hasAttribute('data-is-streaming')) reply.setAttribute('data-is-streaming', 'false');
+            setSendState();
+        }
+    };
+
+    sendBtn.addEventListener('click', send);
+    if (stopBtn) stopBtn.addEventListener('click', () => controller && controller.abort());
+    editor.addEventListener('keydown', (e) => {
+        if (e.key === 'Enter' && !e.shiftKey) {
+            e.preventDefault();
+            send();
+        }
+    });
+    if (PROFILE.new_chat_shortcut) {
+        document.addEventListener('keydown', (e) => {
+            if (e.ctrlKey && e.shiftKey && e.key.toLowerCase() === 'o') {
+                e.preventDefault();
+                if (!streaming) thread.innerHTML = '';
+            }
+        });
+    }
+    setSendState();
+})();
+</script>
+</body>
+</html>
+'''
+
+
+def render_page(platform: str, scenario: MockScenario) -> str:
+    """生成平台的模拟页面"""
+    profile = PROFILES[platform]
+    page_config = {k: v for k, v in profile.items() if k != 'composer'}
+    return (_PAGE_TEMPLATE
+            .replace('__TITLE__', profile['title'])
+            .replace('__COMPOSER__', profile['composer'])
+            .replace('__PROFILE__', json.dumps(page_config, ensure_ascii=False))
+            .replace('__SCENARIO__', json.dumps(asdict(scenario)))
+            .replace('__BASE__', json.dumps(f"/{platform}/")))
+
+
+_FILLER = (
+    "This page shows a structured document. The heading introduces the topic, "
+    "the body paragraphs explain the main argument, and the figure summarises the data. "
+)
+
+
+class MockChatServer:
+    """在后台线程中运行的模拟聊天服务器"""
+
+    def __init__(self, scenario: Optional[MockScenario] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            scenario: 行为配置，默认使用 MockScenario()
+            port: 监听端口，0 表示自动分配
+        """
+        self.scenario = scenario or MockScenario()
+        self._random = random.Random(self.scenario.seed)
+        self._lock = threading.Lock()
+        self.stats = {'pages': 0, 'messages': 0, 'failures': 0, 'empty': 0, 'rate_limited': 0}
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def url(self, platform: str) -> str:
+        """平台模拟页面的地址（对应 PLATFORM_URL；api 为兼容接口的 base URL）"""
+        path = {"gemini": "gemini/app", "api": "v1"}.get(platform, f"{platform}/")
+        return f"http://{self._server.server_address[0]}:{self.port}/{path}"
+
+    def start(self) -> "MockChatServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _next_outcome(self) -> str:
+        """决定本条消息的结果: ok / rate_limited / failure / empty"""
+        s = self.scenario
+        with self._lock:
+            self.stats['messages'] += 1
+            if s.rate_limit_after and self.stats['messages'] > s.rate_limit_after:
+                self.stats['rate_limited'] += 1
+                return 'rate_limited'
+            roll = self._random.random()
+            if roll < s.failure_rate:
+                self.stats['failures'] += 1
+                return 'failure'
+            if roll < s.failure_rate + s.empty_rate:
+                self.stats['empty'] += 1
+                return 'empty'
+            return 'ok'
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _platform(self) -> Optional[str]:
+                name = self.path.lstrip('/').split('/', 1)[0]
+                return name if name in PROFILES else None
+
+            def _send_json(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.startswith('/__mock/stats'):
+                    self._send_json(200, server.stats)
+                    return
+                platform = self._platform()
+                if platform is None:
+                    self.send_error(404)
+                    return
+                body = render_page(platform, server.scenario).encode('utf-8')
+                with server._lock:
+                    server.stats['pages'] += 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                platform = self._platform()
+                length = int(self.headers.get('Content-Length') or 0)
+                self.rfile.read(length)
+                if self.path.startswith('/v1/chat/completions'):
+                    self._api_completion()
+                    return
+                if platform is None or not self.path.endswith(PROFILES[platform]['stream_path']):
+                    self.send_error(404)
+                    return
+
+                outcome = server._next_outcome()
+                if outcome == 'rate_limited':
+                    self._send_json(429, {'error': "You've reached your usage limit. Please try again later."})
+                    return
+                if outcome == 'failure':
+                    self._send_json(500, {'error': 'Something went wrong while generating the response.'})
+                    return
+                self._stream(0 if outcome == 'empty' else server.scenario.response_chars)
+
+            def _api_completion(self) -> None:
+                """OpenAI 兼容接口：错误以 {"error": {"message": ...}} 返回，回复以 SSE 分块推送"""
+                outcome = server._next_outcome()
+                if outcome == 'rate_limited':
+                    self._send_json(429, {'error': {'message': 'Rate limit reached for requests', 'type': 'requests'}})
+                    return
+                if outcome == 'failure':
+                    self._send_json(500, {'error': {'message': 'The server had an error processing your request.'}})
+                    return
+
+                def encode(delta: str) -> bytes:
+                    chunk = {'object': 'chat.completion.chunk', 'choices': [{'index': 0, 'delta': {'content': delta}}]}
+                    return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8')
+
+                total = 0 if outcome == 'empty' else server.scenario.response_chars
+                self._stream(total, encode=encode, trailer=b"data: [DONE]\n\n")
+
+            def _stream(self, total_chars: int, encode=None, trailer: bytes = b"") -> None:
+                s = server.scenario
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+
+                text = (_FILLER * (total_chars // len(_FILLER) + 1))[:total_chars]
+                interval = s.chunk_chars / max(1, s.chars_per_second)
+                try:
+                    time.sleep(s.first_token_ms / 1000)
+                    for i in range(0, len(text), s.chunk_chars):
+                        chunk = text[i:i + s.chunk_chars]
+                        self.wfile.write(encode(chunk) if encode else chunk.encode('utf-8'))
+                        self.wfile.flush()
+                        time.sleep(interval)
+                    if trailer:
+                        self.wfile.write(trailer)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 页面点击了停止按钮
+                self.close_connection = True
+
+        return Handler
+
+
+def add_scenario_arguments(parser: argparse.ArgumentParser) -> None:
+    """把 MockScenario 的字段注册为命令行参数（供服务器和基准测试共用）"""
+    defaults = MockScenario()
+    parser.add_argument('--first-token-ms', type=int, default=defaults.first_token_ms, help='首字延迟（毫秒）')
+    parser.add_argument('--cps', type=int, default=defaults.chars_per_second, help='流式输出速度（字符/秒）')
+    parser.add_argument('--response-chars', type=int, default=defaults.response_chars, help='每条回复的长度')
+    parser.add_argument('--upload-ms', type=int, default=defaults.upload_ms, help='附件上传耗时（毫秒）')
+    parser.add_argument('--parse-ms', type=int, default=defaults.parse_ms, help='DeepSeek 附件解析耗时（毫秒）')
+    parser.add_argument('--failure-rate', type=float, default=defaults.failure_rate, help='流式接口失败概率')
+    parser.add_argument('--empty-rate', type=float, default=defaults.empty_rate, help='空白回复概率')
+    parser.add_argument('--rate-limit-after', type=int, default=0, help='第 N 条消息后返回 429')
+    parser.add_argument('--upload-limit-after', type=int, default=0, help='累计上传 N 张图片后拒绝上传')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+
+
+def scenario_from_args(args) -> MockScenario:
+    return MockScenario(
+        first_token_ms=args.first_token_ms,
+        chars_per_second=args.cps,
+        response_chars=args.response_chars,
+        upload_ms=args.upload_ms,
+        parse_ms=args.parse_ms,
+        failure_rate=args.failure_rate,
+        empty_rate=args.empty_rate,
+        rate_limit_after=args.rate_limit_after,
+        upload_limit_after=args.upload_limit_after,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF AI Analyzer 本地模拟聊天服务器')
+    parser.add_argument('--port', type=int, default=8765)
+    add_scenario_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockChatServer(scenario_from_args(args), port=args.port).start()
+    print("模拟聊天服务器已启动:")
+    for platform in list(PROFILES) + ['api']:
+        print(f"  {platform:10} {server.url(platform)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
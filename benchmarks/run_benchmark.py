@@ -0,0 +1,204 @@
+"""
+离线基准测试
+
+启动本地模拟聊天服务器（mock_server.py），让平台自动化类在无头浏览器中
+对模拟页面执行完整的 上传 → 输入提示词 → 发送 → 等待回复 流程，
+统计吞吐量（页/分钟）与各阶段耗时，便于对比优化前后的效果
+
+用法:
+    python benchmarks/run_benchmark.py --platform chatgpt --pages 20 --batch-size 2
+    python benchmarks/run_benchmark.py --platform deepseek --pipeline --cps 1500 --json result.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean, median
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import config
+from mock_server import PROFILES, MockChatServer, add_scenario_arguments, scenario_from_args
+
+PROMPT = "请分析这些页面的内容"
+STAGES = ('prepare', 'send', 'first_token', 'response', 'total')
+
+
+def make_pages(directory: Path, count: int, size=(1240, 1754)) -> list:
+    """生成测试用的页面图片（A4 比例，带页码）"""
+    from PIL import Image, ImageDraw
+
+    paths = []
+    for i in range(1, count + 1):
+        image = Image.new('RGB', size, 'white')
+        draw = ImageDraw.Draw(image)
+        draw.text((100, 100), f"Benchmark page {i}", fill='black')
+        for line in range(40):
+            y = 200 + line * 36
+            draw.line((100, y, size[0] - 100 - (line * 37) % 400, y), fill=(60, 60, 60), width=3)
+        path = directory / f"page_{i:03d}.png"
+        image.save(path)
+        paths.append(str(path))
+    return paths
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(timings: dict) -> dict:
+    """各阶段耗时统计（秒）"""
+    result = {}
+    for stage, values in timings.items():
+        if values:
+            result[stage] = {
+                'mean': round(mean(values), 3),
+                'p50': round(median(values), 3),
+                'p95': round(percentile(values, 95), 3),
+                'n': len(values),
+            }
+    return result
+
+
+async def run(args) -> dict:
+    # 在创建自动化实例之前重定向所有状态目录，避免污染真实的登录数据和统计
+    workdir = Path(tempfile.mkdtemp(prefix="pdfai_bench_"))
+    config.BROWSER_DATA_DIR = workdir / "browser_data"
+    config.STATS_DIR = workdir / "stats"
+    config.RUN_METRICS_DIR = workdir / "metrics"
+    config.PARTIAL_RESULTS_DIR = workdir / "partial"
+    # 样本不足时 wait_for_reply 的完成预算使用 WAIT_TIMEOUT
+    config.WAIT_TIMEOUT = args.timeout * 1000
+    config.BROWSER_DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    from src.platform_factory import get_automation
+
+    server = MockChatServer(scenario_from_args(args)).start()
+    bot = get_automation(args.platform)
+    bot.PLATFORM_URL = server.url(args.platform)
+
+    pages = make_pages(workdir, args.pages)
+    batches = [pages[i:i + args.batch_size] for i in range(0, len(pages), args.batch_size)]
+    timings = {stage: [] for stage in STAGES}
+    errors = []
+    empty = 0
+    processed = 0
+
+    first_token_at = {'value': None}
+
+    def on_delta(delta: str, text: str) -> None:
+        if first_token_at['value'] is None and delta:
+            first_token_at['value'] = time.perf_counter()
+
+    bot.on_stream_delta = on_delta
+    pipelining = args.pipeline and bot.SUPPORTS_PIPELINING
+    if args.pipeline and not pipelining:
+        print(f"[{bot.PLATFORM_NAME}] 不支持预先准备下一批，按顺序执行")
+
+    print(f"模拟服务器: {bot.PLATFORM_URL}")
+    await bot.start_browser(headless=not args.headed)
+    started = time.perf_counter()
+    staged = None
+    try:
+        for index, batch in enumerate(batches):
+            batch_start = time.perf_counter()
+            first_token_at['value'] = None
+            try:
+                if staged is batch:
+                    await bot.send_staged()
+                    t_prepared = batch_start
+                elif bot.SUPPORTS_PIPELINING:
+                    await bot.discard_staged()
+                    await bot._prepare_message(batch, PROMPT)
+                    t_prepared = time.perf_counter()
+                    await bot._send_message()
+                else:
+                    await bot.upload_images_and_send(batch, PROMPT)
+                    t_prepared = time.perf_counter()
+                t_sent = time.perf_counter()
+
+                # 与批处理流程一致：自适应等待预算、错误状态检测（含上限提示）
+                wait = asyncio.ensure_future(bot.wait_for_reply(batch, PROMPT))
+                staged = None
+                if pipelining and index + 1 < len(batches):
+                    if await bot.stage_batch(batches[index + 1], PROMPT):
+                        staged = batches[index + 1]
+                response = await wait
+                t_done = time.perf_counter()
+            except Exception as e:
+                errors.append(f"批次 {index + 1}: {e}")
+                print(f"✗ 批次 {index + 1} 失败: {e}")
+                staged = None
+                continue
+
+            processed += len(batch)
+            if not (response or "").strip():
+                empty += 1
+            timings['prepare'].append(t_prepared - batch_start)
+            timings['send'].append(t_sent - t_prepared)
+            if first_token_at['value'] is not None:
+                timings['first_token'].append(first_token_at['value'] - t_sent)
+            timings['response'].append(t_done - t_sent)
+            timings['total'].append(t_done - batch_start)
+            print(f"✓ 批次 {index + 1}/{len(batches)}: {t_done - batch_start:.2f}s, 回复 {len(response or '')} 字")
+    finally:
+        elapsed = time.perf_counter() - started
+        await bot.close()
+        server.stop()
+
+    return {
+        'platform': args.platform,
+        'pages': args.pages,
+        'batch_size': args.batch_size,
+        'pipeline': pipelining,
+        'scenario': vars(server.scenario),
+        'elapsed_s': round(elapsed, 2),
+        'pages_per_min': round(processed / elapsed * 60, 2) if elapsed > 0 else 0,
+        'stages': summarize(timings),
+        'empty_responses': empty,
+        'errors': errors,
+        'server': server.stats,
+    }
+
+
+def print_report(result: dict) -> None:
+    print()
+    print(f"平台: {result['platform']}  页数: {result['pages']}  每批: {result['batch_size']}"
+          f"  预先准备: {'开' if result['pipeline'] else '关'}")
+    print(f"总耗时: {result['elapsed_s']}s  吞吐量: {result['pages_per_min']} 页/分钟")
+    print(f"{'阶段':<12}{'平均':>9}{'p50':>9}{'p95':>9}{'次数':>7}")
+    for stage in STAGES:
+        s = result['stages'].get(stage)
+        if s:
+            print(f"{stage:<12}{s['mean']:>9.2f}{s['p50']:>9.2f}{s['p95']:>9.2f}{s['n']:>7}")
+    print(f"空白回复: {result['empty_responses']}  失败批次: {len(result['errors'])}")
+    print(f"服务器统计: {result['server']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF AI Analyzer 离线基准测试')
+    parser.add_argument('--platform', choices=list(PROFILES) + ['api'], default='chatgpt')
+    parser.add_argument('--pages', type=int, default=10, help='测试页数')
+    parser.add_argument('--batch-size', type=int, default=1, help='每批页数')
+    parser.add_argument('--pipeline', action='store_true', help='等待回复时预先准备下一批')
+    parser.add_argument('--timeout', type=int, default=120, help='单批回复超时（秒）')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口')
+    parser.add_argument('--json', type=Path, help='把结果写入 JSON 文件')
+    add_scenario_arguments(parser)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"结果已写入 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
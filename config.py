@@ -16,7 +16,12 @@ CHATGPT_URL = "https://chatgpt.com/"
 # 默认提示词
 PROMPT_TEXT = "请用中文详细解释一下这张图片的内容。"
 
-# 等待超时时间（毫秒）
+# 无头模式：先在有界面模式下登录一次，之后可复用 BROWSER_DATA_DIR 中的登录状态无头运行
+HEADLESS = False
+HEADLESS_USER_AGENT = None  # 无头模式下使用的 User-Agent（平台拒绝 HeadlessChrome 时填写）
+LOGIN_CHECK_TIMEOUT = 15  # 无头模式启动时确认登录状态的最长等待时间（秒）
+
+# 等待超时时间（毫秒），启用 ADAPTIVE_TIMEOUT 且历史样本足够时由耗时分布代替
 WAIT_TIMEOUT = 120000  # 2分钟
 
 # 图片输出目录
@@ -32,6 +37,112 @@ DELAY_BETWEEN_PAGES = 3
 EMPTY_RESPONSE_MAX_RETRIES = 3  # 空白输出时最大重试次数
 EMPTY_RESPONSE_RETRY_DELAY = 3  # 重试前等待时间（秒）
 
+# 网络层回复完成检测（监听平台流式接口，DOM 稳定检测仅作为备用）
+NETWORK_COMPLETION_DETECTION = True
+STREAM_START_TIMEOUT = 5  # 发送后等待流式请求开始的时间（秒），超时则回退到 DOM 检测
+
+# 错误状态检测：等待回复期间在页面端监视错误提示、重试按钮和登录墙，出现时立即结束等待并交给重试逻辑
+ERROR_STATE_DETECTION = True
+
+# 流式捕获：回复生成过程中实时推送增量文本到界面，并追加写入部分结果文件
+STREAM_CAPTURE = True
+STREAM_FLUSH_INTERVAL_MS = 200  # 页面端合并推送增量的间隔（毫秒）
+PARTIAL_RESULTS_DIR = OUTPUT_DIR / "partial"  # 部分结果文件目录（崩溃后可从此恢复）
+
+# 资源过滤：中止统计、遥测、第三方字体和媒体等与聊天无关的请求
+# 各平台可在自动化类的 BLOCKED_URL_PATTERNS 中追加专属规则
+BLOCK_UNNEEDED_RESOURCES = True
+BLOCKED_URL_PATTERNS = [
+    # 统计 / 遥测
+    r'google-analytics\.com', r'googletagmanager\.com', r'doubleclick\.net',
+    r'(api|cdn)\.segment\.(io|com)', r'sentry\.io', r'browser-intake-[\w-]*datadoghq',
+    r'widget\.intercom\.io', r'js\.intercomcdn\.com', r'hotjar\.com', r'mixpanel\.com',
+    r'amplitude\.com', r'fullstory\.com', r'clarity\.ms', r'connect\.facebook\.net',
+    # 头像
+    r'gravatar\.com', r'cdn\.auth0\.com/avatars',
+    # 音视频
+    r'\.(mp4|webm|mp3|ogg|wav)(\?|$)',
+]
+BLOCKED_FONT_PATTERNS = [r'fonts\.(googleapis|gstatic)\.com']  # 第三方字体
+
+# 批量上传：一次 set_input_files 附加整批图片，只等待一次附件就绪
+BATCH_UPLOAD = True
+BATCH_UPLOAD_TIMEOUT = 30  # 等待整批附件出现的最长时间（秒）
+
+# 自适应上传方式：按各平台实测耗时选择 file input / 剪贴板 / DataTransfer / 拖放
+ADAPTIVE_UPLOAD = True
+UPLOAD_VERIFY_TIMEOUT = 10  # 单张图片上传后等待附件出现的最长时间（秒），超时视为该方式失败
+
+# 流水线发送：当前批次生成回复期间，预先上传下一批图片并填好提示词（需平台支持）
+PIPELINE_BATCHES = False
+
+# 备用标签页：后台预先打开一个新对话，新建聊天时直接切换标签页
+SPARE_TAB = True
+
+# 按浏览器负载自动新建聊天：对话越长标签页越臃肿，超过任一阈值时切换到新对话
+AUTO_ROTATE_ON_LOAD = False
+ROTATE_HEAP_MB = 800          # JS 堆使用量阈值（MB），0 表示不检查
+ROTATE_DOM_NODES = 200000     # DOM 节点数阈值，0 表示不检查
+ROTATE_LATENCY_FACTOR = 2.0   # 最近几轮耗时中位数达到新对话基线的倍数，0 表示不检查
+ROTATE_BASELINE_TURNS = 3     # 计算耗时基线与最近耗时所用的轮数
+
+# 浏览器资源监测：定期采集浏览器各进程的 CPU/内存（需安装 psutil）与各标签页的 JS 堆、DOM 节点
+RESOURCE_MONITOR = True
+RESOURCE_MONITOR_INTERVAL = 10  # 采样间隔（秒）
+RUN_METRICS_DIR = OUTPUT_DIR / "metrics"  # 运行指标文件目录（每次启动浏览器一个 JSONL 文件）
+
+# 自适应发送节奏：按各平台实测的成功/上限信号学习发送间隔，在到达硬性上限前平滑降速
+RATE_GOVERNOR = False
+RATE_INITIAL_INTERVAL = 0     # 没有历史状态时两次发送开始之间的间隔（秒）
+RATE_MIN_INTERVAL = 0         # 发送间隔下限（秒）
+RATE_MAX_INTERVAL = 600       # 发送间隔上限（秒）
+RATE_SPEEDUP_STEP = 2.0       # 每次成功后间隔缩短的秒数
+RATE_BACKOFF_FACTOR = 2.0     # 触发上限后间隔放大的倍数
+RATE_WINDOW = 3600            # 统计发送条数的窗口（秒）
+RATE_WINDOW_SAFETY = 0.9      # 按学到的窗口上限的多少比例发送
+
+# 回复耗时统计：保留每个平台最近多少轮的首字 / 完成耗时
+LATENCY_HISTORY = 200
+
+# 自适应等待预算：按本平台同图片数的历史耗时分位数 × 余量决定首字与完成的超时，
+# 样本不足时完成超时使用 WAIT_TIMEOUT、不限制首字时间
+ADAPTIVE_TIMEOUT = True
+TIMEOUT_PERCENTILE = 99       # 预算使用的分位数
+TIMEOUT_MARGIN = 1.5          # 预算 = 分位数 × 余量
+TIMEOUT_MIN_SAMPLES = 10      # 样本少于此数时使用固定超时
+FIRST_TOKEN_TIMEOUT_MIN = 20  # 首字预算下限（秒）
+REPLY_TIMEOUT_MIN = 30        # 完成预算下限（秒）
+REPLY_TIMEOUT_MAX = 900       # 完成预算上限（秒）
+
+# 对冲请求：本批超过历史耗时分位数仍未出字或未完成时，在另一个标签页重发，取先完成的回复
+HEDGE_REQUESTS = False
+HEDGE_PERCENTILE = 95   # 触发阈值使用的分位数
+HEDGE_MARGIN = 1.2      # 阈值 = 分位数 × 余量
+HEDGE_MIN_SAMPLES = 8   # 样本少于此数时不对冲
+
+# 上限提示中给出重置时间时，在重置后再等待的秒数（之后自动恢复）
+LIMIT_RESET_MARGIN = 30
+
+# 失败转移：当前平台触发上限时，剩余批次转到下一个已登录的平台（在同一浏览器中打开新标签页），
+# 原平台重置后自动切回；所有平台都受限时才暂停
+FAILOVER_ON_LIMIT = False
+FAILOVER_PLATFORMS = ["chatgpt", "claude", "gemini", "deepseek"]  # 备用平台优先级（平台 ID，当前平台始终最先）
+
+# 运行统计目录（选择器命中等跨运行持久化的数据）
+STATS_DIR = PROJECT_ROOT / "stats"
+
+# 选择器缓存：记住每个元素上次命中的选择器并优先尝试
+SELECTOR_CACHE = True
+
+# API 模式：直接调用 OpenAI 兼容的视觉模型接口（不启动浏览器，需安装 httpx）
+API_BASE_URL = os.environ.get("PDFAI_API_BASE_URL", "https://api.openai.com/v1")  # 可改为本地兼容服务
+API_KEY = os.environ.get("PDFAI_API_KEY") or os.environ.get("OPENAI_API_KEY", "")
+API_MODEL = os.environ.get("PDFAI_API_MODEL", "gpt-4o-mini")
+API_MAX_CONCURRENT_REQUESTS = 4  # 同时进行的请求数上限（也是连接池大小）
+API_IMAGE_DETAIL = "high"        # 图片精度: low / high / auto
+API_MAX_TOKENS = 0               # 单次回复的最大 token 数，0 表示不限制
+API_KEEP_HISTORY = False         # 是否把之前的问答作为上下文一起发送（开启后不能预先发送下一批）
+
 # 确保目录存在
 OUTPUT_DIR.mkdir(exist_ok=True)
 BROWSER_DATA_DIR.mkdir(exist_ok=True)
@@ -0,0 +1,298 @@
+"""
+OpenAI 兼容 API 模块
+
+不启动浏览器，直接调用 OpenAI 兼容的视觉模型接口（/chat/completions）
+复用连接池中的长连接，限制同时进行的请求数，并以流式方式接收回复
+接口地址可配置，本地兼容服务（如 benchmarks/mock_server.py）同样适用
+"""
+import asyncio
+import base64
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.base_automation import BaseAIAutomation, LoginRequiredError
+import config
+
+
+class APIRequestError(Exception):
+    """接口返回错误状态码"""
+
+    def __init__(self, status: int, message: str):
+        self.status = status
+        super().__init__(f"API 请求失败 (HTTP {status}): {message}")
+
+
+@dataclass
+class _PendingRequest:
+    """已发出、尚未取回结果的一次请求"""
+    turn: int
+    user_message: dict
+    task: Optional[asyncio.Task] = None
+    text: str = ""
+
+
+class APIAutomation(BaseAIAutomation):
+    """OpenAI 兼容 API 自动化类（与网页平台共用批处理流程）"""
+
+    PLATFORM_NAME = "API"
+    PLATFORM_URL = config.API_BASE_URL
+
+    # 预先准备下一批 = 提前发出下一批的请求（受并发上限约束）
+    SUPPORTS_PIPELINING = True
+
+    def __init__(self):
+        super().__init__()
+        self.client: Optional["httpx.AsyncClient"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._history: list = []
+        self._current: Optional[_PendingRequest] = None
+        self._staged: Optional[_PendingRequest] = None
+        self._prepared: Optional[tuple] = None
+        self._request_seq = 0
+
+    async def start_browser(self, headless: Optional[bool] = None) -> None:
+        """创建 HTTP 连接池（API 模式没有浏览器，保留方法名以兼容批处理流程）"""
+        if httpx is None:
+            raise RuntimeError("API 模式需要安装 httpx: pip install httpx")
+
+        base_url = self.PLATFORM_URL.rstrip('/')
+        if not config.API_KEY and "api.openai.com" in base_url:
+            raise LoginRequiredError("未配置 API Key，请设置环境变量 PDFAI_API_KEY 或 OPENAI_API_KEY")
+
+        limit = max(1, config.API_MAX_CONCURRENT_REQUESTS)
+        headers = {'Content-Type': 'application/json'}
+        if config.API_KEY:
+            headers['Authorization'] = f"Bearer {config.API_KEY}"
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit, keepalive_expiry=60),
+            # 读超时是两个流式分块之间的最长间隔，整体超时由 wait_for_response_complete 控制
+            timeout=httpx.Timeout(config.WAIT_TIMEOUT / 1000, connect=15),
+        )
+        self._semaphore = asyncio.Semaphore(limit)
+        print(f"[{self.PLATFORM_NAME}] 接口: {base_url}  模型: {config.API_MODEL}  并发上限: {limit}")
+        print("浏览器已准备就绪")
+
+    async def attach_to(self, host: BaseAIAutomation) -> None:
+        """作为备用平台时不需要宿主的浏览器，直接创建连接池"""
+        await self.start_browser()
+
+    async def get_login_state(self) -> Optional[bool]:
+        return self.client is not None
+
+    # ═══════════════════════════════════════════════════════════
+    # 发送与接收
+    # ═══════════════════════════════════════════════════════════
+
+    async def upload_images_and_send(self, image_paths: list, prompt: str) -> None:
+        """发出请求（不等待回复）"""
+        await self._prepare_message(image_paths, prompt)
+        await self._send_message()
+
+    async def _prepare_message(self, image_paths: list, prompt: str) -> None:
+        self._prepared = (list(image_paths), prompt)
+
+    async def _send_message(self) -> None:
+        image_paths, prompt = self._prepared
+        self._prepared = None
+        self._current = self._dispatch(image_paths, prompt)
+        self._activate(self._current)
+        print(f"[{self.PLATFORM_NAME}] 已发送 {len(image_paths)} 张图片")
+
+    async def wait_for_response_complete(self, timeout_ms: int = None) -> str:
+        """等待当前请求的流式回复结束，超时返回已收到的部分"""
+        if timeout_ms is None:
+            timeout_ms = config.WAIT_TIMEOUT
+        request = self._current
+        if request is None:
+            return ""
+
+        try:
+            text = await asyncio.wait_for(asyncio.shield(request.task), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            request.task.cancel()
+            print(f"[{self.PLATFORM_NAME}] 等待回复超时，返回已收到的 {len(request.text)} 字")
+            text = request.text
+        finally:
+            self._current = None
+
+        if config.API_KEEP_HISTORY and text.strip():
+            self._history += [request.user_message, {'role': 'assistant', 'content': text}]
+        print(f"[{self.PLATFORM_NAME}] 回复已完成 ✓ ({len(text)} 字)")
+        return text
+
+    def _dispatch(self, image_paths: list, prompt: str) -> _PendingRequest:
+        """构造消息并在后台发出请求"""
+        content = [{'type': 'text', 'text': prompt}]
+        for path in image_paths:
+            data = base64.b64encode(Path(path).read_bytes()).decode('ascii')
+            content.append({
+                'type': 'image_url',
+                'image_url': {
+                    'url': f"data:{self._get_mime_type(path)};base64,{data}",
+                    'detail': config.API_IMAGE_DETAIL,
+                },
+            })
+
+        self._request_seq += 1
+        request = _PendingRequest(self._request_seq, {'role': 'user', 'content': content})
+        messages = (self._history if config.API_KEEP_HISTORY else []) + [request.user_message]
+        request.task = asyncio.ensure_future(self._stream_completion(request, messages))
+        # 被丢弃的请求出错时不再提示 "exception was never retrieved"
+        request.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return request
+
+    def _activate(self, request: _PendingRequest) -> None:
+        """把请求设为当前轮：之后的流式增量推送到界面"""
+        self._turn_started_at = time.monotonic()
+        self._first_token_at = self._turn_started_at if request.text else None
+        self._stream_turn = request.turn
+        self._stream_text = request.text
+        if config.STREAM_CAPTURE:
+            self._open_partial_turn()
+            if request.text:
+                # 提前发出的请求已收到的内容
+                self._publish(request.text)
+
+    async def _stream_completion(self, request: _PendingRequest, messages: list) -> str:
+        payload = {
+            'model': config.API_MODEL,
+            'messages': messages,
+            'stream': True,
+        }
+        if config.API_MAX_TOKENS:
+            payload['max_tokens'] = config.API_MAX_TOKENS
+
+        async with self._semaphore:
+            async with self.client.stream('POST', '/chat/completions', json=payload) as response:
+                if response.status_code >= 400:
+                    body = (await response.aread()).decode('utf-8', 'replace')
+                    try:
+                        body = json.loads(body)['error']
+                        body = body.get('message', body) if isinstance(body, dict) else body
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                    raise APIRequestError(response.status_code, str(body)[:300])
+
+                async for line in response.aiter_lines():
+                    if not line.startswith('data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == '[DONE]':
+                        break
+                    try:
+                        choices = json.loads(data).get('choices') or [{}]
+                        delta = (choices[0].get('delta') or {}).get('content') or ""
+                    except (ValueError, AttributeError):
+                        continue
+                    if delta:
+                        request.text += delta
+                        if request.turn == self._stream_turn:
+                            if self._first_token_at is None:
+                                self._first_token_at = time.monotonic()
+                            self._stream_text = request.text
+                            self._publish(delta)
+        return request.text
+
+    def _observes_first_token(self) -> bool:
+        return True
+
+    async def _get_last_response(self) -> str:
+        """当前轮已收到的文本"""
+        return self._stream_text
+
+    def _publish(self, text: str) -> None:
+        """推送当前轮的增量文本（界面 + 部分结果文件）"""
+        if not config.STREAM_CAPTURE:
+            return
+        self._write_partial(text)
+        if self.on_stream_delta:
+            try:
+                self.on_stream_delta(text, self._stream_text)
+            except Exception as e:
+                print(f"[{self.PLATFORM_NAME}] 流式回调出错: {e}")
+
+    # ═══════════════════════════════════════════════════════════
+    # 流水线：提前发出下一批的请求
+    # ═══════════════════════════════════════════════════════════
+
+    async def stage_batch(self, image_paths: list, prompt: str) -> bool:
+        # 携带上下文时下一批依赖本轮回复，不能提前发出
+        if config.API_KEEP_HISTORY or self.client is None:
+            return False
+        self._staged = self._dispatch(image_paths, prompt)
+        self.staged_images = list(image_paths)
+        print(f"[{self.PLATFORM_NAME}] 下一批 ({len(image_paths)} 张) 已提前发出 ✓")
+        return True
+
+    async def send_staged(self) -> None:
+        self.staged_images = None
+        self._current, self._staged = self._staged, None
+        self._activate(self._current)
+
+    async def discard_staged(self) -> None:
+        self.staged_images = None
+        if self._staged is not None:
+            self._staged.task.cancel()
+            self._staged = None
+
+    # ═══════════════════════════════════════════════════════════
+    # 对话与生命周期
+    # ═══════════════════════════════════════════════════════════
+
+    async def create_new_chat(self) -> None:
+        """清空上下文"""
+        self._history = []
+        print(f"[{self.PLATFORM_NAME}] 新对话已开始 ✓")
+
+    async def check_chat_health(self) -> Optional[str]:
+        """只在携带上下文时按单轮耗时判断是否需要新对话"""
+        if self._turn_started_at is not None:
+            self.health_monitor.record_turn(time.monotonic() - self._turn_started_at)
+            self._turn_started_at = None
+        if not config.API_KEEP_HISTORY:
+            return None
+        return await self.health_monitor.check()
+
+    async def fork(self) -> "APIAutomation":
+        """共用连接池与并发上限的分身（对冲请求使用）"""
+        clone = self.__class__()
+        clone.PLATFORM_URL = self.PLATFORM_URL
+        clone.client = self.client
+        clone._semaphore = self._semaphore
+        return clone
+
+    async def close_fork(self) -> None:
+        await self._stop_generation()
+
+    async def _stop_generation(self) -> None:
+        """取消当前请求"""
+        if self._current is not None and self._current.task:
+            self._current.task.cancel()
+        self._current = None
+
+    async def close(self) -> None:
+        """取消未完成的请求并关闭连接池"""
+        for request in (self._current, self._staged):
+            if request is not None and request.task:
+                request.task.cancel()
+        self._current = self._staged = None
+        if self._hedge_fork is not None:
+            await self._hedge_fork.close_fork()
+            self._hedge_fork = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        print(f"[{self.PLATFORM_NAME}] 连接已关闭")
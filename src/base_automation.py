@@ -4,12 +4,55 @@ AI 平台自动化基类
 定义所有 AI 平台自动化类的通用接口
 """
 import asyncio
+import base64
+import sys
+import time
+import uuid
 from abc import ABC, abstractmethod
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+from urllib.parse import urlparse
 
 from playwright.async_api import async_playwright, Page, BrowserContext
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.network_monitor import ResponseStreamMonitor
+from src.resource_filter import ResourceFilter
+from src.page_runtime import build_runtime_script
+from src.selector_cache import SelectorCache
+from src.upload_transport import UploadTransportStats
+from src.browser_metrics import ChatHealthMonitor
+from src.resource_monitor import BrowserResourceMonitor
+from src.rate_governor import RateGovernor
+from src.limit_reset import parse_reset_time
+from src.latency_stats import LatencyStats
+import config
+
+
+class LoginRequiredError(Exception):
+    """平台登录状态已失效（无头模式下无法人工登录）"""
+
+
+class ReplyTimeoutError(Exception):
+    """超过本轮的首字等待预算仍未开始回复"""
+
+
+class ChatErrorStateError(Exception):
+    """等待回复期间页面出现错误状态"""
+    
+    def __init__(self, kind: str, text: str = ""):
+        """
+        Args:
+            kind: 'error' 错误提示 / 'retry' 没有回复内容且出现重试按钮 / 'login' 登录墙
+            text: 页面上的错误文本（登录墙为当前 URL）
+        """
+        self.kind = kind
+        self.text = text
+        labels = {'error': "页面显示错误", 'retry': "回复失败，页面提示重试", 'login': "登录状态已失效"}
+        super().__init__(f"{labels.get(kind, kind)}: {text}" if text else labels.get(kind, kind))
+
 
 class BaseAIAutomation(ABC):
     """AI 平台自动化基类"""
@@ -17,21 +60,159 @@ class BaseAIAutomation(ABC):
     PLATFORM_NAME: str = "Base"
     PLATFORM_URL: str = ""
     
+    # 平台流式回复接口的 URL 正则（用于网络层完成检测），为空则只使用 DOM 检测
+    STREAM_URL_PATTERNS: list = []
+    
+    # 平台专属的拦截规则（追加在 config.BLOCKED_URL_PATTERNS 之后）
+    BLOCKED_URL_PATTERNS: list = []
+    # 是否拦截第三方字体（图标依赖字体的平台需关闭）
+    BLOCK_THIRD_PARTY_FONTS: bool = True
+    
+    # 登录状态检测：URL 包含这些关键词或页面出现这些元素时视为未登录
+    LOGIN_URL_KEYWORDS: list = []
+    LOGGED_OUT_SELECTORS: list = []
+    
+    # 平台选择器，子类按需覆盖。页面运行时使用的键：
+    # input_box / send_button / stop_button / response_container /
+    # error_toast / error_state / retry_button / attachment / attachment_loading
+    # error_state: 回复出错时显示的错误横幅；retry_button: 出错后出现的重试 / 重新生成按钮
+    # regenerate_button: 回复下方的重新生成按钮（regenerate_last_response 只在本轮回复的区域内查找）
+    # limit_banner: 用量上限横幅（find_limit_reset 从中解析重置时间）
+    # 批量上传使用 file_input（默认为页面上的第一个文件输入框）
+    SELECTORS: dict = {}
+    
+    # 回复区域外新出现这些文字（不区分大小写）时视为本轮出错，子类可追加平台专属提示
+    ERROR_STATE_TEXTS: list = [
+        "something went wrong", "network error", "an error occurred", "there was an error",
+        "error in message stream", "出了点问题", "网络错误", "发生错误", "出错了",
+        # 上限提示：抛出的 ChatErrorStateError 带有原文，批处理流程据此暂停或失败转移
+        "usage limit", "rate limit", "reached your limit", "too many requests",
+    ]
+    
+    # 图片上传方式的默认尝试顺序（有实测统计后按耗时重新排序）
+    # file_input / clipboard / datatransfer / drag_drop
+    UPLOAD_TRANSPORTS: list = ['file_input', 'clipboard', 'datatransfer', 'drag_drop']
+    
+    # 回复生成期间输入框能否接受下一批附件与提示词
+    # 设为 True 的平台需实现 _prepare_message（上传并填写，不发送）与 _send_message（点击发送）
+    SUPPORTS_PIPELINING: bool = False
+    
+    # 平台自身的等待逻辑超过完成预算后，最多再等待的秒数（之后强制结束并返回已生成的内容）
+    REPLY_GRACE_SECONDS = 15
+    
+    # 页面向 Python 推送流式增量文本时使用的绑定名称
+    STREAM_BINDING_NAME = "__pdfaiStreamDelta"
+    
+    # 图片传输使用的同源拦截路径（由 page.route 直接返回本地文件）
+    IMAGE_ROUTE_PREFIX = "/__pdfai_image/"
+    
+    MIME_TYPES = {
+        '.png': 'image/png',
+        '.jpg': 'image/jpeg',
+        '.jpeg': 'image/jpeg',
+        '.gif': 'image/gif',
+        '.webp': 'image/webp',
+    }
+    
     def __init__(self):
         self.playwright = None
         self.browser = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        # 通过 attach_to() 借用其他平台的浏览器时为 True（关闭时只关闭自己的标签页）
+        self._shared_context = False
+        self.headless = config.HEADLESS
+        self.stream_monitor: Optional[ResponseStreamMonitor] = None
+        self.resource_filter: Optional[ResourceFilter] = None
+        self._runtime_script: Optional[str] = None
+        self.selector_cache: Optional[SelectorCache] = None
+        if config.SELECTOR_CACHE:
+            self.selector_cache = SelectorCache(
+                config.STATS_DIR / f"selectors_{self.PLATFORM_NAME.lower()}.json", self.PLATFORM_NAME
+            )
+        self.upload_stats: Optional[UploadTransportStats] = None
+        if config.ADAPTIVE_UPLOAD:
+            self.upload_stats = UploadTransportStats(
+                config.STATS_DIR / f"upload_{self.PLATFORM_NAME.lower()}.json", self.PLATFORM_NAME
+            )
+        
+        # 流式捕获：回调参数为 (增量文本, 当前完整文本)
+        self.on_stream_delta: Optional[Callable[[str, str], None]] = None
+        self._stream_binding_installed = False
+        self._stream_binding_name = self.STREAM_BINDING_NAME
+        self._stream_turn = 0
+        self._stream_text = ""
+        self._partial_file: Optional[Path] = None
+        
+        # 图片传输：token -> 本地文件路径
+        self._served_images: dict = {}
+        self._image_route_page: Optional[Page] = None
+        
+        # 流水线发送：已预先放入输入框、尚未发送的图片
+        self.staged_images: Optional[list] = None
+        
+        # 浏览器负载监测：JS 堆 / DOM 节点 / 单轮耗时
+        self.health_monitor = ChatHealthMonitor(
+            self.PLATFORM_NAME,
+            heap_limit_mb=config.ROTATE_HEAP_MB,
+            node_limit=config.ROTATE_DOM_NODES,
+            latency_factor=config.ROTATE_LATENCY_FACTOR,
+            baseline_turns=config.ROTATE_BASELINE_TURNS,
+        )
+        self._turn_started_at: Optional[float] = None
+        self._first_token_at: Optional[float] = None
+        self._reply_deadline: Optional[float] = None  # 本轮完成预算的截止时间（monotonic）
+        self._turn_marker: Optional[int] = None  # 发送前的回复数；记录后只读取本轮新出现的回复
+        
+        # 回复耗时分布（首字 / 完成），用于对冲请求的触发阈值
+        self.latency_stats = LatencyStats(
+            config.STATS_DIR / f"latency_{self.PLATFORM_NAME.lower()}.json",
+            self.PLATFORM_NAME,
+            history=config.LATENCY_HISTORY,
+        )
+        # 对冲请求：默认在同一浏览器的另一个标签页重发，也可指定其他已登录平台的实例
+        self.hedge_partner: Optional["BaseAIAutomation"] = None
+        self._hedge_fork: Optional["BaseAIAutomation"] = None
+        self.last_reply_hedged = False
+        
+        # 浏览器资源监测：回调参数为采样结果（见 BrowserResourceMonitor.sample）
+        self.resource_monitor: Optional[BrowserResourceMonitor] = None
+        self.on_resource_sample: Optional[Callable[[dict], None]] = None
+        
+        # 备用标签页：已加载新对话、等待切换的页面
+        self._spare_page: Optional[Page] = None
+        self._spare_task: Optional[asyncio.Task] = None
+        
+        # 自适应发送节奏（按本平台的成功/上限信号学习发送间隔，是否启用由批处理流程决定）
+        self.rate_governor = RateGovernor(
+            config.STATS_DIR / f"rate_{self.PLATFORM_NAME.lower()}.json",
+            self.PLATFORM_NAME,
+            initial_interval=config.RATE_INITIAL_INTERVAL,
+            min_interval=config.RATE_MIN_INTERVAL,
+            max_interval=config.RATE_MAX_INTERVAL,
+            speedup_step=config.RATE_SPEEDUP_STEP,
+            backoff_factor=config.RATE_BACKOFF_FACTOR,
+            window=config.RATE_WINDOW,
+            safety=config.RATE_WINDOW_SAFETY,
+        )
     
-    async def start_browser(self) -> None:
-        """启动浏览器并打开目标平台"""
+    async def start_browser(self, headless: Optional[bool] = None) -> None:
+        """
+        启动浏览器并打开目标平台
+        
+        Args:
+            headless: 是否使用无头模式，默认读取 config.HEADLESS。
+                      无头模式复用 BROWSER_DATA_DIR 中的登录状态，登录失效时抛出 LoginRequiredError
+        """
         import sys
         import os
         import subprocess
-        sys.path.insert(0, str(Path(__file__).parent.parent))
-        import config
         
-        print(f"正在启动浏览器 ({self.PLATFORM_NAME})...")
+        if headless is not None:
+            self.headless = headless
+        
+        mode = "无头模式" if self.headless else "有界面模式"
+        print(f"正在启动浏览器 ({self.PLATFORM_NAME}, {mode})...")
         
         # 首次启动时自动安装 Playwright 浏览器
         await self._ensure_browser_installed()
@@ -61,11 +242,15 @@ class BaseAIAutomation(ABC):
         # 使用持久化上下文保持登录状态
         launch_options = {
             'user_data_dir': str(config.BROWSER_DATA_DIR),
-            'headless': False,
+            'headless': self.headless,
             'viewport': {'width': 1280, 'height': 900},
             'args': browser_args
         }
         
+        # 部分平台会拒绝 HeadlessChrome 的 User-Agent
+        if self.headless and config.HEADLESS_USER_AGENT:
+            launch_options['user_agent'] = config.HEADLESS_USER_AGENT
+        
         # 如果找到系统 Chrome/Edge，使用它
         if chrome_path:
             launch_options['executable_path'] = chrome_path
@@ -81,11 +266,17 @@ class BaseAIAutomation(ABC):
                 del launch_options['executable_path']
             self.context = await self.playwright.chromium.launch_persistent_context(**launch_options)
         
+        await self._install_resource_filter()
+        await self._install_page_runtime()
+        
         if self.context.pages:
             self.page = self.context.pages[0]
         else:
             self.page = await self.context.new_page()
         
+        self._attach_stream_monitor()
+        await self._install_stream_binding()
+        
         print(f"正在打开 {self.PLATFORM_NAME}: {self.PLATFORM_URL}")
         # 使用 domcontentloaded 替代 networkidle，避免单页应用超时
         # 增加超时时间到 60 秒
@@ -98,11 +289,119 @@ class BaseAIAutomation(ABC):
         await asyncio.sleep(3)
         
         await self._check_login_status()
+        self._start_resource_monitor()
+    
+    async def attach_to(self, host: "BaseAIAutomation") -> None:
+        """
+        在另一个平台已启动的浏览器中打开本平台（新标签页），代替 start_browser()
+        
+        共用宿主的持久化上下文（同一份登录数据），不再启动第二个浏览器；
+        登录状态在限定时间内无法确认时关闭标签页并抛出 LoginRequiredError
+        """
+        self.context = host.context
+        self.headless = host.headless
+        self._shared_context = True
+        # 页面运行时与流式绑定注册在整个上下文上，按平台区分名称避免与宿主冲突
+        self._stream_binding_name = f"{self.STREAM_BINDING_NAME}_{type(self).__name__}"
+        await self._install_page_runtime()
+        # 宿主的资源过滤对整个上下文生效，本平台标签页改用本平台的规则（如 Gemini 不拦截字体）
+        if host.resource_filter is not None:
+            try:
+                await host.resource_filter.add_site_rules(
+                    self.PLATFORM_URL, self._blocked_url_patterns(), self.PLATFORM_NAME)
+            except Exception as e:
+                print(f"[{self.PLATFORM_NAME}] 设置资源过滤规则失败: {e}")
+        
+        self.page = await self.context.new_page()
+        self._attach_stream_monitor()
+        await self._install_stream_binding()
+        
+        print(f"[{self.PLATFORM_NAME}] 在已启动的浏览器中打开: {self.PLATFORM_URL}")
+        try:
+            # 新标签页会抢占前台，切回宿主的工作标签页
+            await host.page.bring_to_front()
+            await self.page.goto(self.PLATFORM_URL, wait_until='domcontentloaded', timeout=60000)
+        except Exception as e:
+            print(f"页面加载超时，继续执行... {e}")
+        
+        # 批处理中途无法等待人工登录：有界面模式同样限时确认
+        deadline = time.monotonic() + config.LOGIN_CHECK_TIMEOUT
+        state = None
+        while time.monotonic() < deadline:
+            state = await self.get_login_state()
+            if state is not None:
+                break
+            await asyncio.sleep(1)
+        if state is not True:
+            await self.close()
+            raise LoginRequiredError(f"{self.PLATFORM_NAME} 未登录，无法作为备用平台")
+        print(f"[{self.PLATFORM_NAME}] 登录状态有效 ✓")
+    
+    def _start_resource_monitor(self) -> None:
+        """开始周期采集浏览器进程与标签页的资源占用"""
+        if not config.RESOURCE_MONITOR:
+            return
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        self.resource_monitor = BrowserResourceMonitor(
+            config.BROWSER_DATA_DIR,
+            self.PLATFORM_NAME,
+            interval=config.RESOURCE_MONITOR_INTERVAL,
+            metrics_path=config.RUN_METRICS_DIR / f"run_{timestamp}_{self.PLATFORM_NAME.lower()}.jsonl",
+        )
+        self.resource_monitor.on_sample = self._on_resource_sample
+        self.resource_monitor.start(self.context)
+    
+    def _on_resource_sample(self, sample: dict) -> None:
+        if self.on_resource_sample:
+            self.on_resource_sample(sample)
     
     async def _check_login_status(self) -> None:
-        """等待页面加载完成"""
-        await asyncio.sleep(2)
-        print("浏览器已准备就绪")
+        """
+        等待页面加载完成
+        
+        无头模式下无法人工登录，因此在此确认登录状态，失效时立即失败
+        """
+        if not self.headless:
+            await asyncio.sleep(2)
+            print("浏览器已准备就绪")
+            return
+        
+        deadline = time.monotonic() + config.LOGIN_CHECK_TIMEOUT
+        while True:
+            state = await self.get_login_state()
+            if state is True:
+                print(f"[{self.PLATFORM_NAME}] 登录状态有效 ✓")
+                print("浏览器已准备就绪")
+                return
+            if state is False or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(1)
+        
+        await self.close()
+        raise LoginRequiredError(
+            f"{self.PLATFORM_NAME} 登录状态已失效，请关闭无头模式重新登录后再试"
+        )
+    
+    async def get_login_state(self) -> Optional[bool]:
+        """
+        检测当前登录状态
+        
+        Returns:
+            True 已登录（输入框可用）；False 明确未登录；None 页面尚未就绪
+        """
+        try:
+            url = (self.page.url or "").lower()
+        except:
+            url = ""
+        if any(keyword in url for keyword in self.LOGIN_URL_KEYWORDS):
+            return False
+        
+        if self.LOGGED_OUT_SELECTORS and await self._try_find(self.LOGGED_OUT_SELECTORS):
+            return False
+        
+        if not self.SELECTORS.get('input_box'):
+            return True
+        return True if await self._try_find(self.SELECTORS['input_box'], key='input_box') else None
     
     async def _ensure_browser_installed(self) -> None:
         """确保 Playwright 浏览器已安装，如果没有则自动安装"""
@@ -211,6 +510,95 @@ class BaseAIAutomation(ABC):
         """
         await self.upload_images_and_send([image_path], prompt)
     
+    # ═══════════════════════════════════════════════════════════
+    # 流水线发送：回复生成期间预先准备下一条消息
+    # ═══════════════════════════════════════════════════════════
+    
+    async def stage_batch(self, image_paths: list, prompt: str) -> bool:
+        """
+        在当前回复生成期间预先准备下一批图片和提示词
+        
+        Returns:
+            是否已准备好；失败时输入框会被清空，调用方按正常流程上传即可
+        """
+        if not self.SUPPORTS_PIPELINING or not hasattr(self, '_prepare_message'):
+            return False
+        try:
+            await self._prepare_message(image_paths, prompt)
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 预先准备下一批失败: {e}")
+            await self.discard_staged()
+            return False
+        self.staged_images = list(image_paths)
+        print(f"[{self.PLATFORM_NAME}] 下一批 ({len(image_paths)} 张) 已预先准备 ✓")
+        return True
+    
+    async def send_staged(self) -> None:
+        """发送 stage_batch 预先准备好的消息"""
+        self.staged_images = None
+        await self._send_message()
+    
+    async def discard_staged(self) -> None:
+        """清空输入框中预先准备的附件与提示词（重试、换聊天或停止时调用）"""
+        self.staged_images = None
+        try:
+            input_area = await self._focus_input()
+            if input_area:
+                await self.page.keyboard.press('Control+a')
+                await self.page.keyboard.press('Backspace')
+            
+            if not await self._remove_attachments():
+                # 无法逐个移除时重新加载页面（草稿附件不会保留）
+                print(f"[{self.PLATFORM_NAME}] 无法移除预先上传的附件，重新加载页面")
+                await self.page.reload(wait_until='domcontentloaded', timeout=30000)
+                await asyncio.sleep(2)
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 清空预先准备的内容失败: {e}")
+    
+    async def regenerate_last_response(self) -> bool:
+        """
+        用平台的重新生成 / 重试按钮在当前轮重新生成回复（空白回复重试时代替重新上传整批图片）
+        
+        只在本批的回复已经出现时使用，并且只点击属于本轮回复的按钮（出错时优先本轮新出现的重试按钮），
+        否则会重新生成上一批的回复并把它当作本批的结果。成功后与正常发送一样调用 wait_for_reply 等待新回复
+        
+        Returns:
+            是否已触发重新生成；平台不支持、本批没有回复或找不到按钮时返回 False，调用方改为重新上传
+        """
+        if self.page is None or self._turn_marker is None:
+            return False
+        if not (self.SELECTORS.get('regenerate_button') or self.SELECTORS.get('retry_button')):
+            return False
+        
+        # 没有出现本批的回复（发送失败，或在回复创建之前出错）时，页面上最后一条是上一批的回复
+        if not (await self._page_state()).get('turnStarted'):
+            print(f"[{self.PLATFORM_NAME}] 本批没有出现回复，改为重新上传")
+            return False
+        
+        kind = await self._runtime('turnControl')
+        if kind is None:
+            # 回复下方的操作按钮通常在鼠标悬停时才显示
+            try:
+                await self.page.locator('[data-pdfai-target="turn"]').hover(timeout=2000)
+            except Exception:
+                pass
+            kind = await self._runtime('turnControl')
+        if kind is None:
+            print(f"[{self.PLATFORM_NAME}] 未找到本轮回复的重新生成按钮，改为重新上传")
+            return False
+        
+        await self._before_send(regenerate=True)
+        try:
+            await self.page.locator('[data-pdfai-target="control"]').click(timeout=3000)
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 点击重新生成失败，改为重新上传: {e}")
+            await self._stop_stream_capture()
+            if self.stream_monitor:
+                self.stream_monitor.disarm()
+            return False
+        print(f"[{self.PLATFORM_NAME}] 已在当前轮重新生成回复 ✓ ({'重试' if kind == 'retry' else '重新生成'})")
+        return True
+    
     @abstractmethod
     async def wait_for_response_complete(self, timeout_ms: int = None) -> str:
         """
@@ -224,6 +612,261 @@ class BaseAIAutomation(ABC):
         """
         pass
     
+    async def wait_for_reply(self, image_paths: list, prompt: str, hedge: bool = False) -> str:
+        """
+        等待本轮回复并记录耗时（批处理流程使用）
+        
+        等待预算按历史耗时分布计算（见 _reply_budgets）：超过首字预算仍未出字时停止生成并抛出
+        ReplyTimeoutError 交给重试逻辑；超过完成预算时返回已生成的内容
+        
+        Args:
+            image_paths: 本轮发送的图片（对冲时原样重发）
+            prompt: 本轮提示词
+            hedge: 超过历史分位数仍未出字或未完成时，是否在对冲实例上重发本批并取先完成的回复
+        
+        Returns:
+            AI 的回复内容
+        """
+        self.last_reply_hedged = False
+        images = len(image_paths)
+        started = self._turn_started_at or time.monotonic()
+        first_budget, total_budget = self._reply_budgets(images)
+        self._reply_deadline = started + total_budget
+        primary = asyncio.ensure_future(self.wait_for_response_complete(int(total_budget * 1000)))
+        thresholds = self._hedge_thresholds(images) if hedge else None
+        watcher = asyncio.ensure_future(self._watch_error_state()) if config.ERROR_STATE_DETECTION else None
+        
+        try:
+            while not primary.done():
+                if watcher is not None and watcher.done():
+                    state, watcher = watcher.result(), None
+                    if state:
+                        primary.cancel()
+                        await self._stop_generation()
+                        print(f"[{self.PLATFORM_NAME}] 检测到错误状态 ({state.get('kind')}): {state.get('text', '')}")
+                        raise ChatErrorStateError(state.get('kind', 'error'), state.get('text', ''))
+                elapsed = time.monotonic() - started
+                waiting_first = self._first_token_at is None
+                if thresholds is not None:
+                    first_after, total_after = thresholds
+                    if elapsed >= total_after or (waiting_first and elapsed >= first_after):
+                        thresholds = None
+                        reply = await self._hedge(primary, image_paths, prompt, started)
+                        if reply is not None:
+                            return reply
+                        continue
+                if first_budget is not None and waiting_first and elapsed >= first_budget:
+                    primary.cancel()
+                    await self._stop_generation()
+                    raise ReplyTimeoutError(
+                        f"{self.PLATFORM_NAME} 在 {first_budget:.0f}s 的首字预算内没有开始回复"
+                    )
+                if elapsed >= total_budget + self.REPLY_GRACE_SECONDS:
+                    # 平台自身的等待逻辑没有按预算结束：返回已生成的部分
+                    primary.cancel()
+                    print(f"[{self.PLATFORM_NAME}] 超过 {total_budget:.0f}s 的完成预算，返回已生成的内容")
+                    return await self._get_last_response()
+                await asyncio.wait({primary} | ({watcher} if watcher else set()), timeout=0.5)
+        finally:
+            self._reply_deadline = None
+            if watcher is not None:
+                watcher.cancel()
+                await self._runtime('stopWatching')
+        
+        response = await primary
+        self._record_latency(images, started, response)
+        return response
+    
+    def _reply_budgets(self, images: int) -> tuple:
+        """
+        本轮等待预算（秒）：同图片数（不足时按图片数折算）的历史耗时分位数 × 余量
+        
+        Returns:
+            (首字预算, 完成预算)；样本不足或无法观察首字时首字预算为 None，
+            完成预算回退到 WAIT_TIMEOUT
+        """
+        fixed = config.WAIT_TIMEOUT / 1000
+        if not config.ADAPTIVE_TIMEOUT:
+            return None, fixed
+        stats = self.latency_stats
+        pct, margin, min_samples = config.TIMEOUT_PERCENTILE, config.TIMEOUT_MARGIN, config.TIMEOUT_MIN_SAMPLES
+        total = stats.percentile('total', pct, images, min_samples)
+        if total is None:
+            return None, fixed
+        total = min(max(total * margin, config.REPLY_TIMEOUT_MIN), config.REPLY_TIMEOUT_MAX)
+        first = stats.percentile('first', pct, images, min_samples) if self._observes_first_token() else None
+        if first is not None:
+            first = min(max(first * margin, config.FIRST_TOKEN_TIMEOUT_MIN), total)
+        print(f"[{self.PLATFORM_NAME}] 等待预算: 首字 {f'{first:.0f}s' if first else '不限'} / 完成 {total:.0f}s")
+        return first, total
+    
+    def _observes_first_token(self) -> bool:
+        """本轮能否观察到首字时间（依赖流式捕获）"""
+        return self._stream_binding_installed and bool(self.SELECTORS.get('response_container'))
+    
+    def _remaining_wait(self) -> float:
+        """本轮完成预算剩余的秒数（不在 wait_for_reply 中时为 WAIT_TIMEOUT）"""
+        if self._reply_deadline is None:
+            return config.WAIT_TIMEOUT / 1000
+        return max(1.0, self._reply_deadline - time.monotonic())
+    
+    async def _watch_error_state(self) -> Optional[dict]:
+        """
+        在页面端等待本轮出现错误状态（错误横幅 / 错误文字 / 空回复时的重试按钮 / 登录墙）
+        
+        Returns:
+            {'kind', 'text'}；等待结束前没有出错时返回 None
+        """
+        if not self._runtime_script or self.page is None:
+            return None
+        options = {
+            'texts': self.ERROR_STATE_TEXTS,
+            'loginUrls': self.LOGIN_URL_KEYWORDS,
+            'loggedOut': self.LOGGED_OUT_SELECTORS,
+        }
+        while self._reply_deadline is not None:
+            options['timeout'] = int(self._remaining_wait() * 1000)
+            try:
+                # 运行时尚未注入时补注入一次
+                if not await self.page.evaluate("() => !!(window.__pdfai && window.__pdfai.watchErrors)"):
+                    await self.page.evaluate(self._runtime_script)
+                return await self.page.evaluate("(opts) => window.__pdfai.watchErrors(opts)", options)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # 页面跳转（例如被重定向到登录页）会中断监听，确认登录状态后重新监听
+                try:
+                    if await self.get_login_state() is False:
+                        return {'kind': 'login', 'text': self.page.url}
+                except Exception:
+                    pass
+                await asyncio.sleep(1)
+        return None
+    
+    def _record_latency(self, images: int, started: float, response: str, first_token: bool = True) -> None:
+        if not response or not response.strip():
+            return
+        first = None
+        if first_token and self._first_token_at is not None and self._first_token_at >= started:
+            first = self._first_token_at - started
+        self.latency_stats.record(images, time.monotonic() - started, first)
+    
+    def _hedge_thresholds(self, images: int) -> Optional[tuple]:
+        """
+        对冲触发阈值（秒）：历史首字 / 完成耗时分位数 × 余量
+        
+        Returns:
+            (首字阈值, 完成阈值)；样本不足时返回 None（不对冲）
+        """
+        stats = self.latency_stats
+        total = stats.percentile('total', config.HEDGE_PERCENTILE, images, config.HEDGE_MIN_SAMPLES)
+        if total is None:
+            return None
+        first = stats.percentile('first', config.HEDGE_PERCENTILE, images, config.HEDGE_MIN_SAMPLES)
+        first_after = first * config.HEDGE_MARGIN if first is not None else float('inf')
+        return first_after, total * config.HEDGE_MARGIN
+    
+    async def _hedge(self, primary: asyncio.Task, image_paths: list, prompt: str,
+                     started: float) -> Optional[str]:
+        """
+        在对冲实例上重发本批，返回先完成的非空回复，落败的一方停止生成
+        
+        Returns:
+            回复内容；无法发出对冲请求时返回 None（调用方继续等待原请求）
+        """
+        print(f"[{self.PLATFORM_NAME}] 回复耗时超过历史分位数，发出对冲请求")
+        try:
+            partner = self.hedge_partner
+            if partner is None:
+                if self._hedge_fork is None:
+                    self._hedge_fork = await self.fork()
+                partner = self._hedge_fork
+            await partner.upload_images_and_send(image_paths, prompt)
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 对冲请求发送失败，继续等待原请求: {e}")
+            return None
+        
+        secondary = asyncio.ensure_future(partner.wait_for_response_complete())
+        pending = {primary, secondary}
+        winner, reply, primary_error = None, "", None
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    text = task.result()
+                except Exception as e:
+                    if task is primary:
+                        primary_error = e
+                    print(f"[{self.PLATFORM_NAME}] {'原' if task is primary else '对冲'}请求失败: {e}")
+                    continue
+                if text and text.strip():
+                    winner, reply = task, text
+                    break
+        
+        for task in pending:
+            task.cancel()
+        if winner is None:
+            if primary_error is not None:
+                raise primary_error
+            return ""
+        
+        if winner is secondary:
+            self.last_reply_hedged = True
+            print(f"[{self.PLATFORM_NAME}] 对冲请求先完成 ✓ ({partner.PLATFORM_NAME})")
+            await self._stop_generation()
+        else:
+            await partner._stop_generation()
+        self._record_latency(len(image_paths), started, reply, first_token=winner is primary)
+        return reply
+    
+    async def _stop_generation(self) -> None:
+        """停止当前正在生成的回复（对冲请求中落败的一方）"""
+        await self._stop_stream_capture()
+        if self.stream_monitor:
+            self.stream_monitor.disarm()
+        stop_selectors = self.SELECTORS.get('stop_button', [])
+        if stop_selectors:
+            try:
+                await self._try_click(stop_selectors, timeout=1000, visible=True)
+            except Exception:
+                pass
+    
+    async def fork(self) -> "BaseAIAutomation":
+        """
+        在同一浏览器上下文中打开一个新标签页，返回操作该标签页的同平台实例
+        
+        分身共用浏览器、选择器缓存与上传统计，不推送流式增量；用完调用 close_fork()
+        """
+        clone = self.__class__()
+        clone.PLATFORM_URL = self.PLATFORM_URL
+        clone.context = self.context
+        clone.headless = self.headless
+        clone.selector_cache = self.selector_cache
+        clone.upload_stats = self.upload_stats
+        clone._runtime_script = self._runtime_script
+        
+        page = await self.context.new_page()
+        try:
+            # 新标签页会抢占前台，切回工作标签页
+            await self.page.bring_to_front()
+            await page.goto(self.PLATFORM_URL, wait_until='domcontentloaded', timeout=60000)
+            input_selectors = self.SELECTORS.get('input_box', [])
+            if input_selectors:
+                await page.locator(", ".join(input_selectors)).first.wait_for(state='attached', timeout=30000)
+        except Exception:
+            await self._close_page(page)
+            raise
+        clone.page = page
+        clone._attach_stream_monitor()
+        print(f"[{self.PLATFORM_NAME}] 对冲标签页已就绪")
+        return clone
+    
+    async def close_fork(self) -> None:
+        """关闭 fork() 创建的分身标签页（不关闭共用的浏览器）"""
+        if self.page is not None:
+            await self._close_page(self.page)
+            self.page = None
+    
     async def create_new_chat(self) -> None:
         """
         在 AI 平台创建新的聊天窗口
@@ -239,41 +882,1071 @@ class BaseAIAutomation(ABC):
         except Exception as e:
             print(f"[{self.PLATFORM_NAME}] 创建新聊天失败: {e}")
     
+    # ═══════════════════════════════════════════════════════════
+    # 备用标签页：后台预热新对话，新建聊天时直接切换
+    # ═══════════════════════════════════════════════════════════
+    
+    def prepare_spare_tab(self) -> None:
+        """在后台预热一个备用标签页（已在预热或已就绪时不重复创建）"""
+        self._schedule_spare_tab()
+    
+    def _schedule_spare_tab(self, page: Optional[Page] = None) -> None:
+        if not config.SPARE_TAB or self.context is None:
+            return
+        if self._spare_task and not self._spare_task.done():
+            if page is not None:
+                asyncio.ensure_future(self._close_page(page))
+            return
+        if self._spare_page is not None and not self._spare_page.is_closed():
+            if page is not None:
+                asyncio.ensure_future(self._close_page(page))
+            return
+        self._spare_task = asyncio.ensure_future(self._warm_spare_tab(page))
+    
+    async def _warm_spare_tab(self, page: Optional[Page] = None) -> None:
+        """
+        打开（或回收 page）一个标签页并加载新对话，直到输入框出现
+        
+        Args:
+            page: 要回收的旧标签页，为空时新建标签页
+        """
+        try:
+            if page is None:
+                page = await self.context.new_page()
+                # 新标签页会抢占前台，切回工作标签页
+                if self.page:
+                    await self.page.bring_to_front()
+            await page.goto(self.PLATFORM_URL, wait_until='domcontentloaded', timeout=60000)
+            input_selectors = self.SELECTORS.get('input_box', [])
+            if input_selectors:
+                await page.locator(", ".join(input_selectors)).first.wait_for(state='attached', timeout=30000)
+            self._spare_page = page
+            print(f"[{self.PLATFORM_NAME}] 备用标签页已就绪")
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 预热备用标签页失败: {e}")
+            if page is not None:
+                await self._close_page(page)
+        except BaseException:
+            # 预热中途被取消（关闭浏览器时）：关闭已打开的标签页，共用上下文时它不会随浏览器关闭
+            if page is not None and page is not self._spare_page:
+                await self._close_page(page)
+            raise
+    
+    async def _close_page(self, page: Page) -> None:
+        try:
+            await page.close()
+        except:
+            pass
+    
+    async def rotate_chat(self) -> None:
+        """
+        切换到新对话
+        
+        备用标签页已就绪时直接切换过去，旧标签页在后台导航到新对话作为下一个备用页；
+        否则回退到 create_new_chat
+        """
+        self.health_monitor.reset()
+        # 对冲标签页的对话随主对话一起重新开始（下次对冲时重新打开）
+        if self._hedge_fork is not None:
+            await self._hedge_fork.close_fork()
+            self._hedge_fork = None
+        spare = self._spare_page
+        self._spare_page = None
+        if spare is None or spare.is_closed():
+            if self.staged_images is not None:
+                await self.discard_staged()
+            await self.create_new_chat()
+            self._schedule_spare_tab()
+            return
+        
+        old_page = self.page
+        self.page = spare
+        self.staged_images = None
+        try:
+            await spare.bring_to_front()
+        except:
+            pass
+        self._attach_stream_monitor()
+        print(f"[{self.PLATFORM_NAME}] 新聊天窗口已创建 ✓ (备用标签页)")
+        
+        # 旧标签页在后台回收为下一个备用页
+        self._schedule_spare_tab(old_page)
+    
+    async def check_chat_health(self) -> Optional[str]:
+        """
+        回复完成后调用：记录本轮耗时并采样标签页的内存指标
+        
+        Returns:
+            需要新建聊天的原因（超过 config.ROTATE_* 阈值）；无需新建时返回 None
+        """
+        if self._turn_started_at is not None:
+            self.health_monitor.record_turn(time.monotonic() - self._turn_started_at)
+            self._turn_started_at = None
+        await self.health_monitor.attach(self.context, self.page)
+        reason = await self.health_monitor.check()
+        metrics = self.health_monitor.last_metrics
+        if metrics:
+            print(f"[{self.PLATFORM_NAME}] 标签页负载: JS 堆 {metrics['heap_mb']}MB, DOM 节点 {metrics['nodes']}")
+        return reason
+    
+    # 页面端脚本：收集上限横幅、错误横幅与错误提示中的文字（最新的在前）
+    # 回复正文（可能包含 PDF 内容里的时间）不参与解析
+    _LIMIT_TEXT_SCRIPT = '''
+        (args) => {
+            const inResponse = (el) => args.responses.some((sel) => {
+                try { return !!el.closest(sel); } catch (e) { return false; }
+            });
+            const texts = [];
+            for (const sel of args.selectors) {
+                let els;
+                try { els = document.querySelectorAll(sel); } catch (e) { continue; }
+                for (const el of els) {
+                    const text = (el.innerText || '').trim();
+                    if (text && text.length < 500 && !inResponse(el) && !texts.includes(text)) texts.push(text);
+                }
+            }
+            // 最新出现的提示在后面
+            return texts.reverse();
+        }
+    '''
+    
+    async def find_limit_reset(self, error_text: str = "") -> Optional[datetime]:
+        """
+        检测到上限后调用：从错误信息或页面上的上限提示（limit_banner / error_state / error_toast）中解析重置时间
+        
+        Returns:
+            重置时间（本地时间）；无法识别时返回 None
+        """
+        reset_at = parse_reset_time(error_text)
+        if reset_at is None and self.page is not None:
+            try:
+                selectors = [self.SELECTORS.get(key, []) for key in ('limit_banner', 'error_state', 'error_toast')]
+                texts = await self.page.evaluate(self._LIMIT_TEXT_SCRIPT, {
+                    'selectors': [sel for group in selectors for sel in group],
+                    'responses': self.SELECTORS.get('response_container', []),
+                })
+            except Exception:
+                texts = []
+            for text in texts:
+                reset_at = parse_reset_time(text)
+                if reset_at is not None:
+                    break
+        if reset_at is not None:
+            print(f"[{self.PLATFORM_NAME}] 上限将于 {reset_at:%Y-%m-%d %H:%M} 重置")
+        return reset_at
+    
     async def close(self) -> None:
         """关闭浏览器"""
         print("正在关闭浏览器...")
+        if self._spare_task and not self._spare_task.done():
+            self._spare_task.cancel()
+            # 等待预热任务关闭它打开的标签页
+            await asyncio.wait([self._spare_task])
+        if self._spare_page is not None:
+            await self._close_page(self._spare_page)
+            self._spare_page = None
+        if self._hedge_fork is not None:
+            await self._hedge_fork.close_fork()
+            self._hedge_fork = None
+        if self.resource_monitor:
+            await self.resource_monitor.stop()
+        if self.resource_filter:
+            print(f"[{self.PLATFORM_NAME}] 资源过滤: {self.resource_filter.summary()}")
+        if self.selector_cache:
+            self.selector_cache.save()
+        if self.upload_stats:
+            print(f"[{self.PLATFORM_NAME}] 上传方式统计: {self.upload_stats.summary()}")
+        if self._shared_context:
+            # 浏览器属于宿主平台，只关闭本平台的标签页
+            if self.page is not None:
+                await self._close_page(self.page)
+                self.page = None
+            print(f"[{self.PLATFORM_NAME}] 标签页已关闭")
+            return
         if self.context:
             await self.context.close()
         if self.playwright:
             await self.playwright.stop()
         print("浏览器已关闭")
     
+    async def _install_resource_filter(self) -> None:
+        """按平台配置拦截统计、遥测、字体、媒体等无关请求"""
+        if not config.BLOCK_UNNEEDED_RESOURCES:
+            return
+        
+        self.resource_filter = ResourceFilter(self._blocked_url_patterns(), self.PLATFORM_NAME)
+        try:
+            await self.resource_filter.install(self.context)
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 启用资源过滤失败: {e}")
+            self.resource_filter = None
+    
+    def _blocked_url_patterns(self) -> list:
+        """本平台需要拦截的 URL 规则"""
+        patterns = list(config.BLOCKED_URL_PATTERNS) + list(self.BLOCKED_URL_PATTERNS)
+        if self.BLOCK_THIRD_PARTY_FONTS:
+            patterns += config.BLOCKED_FONT_PATTERNS
+        return patterns
+    
+    # ═══════════════════════════════════════════════════════════
+    # 网络层回复完成检测
+    # ═══════════════════════════════════════════════════════════
+    
+    def _attach_stream_monitor(self) -> None:
+        """在当前页面上安装流式接口监听器"""
+        if not config.NETWORK_COMPLETION_DETECTION or not self.STREAM_URL_PATTERNS:
+            return
+        if self.stream_monitor is None:
+            self.stream_monitor = ResponseStreamMonitor(self.STREAM_URL_PATTERNS, self.PLATFORM_NAME)
+        self.stream_monitor.attach(self.page)
+    
+    def _arm_stream_monitor(self) -> None:
+        """发送消息前调用，开始跟踪本轮的流式回复"""
+        if self.stream_monitor:
+            self.stream_monitor.arm()
+    
+    async def _wait_for_stream_end(self, timeout_ms: int, initial_delay: float = 5.0) -> bool:
+        """
+        通过网络层等待回复结束
+        
+        Args:
+            timeout_ms: 等待流式响应结束的超时时间（毫秒）
+            initial_delay: 监听不可用时的固定等待秒数（与原 DOM 检测前的等待一致）
+        
+        Returns:
+            True 表示流式接口已结束；False 表示调用方应回退到 DOM 检测
+        """
+        monitor = self.stream_monitor
+        if monitor is None or not monitor.armed:
+            await asyncio.sleep(initial_delay)
+            return False
+        
+        start_timeout = max(initial_delay, config.STREAM_START_TIMEOUT)
+        if not await monitor.wait_started(start_timeout):
+            print(f"[{self.PLATFORM_NAME}] 未检测到流式请求，回退到 DOM 检测")
+            monitor.disarm()
+            return False
+        
+        print(f"[{self.PLATFORM_NAME}] 正在接收流式回复...")
+        if not await monitor.wait_finished(timeout_ms / 1000):
+            print(f"[{self.PLATFORM_NAME}] 流式请求等待超时，回退到 DOM 检测")
+            monitor.disarm()
+            return False
+        
+        if monitor.last_failure:
+            print(f"[{self.PLATFORM_NAME}] 流式请求异常结束，回退到 DOM 检测")
+            return False
+        
+        # 流结束后给前端留出渲染最后一段内容的时间
+        await asyncio.sleep(0.5)
+        await self._stop_stream_capture()
+        print(f"[{self.PLATFORM_NAME}] 流式回复已结束 ✓ (网络层)")
+        return True
+    
+    # ═══════════════════════════════════════════════════════════
+    # 流式捕获：页面 MutationObserver → expose_binding → Python
+    # ═══════════════════════════════════════════════════════════
+    
+    async def _before_send(self, regenerate: bool = False) -> None:
+        """
+        点击发送前调用：开始跟踪本轮回复（轮次标记 + 网络层监听 + 流式捕获）
+        
+        Args:
+            regenerate: 在当前轮重新生成，最后一条回复视为本轮回复
+        """
+        self._turn_started_at = time.monotonic()
+        self._first_token_at = None
+        self._arm_stream_monitor()
+        # 记录发送前的回复数与最后一条回复，完成检测只认之后出现的新回复
+        self._turn_marker = await self._runtime('markTurn', {'regenerate': regenerate})
+        await self._start_stream_capture(regenerate)
+    
+    async def _install_stream_binding(self) -> None:
+        """在浏览器上下文中注册流式增量回调（每个上下文只注册一次）"""
+        if not config.STREAM_CAPTURE or self._stream_binding_installed:
+            return
+        try:
+            await self.context.expose_binding(self._stream_binding_name, self._on_stream_binding)
+            self._stream_binding_installed = True
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 注册流式捕获失败: {e}")
+    
+    async def _start_stream_capture(self, regenerate: bool = False) -> None:
+        """在本轮新出现的 AI 回复上安装 MutationObserver，把增量文本推送给 Python"""
+        selectors = self.SELECTORS.get('response_container', [])
+        if not self._stream_binding_installed or not selectors:
+            return
+        
+        self._stream_turn += 1
+        self._stream_text = ""
+        self._open_partial_turn()
+        
+        try:
+            await self.page.evaluate(self._STREAM_CAPTURE_SCRIPT, {
+                'selectors': selectors,
+                'turn': self._stream_turn,
+                'binding': self._stream_binding_name,
+                'interval': config.STREAM_FLUSH_INTERVAL_MS,
+                'regenerate': regenerate,
+            })
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 启动流式捕获失败: {e}")
+    
+    async def _stop_stream_capture(self) -> None:
+        """停止当前的流式捕获（会先推送最后一段增量）"""
+        if not self._stream_binding_installed:
+            return
+        try:
+            await self.page.evaluate(
+                "() => window.__pdfaiStreamCapture && window.__pdfaiStreamCapture.stop()"
+            )
+        except:
+            pass
+    
+    def _on_stream_binding(self, source, payload: dict) -> None:
+        """页面推送的流式增量（在事件循环线程中回调）"""
+        if not isinstance(payload, dict) or payload.get('turn') != self._stream_turn:
+            return  # 上一轮残留的推送
+        if isinstance(source, dict) and source.get('page') not in (None, self.page):
+            return  # 其他标签页（备用页 / 对冲分身）的推送
+        
+        kind = payload.get('type')
+        text = payload.get('text') or ""
+        if kind == 'delta':
+            self._stream_text += text
+        elif kind == 'reset':
+            self._stream_text = text
+        else:
+            return
+        if text and self._first_token_at is None:
+            self._first_token_at = time.monotonic()
+        
+        self._append_partial(kind, text)
+        if self.on_stream_delta:
+            try:
+                self.on_stream_delta(text, self._stream_text)
+            except Exception as e:
+                print(f"[{self.PLATFORM_NAME}] 流式回调出错: {e}")
+    
+    def _open_partial_turn(self) -> None:
+        """在部分结果文件中写入新一轮回复的标题"""
+        if self._partial_file is None:
+            config.PARTIAL_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+            stamp = time.strftime('%Y%m%d_%H%M%S')
+            name = self.PLATFORM_NAME.replace(' ', '_').lower()
+            self._partial_file = config.PARTIAL_RESULTS_DIR / f"{name}_{stamp}.md"
+        self._write_partial(
+            f"\n\n## 回复 #{self._stream_turn} ({time.strftime('%Y-%m-%d %H:%M:%S')})\n\n"
+        )
+    
+    def _append_partial(self, kind: str, text: str) -> None:
+        """追加写入流式增量；页面重写内容时记录完整文本"""
+        if kind == 'reset':
+            text = f"\n\n<!-- 内容被重写 -->\n{text}"
+        self._write_partial(text)
+    
+    def _write_partial(self, text: str) -> None:
+        if self._partial_file is None:
+            return
+        try:
+            with open(self._partial_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 写入部分结果失败: {e}")
+    
+    # 页面端脚本：先只监听 body 的子节点变化，等新的回复节点出现后，
+    # 把 MutationObserver 收窄到该节点上，并以固定间隔合并推送增量
+    _STREAM_CAPTURE_SCRIPT = '''
+        (args) => {
+            if (window.__pdfaiStreamCapture) window.__pdfaiStreamCapture.stop();
+            
+            const push = (type, text) => {
+                try { window[args.binding]({ turn: args.turn, type, text }); } catch (e) {}
+            };
+            const findAll = () => {
+                for (const sel of args.selectors) {
+                    let els;
+                    try { els = document.querySelectorAll(sel); } catch (e) { continue; }
+                    if (els.length > 0) return els;
+                }
+                return [];
+            };
+            
+            // 重新生成时最后一条回复就是本轮回复
+            const before = findAll();
+            const baseCount = args.regenerate ? Math.max(0, before.length - 1) : before.length;
+            const baseLast = args.regenerate || before.length === 0 ? null : before[before.length - 1];
+            
+            let target = null;
+            let sent = '';
+            let timer = null;
+            let stopped = false;
+            let targetObserver = null;
+            
+            const flush = () => {
+                timer = null;
+                if (stopped || !target) return;
+                if (!target.isConnected) {
+                    // 前端重建了回复节点，重新定位
+                    targetObserver.disconnect();
+                    target = null;
+                    bodyObserver.observe(document.body, { childList: true, subtree: true });
+                    detect();
+                    return;
+                }
+                const text = target.textContent || '';
+                if (text === sent) return;
+                if (text.startsWith(sent)) push('delta', text.slice(sent.length));
+                else push('reset', text);
+                sent = text;
+            };
+            const schedule = () => {
+                if (!timer) timer = setTimeout(flush, args.interval);
+            };
+            const attach = (el) => {
+                target = el;
+                bodyObserver.disconnect();
+                targetObserver = new MutationObserver(schedule);
+                targetObserver.observe(el, { childList: true, subtree: true, characterData: true });
+                schedule();
+            };
+            const detect = () => {
+                const els = findAll();
+                const last = els.length > 0 ? els[els.length - 1] : null;
+                if (last && (els.length > baseCount || last !== baseLast)) attach(last);
+            };
+            
+            const bodyObserver = new MutationObserver(detect);
+            bodyObserver.observe(document.body, { childList: true, subtree: true });
+            
+            window.__pdfaiStreamCapture = {
+                stop() {
+                    if (stopped) return;
+                    if (timer) clearTimeout(timer);
+                    flush();
+                    stopped = true;
+                    bodyObserver.disconnect();
+                    if (targetObserver) targetObserver.disconnect();
+                }
+            };
+            return baseCount;
+        }
+    '''
+    
+    # ═══════════════════════════════════════════════════════════
+    # 图片上传：多种上传方式按实测耗时排序，失败时依次回退
+    # ═══════════════════════════════════════════════════════════
+    
+    def _upload_order(self) -> list:
+        """本平台上传方式的尝试顺序"""
+        if self.upload_stats:
+            return self.upload_stats.order(self.UPLOAD_TRANSPORTS)
+        return list(self.UPLOAD_TRANSPORTS)
+    
+    async def _upload_images(self, input_area, image_paths: list, settle: Callable = None) -> None:
+        """
+        上传一批图片
+        
+        首选方式为 file input 时一次附加整批图片，否则（或批量失败时）逐张上传
+        
+        Args:
+            input_area: 已聚焦的输入框
+            settle: 逐张上传时每张图片之后调用的协程函数（如等待平台解析）
+        """
+        order = self._upload_order()
+        if order and order[0] == 'file_input' and len(image_paths) > 1:
+            start = time.monotonic()
+            if await self._upload_files_at_once(image_paths):
+                if self.upload_stats:
+                    self.upload_stats.record(
+                        'file_input', True, (time.monotonic() - start) / len(image_paths)
+                    )
+                return
+        
+        for idx, image_path in enumerate(image_paths):
+            print(f"[{self.PLATFORM_NAME}] 正在上传图片 {idx+1}/{len(image_paths)}: {Path(image_path).name}")
+            transport = await self._upload_image(input_area, image_path)
+            print(f"[{self.PLATFORM_NAME}] 图片 {idx+1} 上传成功 ({transport}) ✓")
+            if settle:
+                await settle()
+    
+    async def _upload_image(self, input_area, image_path: str) -> str:
+        """
+        按实测顺序尝试各上传方式上传单张图片
+        
+        以附件数量增加作为成功依据（平台未配置 attachment 选择器时以调用成功为准），
+        每次尝试的结果与耗时都会计入统计
+        
+        Returns:
+            成功的上传方式名称
+        """
+        verify = bool(self.SELECTORS.get('attachment'))
+        errors = []
+        for transport in self._upload_order():
+            before = (await self._page_state()).get('attachments', 0) if verify else 0
+            start = time.monotonic()
+            try:
+                await getattr(self, f'_upload_via_{transport}')(input_area, image_path)
+                if verify:
+                    ok = await self._wait_for_attachments(before + 1, config.UPLOAD_VERIFY_TIMEOUT)
+                else:
+                    await asyncio.sleep(2)
+                    ok = True
+                if not ok:
+                    errors.append(f"{transport}: 附件未出现")
+            except Exception as e:
+                ok = False
+                errors.append(f"{transport}: {e}")
+            
+            if not ok and verify:
+                # 附件可能在超时后才出现：已附加上的视为成功，否则回退到下一种方式会重复上传
+                if (await self._page_state()).get('attachments', 0) > before:
+                    print(f"[{self.PLATFORM_NAME}] 上传方式 {transport} 的附件在超时后出现")
+                    ok = True
+            
+            if self.upload_stats:
+                self.upload_stats.record(transport, ok, time.monotonic() - start)
+            if ok:
+                return transport
+            print(f"[{self.PLATFORM_NAME}] 上传方式 {transport} 失败，尝试下一种...")
+        
+        raise Exception(f"所有上传方式都失败 ({'; '.join(errors)})")
+    
+    async def _upload_via_file_input(self, input_area, image_path: str) -> None:
+        """通过文件输入框上传（找不到时先点击附件按钮）"""
+        selectors = self.SELECTORS.get('file_input', ['input[type="file"]'])
+        file_input = await self._try_find(selectors, key='file_input')
+        if file_input is None and self.SELECTORS.get('attach_button'):
+            await self._try_click(self.SELECTORS['attach_button'], key='attach_button')
+            await asyncio.sleep(1)
+            file_input = await self._try_find(selectors, key='file_input')
+        if file_input is None:
+            raise Exception("找不到文件输入框")
+        await file_input.set_input_files(str(image_path), timeout=10000)
+    
+    async def _upload_via_clipboard(self, input_area, image_path: str) -> None:
+        """写入系统剪贴板后在输入框中按 Ctrl+V"""
+        result = await self._evaluate_with_image(self.page, self._CLIPBOARD_WRITE_SCRIPT, image_path)
+        if result is not True:
+            raise Exception("剪贴板写入失败")
+        await input_area.click()
+        await self.page.keyboard.press('Control+v')
+    
+    async def _upload_via_datatransfer(self, input_area, image_path: str) -> None:
+        """在输入框上派发携带文件的合成粘贴事件"""
+        result = await self._evaluate_with_image(input_area, self._DATATRANSFER_PASTE_SCRIPT, image_path)
+        if result is not True:
+            raise Exception(f"DataTransfer 粘贴失败: {result}")
+    
+    async def _upload_via_drag_drop(self, input_area, image_path: str) -> None:
+        """在输入框上派发携带文件的合成拖放事件"""
+        result = await self._evaluate_with_image(input_area, self._DRAG_DROP_SCRIPT, image_path)
+        if result is not True:
+            raise Exception(f"拖放失败: {result}")
+    
+    async def _upload_files_at_once(self, image_paths: list, timeout: float = None) -> bool:
+        """
+        通过文件输入框一次附加整批图片，并只等待一次全部附件就绪
+        
+        Returns:
+            整批附件是否已就绪；返回 False 时页面上没有残留本批的附件，调用方应回退到逐张上传
+        """
+        if not config.BATCH_UPLOAD or not image_paths:
+            return False
+        if timeout is None:
+            timeout = config.BATCH_UPLOAD_TIMEOUT
+        
+        file_input = await self._try_find(self.SELECTORS.get('file_input', ['input[type="file"]']), key='file_input')
+        if file_input is None:
+            return False
+        
+        before = (await self._page_state()).get('attachments', 0)
+        try:
+            # 不支持多选的输入框会直接报错
+            await file_input.set_input_files([str(p) for p in image_paths], timeout=10000)
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 批量上传失败: {e}")
+            return False
+        
+        print(f"[{self.PLATFORM_NAME}] 已一次提交 {len(image_paths)} 张图片，等待附件就绪...")
+        if await self._wait_for_attachments(before + len(image_paths), timeout):
+            print(f"[{self.PLATFORM_NAME}] 批量上传完成 ✓")
+            return True
+        
+        # 超时：移除已出现的部分附件后再回退，避免逐张上传时重复附加
+        if await self._remove_attachments(keep=before):
+            print(f"[{self.PLATFORM_NAME}] 等待附件就绪超时，改为逐张上传")
+            return False
+        print(f"[{self.PLATFORM_NAME}] 等待附件就绪超时，且无法移除已附加的图片，继续执行...")
+        return True
+    
+    async def _remove_attachments(self, keep: int = 0) -> bool:
+        """
+        逐个点击附件的移除按钮，直到输入框中只剩 keep 个附件
+        
+        Returns:
+            是否已移除到 keep 个（平台未配置 attachment_remove 或按钮点击失败时返回 False）
+        """
+        remove_selectors = self.SELECTORS.get('attachment_remove', [])
+        for _ in range(20):
+            if (await self._page_state()).get('attachments', 0) <= keep:
+                return True
+            if not remove_selectors or not await self._try_click(remove_selectors, timeout=2000, visible=True):
+                break
+            await asyncio.sleep(0.3)
+        return (await self._page_state()).get('attachments', 0) <= keep
+    
+    async def _wait_for_attachments(self, expected: int, timeout: float, require_send: bool = False) -> bool:
+        """
+        等待输入框中的附件数量达到 expected 且没有上传中的指示器
+        
+        由页面端 MutationObserver 在条件满足时立即返回；运行时不可用时退回轮询
+        
+        Args:
+            require_send: 是否同时要求发送按钮可用（平台解析完成的标志）
+        """
+        result = await self._runtime('waitReady', {
+            'expected': expected,
+            'timeout': int(timeout * 1000),
+            'requireSend': require_send,
+        })
+        if result is not None:
+            return bool(result.get('ready'))
+        
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            state = await self._page_state()
+            if state.get('attachments', 0) >= expected and not state.get('uploading', False):
+                if not require_send or not state.get('sendButton') or state.get('sendEnabled'):
+                    return True
+            await asyncio.sleep(0.5)
+        return False
+    
+    def _get_mime_type(self, image_path: str) -> str:
+        return self.MIME_TYPES.get(Path(image_path).suffix.lower(), 'image/png')
+    
+    async def _ensure_image_route(self) -> None:
+        """在当前页面上注册图片拦截路由（每个页面只注册一次）"""
+        if self._image_route_page is self.page:
+            return
+        await self.page.route(f"**{self.IMAGE_ROUTE_PREFIX}*", self._serve_image_route)
+        self._image_route_page = self.page
+    
+    async def _serve_image_route(self, route) -> None:
+        """直接用本地文件响应页面的图片请求，不经过网络"""
+        token = route.request.url.split(self.IMAGE_ROUTE_PREFIX, 1)[-1].split('?', 1)[0]
+        image_path = self._served_images.get(token)
+        if not image_path:
+            await route.fulfill(status=404, body="")
+            return
+        await route.fulfill(
+            path=image_path,
+            content_type=self._get_mime_type(image_path),
+            headers={'Cache-Control': 'no-store'},
+        )
+    
+    async def _image_source(self, image_path: str, inline: bool = False) -> dict:
+        """
+        生成页面端读取图片所需的参数
+        
+        默认返回同源拦截 URL；inline=True 时改为 data URL 作为 evaluate 参数传入
+        （仅用于路由不可用的备用情况，同样不会拼接进脚本源码）
+        """
+        source = {
+            'mime': self._get_mime_type(image_path),
+            'name': Path(image_path).name,
+        }
+        if inline:
+            with open(image_path, 'rb') as f:
+                encoded = base64.b64encode(f.read()).decode('ascii')
+            source['url'] = f"data:{source['mime']};base64,{encoded}"
+            return source
+        
+        await self._ensure_image_route()
+        token = uuid.uuid4().hex
+        self._served_images[token] = str(image_path)
+        source['url'] = f"{self.IMAGE_ROUTE_PREFIX}{token}"
+        source['token'] = token
+        return source
+    
+    async def _evaluate_with_image(self, target, script: str, image_path: str):
+        """
+        以图片参数执行页面脚本，拦截 URL 读取失败时回退到 data URL
+        
+        Args:
+            target: self.page 或元素 Locator
+            script: 接收 source 参数（元素脚本为 (element, source)）的 JS 函数
+        """
+        source = await self._image_source(image_path)
+        try:
+            result = await target.evaluate(script, source)
+        finally:
+            self._served_images.pop(source.get('token'), None)
+        
+        if result == 'fetch_failed':
+            print(f"[{self.PLATFORM_NAME}] 拦截路由读取图片失败，改用 data URL")
+            source = await self._image_source(image_path, inline=True)
+            result = await target.evaluate(script, source)
+        return result
+    
+    # 页面端：fetch 拦截 URL 得到 Blob（浏览器原生解码，无逐字节循环）
+    _CLIPBOARD_WRITE_SCRIPT = '''
+        async (source) => {
+            let blob;
+            try {
+                const resp = await fetch(source.url, { cache: 'no-store' });
+                if (!resp.ok) return 'fetch_failed';
+                blob = await resp.blob();
+            } catch (e) {
+                return 'fetch_failed';
+            }
+            try {
+                const typed = blob.type === source.mime ? blob : new Blob([blob], { type: source.mime });
+                await navigator.clipboard.write([new ClipboardItem({ [source.mime]: typed })]);
+                return true;
+            } catch (e) {
+                console.error('Clipboard write failed:', e);
+                return false;
+            }
+        }
+    '''
+    
+    _DATATRANSFER_PASTE_SCRIPT = '''
+        async (element, source) => {
+            let blob;
+            try {
+                const resp = await fetch(source.url, { cache: 'no-store' });
+                if (!resp.ok) return 'fetch_failed';
+                blob = await resp.blob();
+            } catch (e) {
+                return 'fetch_failed';
+            }
+            const file = new File([blob], source.name, { type: source.mime });
+            const dataTransfer = new DataTransfer();
+            dataTransfer.items.add(file);
+            
+            const pasteEvent = new ClipboardEvent('paste', {
+                bubbles: true,
+                cancelable: true,
+                clipboardData: dataTransfer
+            });
+            element.dispatchEvent(pasteEvent);
+            return true;
+        }
+    '''
+    
+    _DRAG_DROP_SCRIPT = '''
+        async (element, source) => {
+            let blob;
+            try {
+                const resp = await fetch(source.url, { cache: 'no-store' });
+                if (!resp.ok) return 'fetch_failed';
+                blob = await resp.blob();
+            } catch (e) {
+                return 'fetch_failed';
+            }
+            const file = new File([blob], source.name, { type: source.mime });
+            const dataTransfer = new DataTransfer();
+            dataTransfer.items.add(file);
+            
+            for (const type of ['dragenter', 'dragover', 'drop']) {
+                element.dispatchEvent(new DragEvent(type, {
+                    bubbles: true,
+                    cancelable: true,
+                    dataTransfer
+                }));
+            }
+            return true;
+        }
+    '''
+    
+    # ═══════════════════════════════════════════════════════════
+    # 页面运行时：单次 evaluate 获取完整页面状态
+    # ═══════════════════════════════════════════════════════════
+    
+    async def _install_page_runtime(self) -> None:
+        """注入页面端辅助运行时（之后每次导航自动生效）"""
+        self._runtime_script = build_runtime_script(self.SELECTORS, urlparse(self.PLATFORM_URL).hostname)
+        try:
+            await self.context.add_init_script(script=self._runtime_script)
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 注入页面运行时失败: {e}")
+    
+    async def _runtime(self, method: str, arg=None):
+        """
+        调用页面运行时 window.__pdfai 的方法
+        
+        Returns:
+            方法返回值；运行时不可用时返回 None
+        """
+        if not self._runtime_script:
+            return None
+        expr = f"async (arg) => window.__pdfai ? {{ value: await window.__pdfai.{method}(arg) }} : null"
+        try:
+            result = await self.page.evaluate(expr, arg)
+            if result is None:
+                # 当前文档早于 init script 注册（或被页面覆盖），补注入一次
+                await self.page.evaluate(self._runtime_script)
+                result = await self.page.evaluate(expr, arg)
+            return result['value'] if result else None
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 页面运行时调用失败 ({method}): {e}")
+            return None
+    
+    async def _page_state(self, scan_text: list = None) -> dict:
+        """
+        单次往返获取页面状态
+        
+        Args:
+            scan_text: 需要在页面文本中查找的标记（结果见 textMatches）
+        
+        Returns:
+            composer / sendButton / sendEnabled / stopButton / assistantCount /
+            responseSelector / lastLength / turnStarted / turnLength（本轮新回复去掉首尾空白后的长度）/
+            errors / attachments / uploading / textMatches；
+            运行时不可用时返回空字典
+        """
+        state = await self._runtime('state', {'scanText': scan_text or []})
+        return state or {}
+    
+    async def _get_last_response(self) -> str:
+        """获取本轮的 AI 回复（发送前记录过轮次标记时，新回复出现之前返回空，不会读到上一轮的回复）"""
+        text = await self._runtime('turnText' if self._turn_marker is not None else 'lastText')
+        return text or ""
+    
+    async def _detect_empty_response(self) -> bool:
+        """
+        按轮次标记检测本轮是否为空白回复
+        
+        Returns:
+            没有出现新回复或新回复没有内容时返回 True；没有轮次标记（无法判断）时返回 False
+        """
+        if self._turn_marker is None:
+            return False
+        state = await self._page_state()
+        if not state:
+            return False
+        print(f"[{self.PLATFORM_NAME}] 发送前回复数: {self._turn_marker}, 当前回复数: {state.get('assistantCount', 0)}")
+        if not state.get('turnStarted'):
+            print(f"[{self.PLATFORM_NAME}] 警告：没有检测到新回复")
+            return True
+        if not state.get('turnLength'):
+            print(f"[{self.PLATFORM_NAME}] 检测到空白回复")
+            return True
+        return False
+    
+    async def _get_message_count(self) -> int:
+        """获取当前 AI 回复的数量"""
+        count = await self._runtime('assistantCount')
+        return count or 0
+    
     # ═══════════════════════════════════════════════════════════
     # 通用辅助方法
     # ═══════════════════════════════════════════════════════════
     
-    async def _try_click(self, selectors: list, timeout: int = 3000) -> bool:
-        """尝试点击多个选择器中的第一个可用的"""
-        for selector in selectors:
+    def _selector_key(self, selectors: list) -> Optional[str]:
+        """查找选择器列表在 SELECTORS 中对应的逻辑元素名"""
+        for key, value in self.SELECTORS.items():
+            if value is selectors:
+                return key
+        return None
+    
+    async def _resolve_selector(self, selectors: list, visible: bool = False,
+                                key: Optional[str] = None) -> Optional[str]:
+        """
+        单次往返找出第一个有匹配元素的选择器
+        
+        有选择器缓存时，上次命中的选择器排在最前，只有它失效时才会落到其余选择器。
+        页面运行时无法处理的 Playwright 专用选择器（如 :has-text）再逐个用 count() 检查
+        
+        Args:
+            selectors: 选择器列表（按优先级排列）
+            visible: 是否要求匹配元素可见
+            key: 逻辑元素名（用于选择器缓存），默认按 SELECTORS 自动识别
+        """
+        if key is None:
+            key = self._selector_key(selectors)
+        cache = self.selector_cache if key else None
+        ordered = cache.order(key, selectors) if cache else list(selectors)
+        
+        selector = None
+        count = 0
+        resolved = await self._runtime('resolve', {'selectors': ordered, 'visible': visible})
+        if resolved is None:
+            candidates = ordered
+        elif resolved.get('selector'):
+            selector = resolved['selector']
+            count = resolved.get('count', 1)
+            candidates = []
+        else:
+            candidates = resolved.get('unsupported', [])
+        
+        for candidate in candidates:
             try:
-                btn = self.page.locator(selector)
-                if await btn.count() > 0:
+                locator = self.page.locator(candidate)
+                element = locator.first
+                if await element.count() > 0 and (not visible or await element.is_visible()):
+                    selector = candidate
+                    count = await locator.count()
+                    break
+            except:
+                pass
+        
+        if cache:
+            if selector:
+                # 首选选择器以外的选择器匹配到多个元素：可能是宽泛的后备选择器，不记住它
+                ambiguous = count > 1 and selector != selectors[0]
+                was_cached = cache.last(key) == selector
+                cache.record_hit(key, selector, ambiguous=ambiguous)
+                if ambiguous and was_cached:
+                    # 记住的后备选择器已不再精确：按默认优先级重新解析
+                    return await self._resolve_selector(selectors, visible=visible, key=key)
+            else:
+                cache.record_miss(key)
+        return selector
+    
+    async def _try_click(self, selectors: list, timeout: int = 3000, visible: bool = False,
+                         key: Optional[str] = None) -> bool:
+        """尝试点击多个选择器中的第一个可用的（visible=True 时只点击可见元素）"""
+        if key is None:
+            key = self._selector_key(selectors)
+        selector = await self._resolve_selector(selectors, visible=visible, key=key)
+        if selector is None:
+            return False
+        try:
+            await self.page.locator(selector).first.click(timeout=timeout)
+            return True
+        except:
+            pass
+        
+        # 首选元素点击失败（如被遮挡），依次尝试其余选择器
+        for fallback in selectors:
+            if fallback == selector:
+                continue
+            try:
+                btn = self.page.locator(fallback)
+                count = await btn.count()
+                if count > 0:
                     await btn.first.click(timeout=timeout)
+                    if key and self.selector_cache:
+                        self.selector_cache.record_hit(key, fallback, ambiguous=count > 1 and fallback != selectors[0])
                     return True
             except:
                 pass
         return False
     
-    async def _try_find(self, selectors: list):
+    async def _try_find(self, selectors: list, key: Optional[str] = None):
         """尝试查找多个选择器中的第一个可用的"""
-        for selector in selectors:
+        selector = await self._resolve_selector(selectors, key=key)
+        if selector is None:
+            return None
+        return self.page.locator(selector).first
+    
+    async def _focus_input(self):
+        """查找并点击聚焦输入框，返回其 locator（找不到时返回 None）"""
+        input_area = await self._try_find(self.SELECTORS.get('input_box', []), key='input_box')
+        if input_area is None:
+            return None
+        try:
+            await input_area.click()
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 聚焦输入区域失败: {e}")
+            return None
+        await asyncio.sleep(0.5)
+        return input_area
+    
+    # 输入框文本快照：去除空白后比较（富文本编辑器会把换行转换为段落）
+    _COMPOSER_TEXT_SCRIPT = '''
+        (el) => {
+            const text = (el.value !== undefined ? el.value : el.innerText) || '';
+            return text.replace(/\\s+/g, '');
+        }
+    '''
+    
+    # 合成粘贴事件（纯文本），供 insert_text 未生效的编辑器使用
+    _PASTE_TEXT_SCRIPT = '''
+        (el, text) => {
+            el.focus();
+            const dt = new DataTransfer();
+            dt.setData('text/plain', text);
+            el.dispatchEvent(new ClipboardEvent('paste', {
+                clipboardData: dt, bubbles: true, cancelable: true
+            }));
+        }
+    '''
+    
+    async def _fill_prompt(self, input_area, prompt: str) -> None:
+        """
+        向已聚焦的输入框一次性写入提示词
+        
+        textarea 直接 fill；富文本编辑器（contenteditable）先用 insert_text 一次性插入，
+        再尝试合成粘贴，校验输入框确实包含提示词后才返回，都失败时才回退到逐字输入
+        """
+        expected = "".join(prompt.split())
+        try:
+            tag = await input_area.evaluate("el => el.tagName.toLowerCase()")
+            if tag in ('textarea', 'input'):
+                await input_area.fill(prompt)
+                return
+            before = await input_area.evaluate(self._COMPOSER_TEXT_SCRIPT)
+        except Exception as e:
+            print(f"[{self.PLATFORM_NAME}] 读取输入框失败: {e}")
+            await self.page.keyboard.type(prompt, delay=15)
+            return
+        
+        async def contains_prompt() -> bool:
+            await asyncio.sleep(0.1)
+            text = await input_area.evaluate(self._COMPOSER_TEXT_SCRIPT)
+            return expected in text
+        
+        for method in ('insert_text', 'paste'):
             try:
-                element = self.page.locator(selector).first
-                if await element.count() > 0:
-                    return element
-            except:
-                pass
-        return None
+                if method == 'insert_text':
+                    await self.page.keyboard.insert_text(prompt)
+                else:
+                    await input_area.evaluate(self._PASTE_TEXT_SCRIPT, prompt)
+                if await contains_prompt():
+                    return
+                if await input_area.evaluate(self._COMPOSER_TEXT_SCRIPT) != before:
+                    # 插入了不完整的内容，撤销后再试下一种方式
+                    await self.page.keyboard.press('Control+z')
+            except Exception as e:
+                print(f"[{self.PLATFORM_NAME}] 快速输入失败 ({method}): {e}")
+        
+        print(f"[{self.PLATFORM_NAME}] 快速输入未通过校验，改为逐字输入")
+        await input_area.click()
+        await self.page.keyboard.type(prompt, delay=15)
+    
+    async def _wait_for_turn_stable(self, stable_duration: float = 5.0, verbose: bool = False) -> None:
+        """
+        轮询本轮新回复的长度，直到连续 stable_duration 秒不变（上一轮的回复不计）
+        
+        单次往返读取页面运行时的 turnLength，最多等待本轮剩余的完成预算
+        
+        Args:
+            stable_duration: 内容需要保持稳定的秒数
+            verbose: 是否打印稳定进度
+        """
+        last_len = 0
+        stable_time = 0
+        check_interval = 2.0
+        max_wait = self._remaining_wait()  # 本轮剩余的完成预算
+        total_wait = 0
+        
+        while stable_time < stable_duration and total_wait < max_wait:
+            state = await self._page_state()
+            current_len = state.get('turnLength', 0)
+            
+            if current_len == last_len and current_len > 0:
+                stable_time += check_interval
+                if verbose:
+                    print(f"[{self.PLATFORM_NAME}] 内容稳定中... {stable_time:.0f}s/{stable_duration:.0f}s")
+            else:
+                last_len = current_len
+                stable_time = 0
+            
+            await asyncio.sleep(check_interval)
+            total_wait += check_interval
     
     async def _wait_for_content_stable(self, content_selector: str, stable_duration: float = 5.0) -> None:
         """
@@ -287,7 +1960,7 @@ class BaseAIAutomation(ABC):
             stable_duration: 内容需要保持稳定的秒数
         """
         stable_seconds = int(stable_duration)
-        max_wait_seconds = 120  # 最大等待时间
+        max_wait_seconds = int(self._remaining_wait())  # 最大等待时间（本轮剩余预算）
         
         # 使用 MutationObserver 监听 DOM 变化
         observer_script = f'''
@@ -316,6 +1989,11 @@ class BaseAIAutomation(ABC):
                         stableCount++;
                         totalWait++;
                         
+                        // 本轮新回复出现之前不计入稳定时间（页面上只有上一轮的回复）
+                        if (window.__pdfai && window.__pdfai.turnStarted && !window.__pdfai.turnStarted()) {{
+                            stableCount = 0;
+                        }}
+                        
                         // 打印进度（可选）
                         if (stableCount > 0) {{
                             console.log(`内容稳定中... ${{stableCount}}s/${{stableDuration}}s`);
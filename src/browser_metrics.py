@@ -0,0 +1,130 @@
+"""
+浏览器负载监测模块
+
+通过 CDP 会话采样聊天标签页的 Performance.getMetrics（JS 堆、DOM 节点数），
+并记录每轮回复的耗时。对话越长页面越臃肿，超过阈值时提示新建聊天，
+使长时间批量处理的单页耗时保持平稳
+"""
+from statistics import median
+from typing import Optional
+
+
+class ChatHealthMonitor:
+    """单个聊天标签页的内存与耗时监测"""
+
+    def __init__(self, name: str = "", heap_limit_mb: float = 0, node_limit: int = 0,
+                 latency_factor: float = 0, baseline_turns: int = 3):
+        """
+        Args:
+            name: 平台名称（用于日志）
+            heap_limit_mb: JS 堆使用量阈值（MB），0 表示不检查
+            node_limit: DOM 节点数阈值，0 表示不检查
+            latency_factor: 最近几轮耗时中位数超过基线的倍数阈值，0 表示不检查
+            baseline_turns: 新对话开始后用于计算基线（以及最近耗时）的轮数
+        """
+        self.name = name
+        self.heap_limit_mb = heap_limit_mb
+        self.node_limit = node_limit
+        self.latency_factor = latency_factor
+        self.baseline_turns = max(1, baseline_turns)
+        self._session = None
+        self._page = None
+        self._latencies: list = []
+        self.last_metrics: dict = {}
+
+    async def attach(self, context, page) -> None:
+        """为页面创建 CDP 会话并启用性能指标（切换标签页后需重新调用）"""
+        if page is self._page and self._session is not None:
+            return
+        await self.detach()
+        self._page = page
+        try:
+            self._session = await context.new_cdp_session(page)
+            await self._session.send("Performance.enable")
+        except Exception as e:
+            # 非 Chromium 浏览器没有 CDP，只使用耗时判断
+            print(f"[{self.name}] 无法采集浏览器性能指标: {e}")
+            self._session = None
+
+    async def detach(self) -> None:
+        if self._session is not None:
+            try:
+                await self._session.detach()
+            except:
+                pass
+        self._session = None
+        self._page = None
+
+    def reset(self) -> None:
+        """新对话开始：清空耗时基线"""
+        self._latencies = []
+        self.last_metrics = {}
+
+    async def sample(self) -> dict:
+        """
+        采样当前页面的性能指标
+
+        Returns:
+            {'heap_mb': JS 堆使用量, 'nodes': DOM 节点数, ...}，不可用时返回空字典
+        """
+        if self._session is None:
+            return {}
+        try:
+            result = await self._session.send("Performance.getMetrics")
+        except Exception as e:
+            print(f"[{self.name}] 采集性能指标失败: {e}")
+            return {}
+        raw = {m['name']: m['value'] for m in result.get('metrics', [])}
+        self.last_metrics = {
+            'heap_mb': round(raw.get('JSHeapUsedSize', 0) / (1024 * 1024), 1),
+            'nodes': int(raw.get('Nodes', 0)),
+            'listeners': int(raw.get('JSEventListeners', 0)),
+            'layout_ms': round(raw.get('LayoutDuration', 0) * 1000),
+        }
+        return self.last_metrics
+
+    def record_turn(self, seconds: float) -> None:
+        """记录一轮回复的耗时（秒）"""
+        if seconds > 0:
+            self._latencies.append(seconds)
+
+    async def check(self) -> Optional[str]:
+        """
+        检查当前对话是否需要新建聊天
+
+        Returns:
+            超过阈值的原因描述；未超过时返回 None
+        """
+        metrics = await self.sample()
+        if self.heap_limit_mb and metrics.get('heap_mb', 0) >= self.heap_limit_mb:
+            return f"JS 堆 {metrics['heap_mb']}MB ≥ {self.heap_limit_mb}MB"
+        if self.node_limit and metrics.get('nodes', 0) >= self.node_limit:
+            return f"DOM 节点 {metrics['nodes']} ≥ {self.node_limit}"
+
+        n = self.baseline_turns
+        if self.latency_factor and len(self._latencies) >= 2 * n:
+            baseline = median(self._latencies[:n])
+            recent = median(self._latencies[-n:])
+            if baseline > 0 and recent >= baseline * self.latency_factor:
+                return f"单轮耗时 {recent:.1f}s ≥ 基线 {baseline:.1f}s × {self.latency_factor}"
+        return None
+
+    def near_limit(self, margin: float = 0.9) -> bool:
+        """
+        按上一次采样与已记录的耗时估计下一次 check() 是否会要求新建聊天（不重新采样）
+
+        Args:
+            margin: 达到阈值的多少比例即视为接近
+        """
+        metrics = self.last_metrics
+        if self.heap_limit_mb and metrics.get('heap_mb', 0) >= self.heap_limit_mb * margin:
+            return True
+        if self.node_limit and metrics.get('nodes', 0) >= self.node_limit * margin:
+            return True
+
+        n = self.baseline_turns
+        if self.latency_factor and len(self._latencies) >= 2 * n - 1:
+            baseline = median(self._latencies[:n])
+            recent = median(self._latencies[-n:])
+            return baseline > 0 and recent >= baseline * self.latency_factor * margin
+        return False
@@ -20,6 +20,19 @@ class ChatGPTAutomation(BaseAIAutomation):
     PLATFORM_NAME = "ChatGPT"
     PLATFORM_URL = "https://chatgpt.com/"
     
+    # 流式回复接口: POST /backend-api/conversation (新版为 /backend-api/f/conversation)
+    STREAM_URL_PATTERNS = [r'/backend-api/(f/)?conversation(\?|$)']
+    
+    # 客户端事件上报
+    BLOCKED_URL_PATTERNS = [r'chatgpt\.com/ces/']
+    
+    # 未登录时跳转到登录页，或在页面上显示登录按钮（未登录也能看到输入框）
+    LOGIN_URL_KEYWORDS = ['/auth/login', 'auth.openai.com']
+    LOGGED_OUT_SELECTORS = [
+        '[data-testid="login-button"]',
+        '[data-testid="mobile-login-button"]',
+    ]
+    
     # ChatGPT 特定选择器
     SELECTORS = {
         'file_input': [
@@ -51,8 +64,69 @@ class ChatGPTAutomation(BaseAIAutomation):
         'response_container': [
             '[data-message-author-role="assistant"]',
         ],
+        # 错误 Toast 可能出现在多种位置
+        'error_toast': [
+            '[role="alert"]',
+            '[data-testid*="toast"]',
+            '.toast-message',
+            '.error-message',
+            '[class*="alert"]',
+            '[class*="error"]',
+            '[class*="warning"]',
+            '[class*="upload-error"]',
+        ],
+        # 回复生成失败时对话中的错误提示与重试按钮
+        'error_state': [
+            '[data-testid="conversation-turn-error"]',
+            '.text-token-text-error',
+        ],
+        'retry_button': [
+            '[data-testid="regenerate-thread-error-button"]',
+            'button[aria-label*="Retry"]',
+            'button[aria-label*="重试"]',
+        ],
+        'regenerate_button': [
+            '[data-testid="regenerate-turn-action-button"]',
+            'button[aria-label="Try again"]',
+            'button[aria-label*="Regenerate"]',
+            'button[aria-label*="重新生成"]',
+        ],
+        # 用量上限横幅（其中的重置时间用于自动恢复）
+        'limit_banner': [
+            '[data-testid*="rate-limit"]',
+            '[data-testid*="usage-limit"]',
+        ],
+        # 输入框中的图片附件缩略图
+        'attachment': [
+            'form img[src^="blob:"]',
+            'form [data-testid*="attachment"] img',
+        ],
+        'attachment_remove': [
+            'form button[aria-label*="Remove file"]',
+            'form button[aria-label*="移除文件"]',
+        ],
     }
     
+    # 附件通过文件输入框上传，剪贴板方式不适用
+    UPLOAD_TRANSPORTS = ['file_input', 'datatransfer', 'drag_drop']
+    
+    # 上传限额错误关键词（中英文）
+    UPLOAD_LIMIT_KEYWORDS = [
+        # 中文
+        "无法上传", "上传失败", "最多可上传", "上传限制",
+        "文件过多", "超出限制", "达到上限",
+        # 英文
+        "unable to upload", "upload failed", "cannot upload",
+        "upload limit", "too many files", "limit reached",
+        "max files", "maximum files", "file limit",
+    ]
+    
+    # 页面文本中出现即表示上传额度已用完
+    UPLOAD_LIMIT_MARKERS = ["最多可上传 0 个", "最多可上传0个", "max files: 0", "maximum files: 0"]
+    
+    # 生成回复期间输入框仍可添加附件和输入文字
+    SUPPORTS_PIPELINING = True
+    
     async def upload_images_and_send(self, image_paths: list, prompt: str) -> None:
         """
         上传一张或多张图片并发送提示词
@@ -61,56 +135,40 @@ class ChatGPTAutomation(BaseAIAutomation):
             image_paths: 图片文件路径列表
             prompt: 提示词文本
         """
-        # 记录发送前的消息数量，用于后续检测空白回复
-        self._initial_message_count = await self._get_message_count()
-        print(f"[ChatGPT] 发送前消息数量: {self._initial_message_count}")
+        await self._prepare_message(image_paths, prompt)
+        await self._send_message()
+    
+    async def _prepare_message(self, image_paths: list, prompt: str) -> None:
+        """上传图片并填写提示词（不发送）"""
+        input_box = await self._try_find(self.SELECTORS['input_box'])
+        if not input_box:
+            raise Exception("找不到输入框")
         
-        # 依次上传所有图片
-        for image_path in image_paths:
-            print(f"[ChatGPT] 正在上传图片: {Path(image_path).name}")
-            
-            # 使用更精确的选择器 - 选择第一个文件输入
-            file_input = self.page.locator('input[type="file"][accept*="image"]').first
-            
-            try:
-                await file_input.set_input_files(image_path, timeout=10000)
-                print(f"图片上传成功 ✓")
-            except Exception as e:
-                print(f"直接上传失败，尝试点击附件按钮...")
-                # 尝试点击附件按钮
-                await self._try_click(self.SELECTORS['attach_button'])
-                await asyncio.sleep(1)
-                
-                # 再次尝试上传
-                file_input = self.page.locator('input[type="file"][accept*="image"]').first
-                await file_input.set_input_files(image_path)
-                print(f"图片上传成功 ✓")
-            
-            await asyncio.sleep(2)  # 等待图片上传完成
-            
-            # 检测页面是否显示上传限额错误
+        # 上传图片（整批或逐张，按实测最快的上传方式）
+        try:
+            await self._upload_images(input_box, image_paths)
+        except Exception:
+            # 额度用完时附件不会出现，优先报告上传限额错误
             upload_error = await self._detect_upload_limit_error()
             if upload_error:
                 raise Exception(f"Upload limit reached: {upload_error}")
+            raise
         
-        # 等待所有图片上传完成
-        if len(image_paths) > 1:
-            await asyncio.sleep(2)
+        # 检测页面是否显示上传限额错误
+        upload_error = await self._detect_upload_limit_error()
+        if upload_error:
+            raise Exception(f"Upload limit reached: {upload_error}")
         
         # 输入提示词
         print("[ChatGPT] 正在输入提示词...")
-        
-        input_box = await self._try_find(self.SELECTORS['input_box'])
-        
-        if input_box:
-            await input_box.click()
-            await input_box.fill(prompt)
-        else:
-            raise Exception("找不到输入框")
+        await input_box.click()
+        await input_box.fill(prompt)
         
         await asyncio.sleep(1)
-        
-        # 点击发送按钮
+    
+    async def _send_message(self) -> None:
+        """点击发送按钮"""
+        await self._before_send()
         if await self._try_click(self.SELECTORS['send_button'], timeout=5000):
             print("消息已发送 ✓")
     
@@ -129,8 +187,11 @@ class ChatGPTAutomation(BaseAIAutomation):
         
         print("[ChatGPT] 等待回复...")
         
-        # 等待一小段时间让回复开始
-        await asyncio.sleep(5)
+        # 优先通过网络层检测流式回复结束
+        if await self._wait_for_stream_end(timeout_ms, initial_delay=5):
+            response = await self._get_last_response()
+            print("回复完成! ✓")
+            return response
         
         # 方法1: 等待 "Stop" 按钮消失
         stop_found = False
@@ -158,122 +219,28 @@ class ChatGPTAutomation(BaseAIAutomation):
         print("回复完成! ✓")
         return response
     
-    async def _get_last_response(self) -> str:
-        """获取最后一条 AI 回复"""
-        try:
-            messages = self.page.locator('[data-message-author-role="assistant"]')
-            count = await messages.count()
-            if count > 0:
-                content = await messages.last.text_content()
-                return content if content else ""
-        except:
-            pass
-        return ""
-    
-    async def _get_message_count(self) -> int:
-        """获取当前 AI 回复的数量"""
-        try:
-            messages = self.page.locator('[data-message-author-role="assistant"]')
-            return await messages.count()
-        except:
-            return 0
-    
-    async def _detect_empty_response(self, initial_count: int) -> bool:
-        """
-        检测是否为空白回复
-        
-        Args:
-            initial_count: 发送消息前的 AI 回复数量
-        
-        Returns:
-            True 如果检测到空白回复
-        """
-        try:
-            messages = self.page.locator('[data-message-author-role="assistant"]')
-            current_count = await messages.count()
-            
-            # 如果有新回复产生
-            if current_count > initial_count:
-                # 获取最新回复的内容
-                last_message = messages.last
-                content = await last_message.text_content()
-                
-                if content is None or content.strip() == "":
-                    print("[ChatGPT] 检测到空白回复")
-                    return True
-            else:
-                # 没有新回复产生，可能是发送失败
-                print("[ChatGPT] 警告：没有检测到新回复")
-                return True
-                
-            return False
-        except Exception as e:
-            print(f"[ChatGPT] 检测回复时出错: {e}")
-            return True
-    
     async def _detect_upload_limit_error(self) -> str:
         """
         检测页面是否显示上传限额错误
         
+        通过页面运行时一次取回所有可见错误提示，并同时扫描页面文本中的限额标记
+        
         Returns:
             错误信息字符串（如果检测到），否则返回空字符串
         """
         try:
-            # ChatGPT 的错误 Toast 可能出现在多种位置
-            # 检测页面中的错误提示元素
-            error_selectors = [
-                # Toast 通知区域
-                '[role="alert"]',
-                '[data-testid*="toast"]',
-                '.toast-message',
-                '.error-message',
-                # 通用 alert 类
-                '[class*="alert"]',
-                '[class*="error"]',
-                '[class*="warning"]',
-                # 特定的上传错误区域
-                '[class*="upload-error"]',
-            ]
-            
-            # 检测错误关键词（中英文）
-            error_keywords = [
-                # 中文
-                "无法上传", "上传失败", "最多可上传", "上传限制",
-                "文件过多", "超出限制", "达到上限",
-                # 英文
-                "unable to upload", "upload failed", "cannot upload",
-                "upload limit", "too many files", "limit reached",
-                "max files", "maximum files", "file limit",
-            ]
+            state = await self._page_state(scan_text=self.UPLOAD_LIMIT_MARKERS)
             
-            for selector in error_selectors:
-                try:
-                    elements = self.page.locator(selector)
-                    count = await elements.count()
-                    for i in range(count):
-                        element = elements.nth(i)
-                        if await element.is_visible():
-                            text = await element.text_content()
-                            if text:
-                                text_lower = text.lower()
-                                for keyword in error_keywords:
-                                    if keyword.lower() in text_lower:
-                                        print(f"[ChatGPT] 检测到上传限额错误: {text[:100]}")
-                                        return text
-                except:
-                    continue
+            for text in state.get('errors', []):
+                text_lower = text.lower()
+                for keyword in self.UPLOAD_LIMIT_KEYWORDS:
+                    if keyword.lower() in text_lower:
+                        print(f"[ChatGPT] 检测到上传限额错误: {text[:100]}")
+                        return text
             
-            # 备用方法：直接检查整个页面的文本内容
-            try:
-                page_content = await self.page.content()
-                page_lower = page_content.lower()
-                # 只检测关键的限额指示器
-                if "最多可上传 0 个" in page_content or "最多可上传0个" in page_content:
-                    return "最多可上传 0 个文件"
-                if "max files: 0" in page_lower or "maximum files: 0" in page_lower:
-                    return "Maximum files: 0"
-            except:
-                pass
+            # 备用方法：页面文本中的关键限额指示器
+            for marker in state.get('textMatches', []):
+                return "最多可上传 0 个文件" if marker.startswith("最多") else "Maximum files: 0"
             
             return ""
         except Exception as e:
@@ -12,6 +12,7 @@ import threading
 import random
 from pathlib import Path
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 
 from PySide6.QtWidgets import (
@@ -30,6 +31,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
 from src.page_preview import PagePreviewPanel, PageGroupManager, PagePreviewDialog
 from src.i18n import tr, set_language, get_language, toggle_language
+from src.resource_monitor import BrowserResourceMonitor
 
 
 # ═══════════════════════════════════════════════════════════
@@ -253,6 +255,15 @@ class StatusBar(GlassCard):
         container.addWidget(self.msg_label)
         container.addStretch()
         
+        # 浏览器资源占用（由资源监测定期更新）
+        self.resource_label = QLabel("")
+        self.resource_label.setStyleSheet(f"""
+            color: {T.text_secondary};
+            font-size: 12px;
+            background: transparent;
+        """)
+        container.addWidget(self.resource_label)
+        
         self.addLayout(container)
         
     def show_message(self, msg: str, type: str = "info"):
@@ -262,6 +273,9 @@ class StatusBar(GlassCard):
         self.icon_label.setText(icons.get(type, "ℹ️"))
         self.msg_label.setStyleSheet(f"color: {colors.get(type, T.text_primary)}; background: transparent; font-size: 14px;")
         self.msg_label.setText(msg)
+        
+    def show_resources(self, summary: str):
+        self.resource_label.setText(summary)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -467,6 +481,8 @@ class MainWindow(QMainWindow):
     sig_progress = Signal(int, str)     # value, text
     sig_reset_ui = Signal()
     sig_process_next_pdf = Signal(int)  # next_pdf_idx - 处理下一个 PDF
+    sig_stream = Signal(str)            # 流式回复的最新文本
+    sig_resources = Signal(str)         # 浏览器资源占用摘要
     
     def __init__(self):
         super().__init__()
@@ -502,8 +518,18 @@ class MainWindow(QMainWindow):
         self.auto_pause_on_limit = False   # 检测到上限时自动暂停 (默认关闭)
         self.pause_duration_minutes = 30   # 暂停时长 (分钟), 0 表示无限暂停
         self._limit_pause_timer = None     # 自动恢复定时器
+        self._limit_reset_at = None        # 从上限提示中解析出的重置时间
         self._limit_pause_remaining = 0    # 剩余暂停秒数
         
+        # 性能设置
+        self.pipeline_batches = config.PIPELINE_BATCHES  # 生成回复时预先上传下一批
+        self.auto_rotate_on_load = config.AUTO_ROTATE_ON_LOAD  # 浏览器变慢时自动新建聊天
+        self.rate_governor_enabled = config.RATE_GOVERNOR  # 按上限信号自适应调整发送间隔
+        self.hedge_requests = config.HEDGE_REQUESTS  # 回复过慢时在另一个标签页重发
+        self.failover_on_limit = config.FAILOVER_ON_LIMIT  # 触发上限时转到其他已登录平台
+        self.headless = config.HEADLESS  # 无头模式启动浏览器（下次启动浏览器时生效）
+        self.platform_router = None  # 失败转移：按优先级管理各平台实例
+        
         # 创建持久的事件循环 (在单独线程中运行)
         self._loop = asyncio.new_event_loop()
         self._loop_thread = threading.Thread(target=self._run_loop, daemon=True)
@@ -520,6 +546,8 @@ class MainWindow(QMainWindow):
         self.sig_progress.connect(self._upd_prog)
         self.sig_reset_ui.connect(self._reset_ui)
         self.sig_process_next_pdf.connect(self._do_process_next_pdf)
+        self.sig_stream.connect(self._upd_stream)
+        self.sig_resources.connect(self.status.show_resources)
     
     def _do_log(self, msg, level):
         """接收信号并更新状态栏"""
@@ -1162,6 +1190,12 @@ class MainWindow(QMainWindow):
         self.p_status = QLabel(tr("msg_ready"))
         self.p_status.setStyleSheet(f"color: {T.text_tertiary}; font-size: 13px; margin-top: 5px; background: transparent;")
         progress_card.addWidget(self.p_status)
+        # 实时显示 AI 正在生成的回复（流式捕获）
+        self.p_stream = QLabel("")
+        self.p_stream.setWordWrap(True)
+        self.p_stream.setStyleSheet(f"color: {T.text_secondary}; font-size: 12px; margin-top: 4px; background: transparent;")
+        self.p_stream.setVisible(False)
+        progress_card.addWidget(self.p_stream)
         space.addWidget(progress_card)
         
         self.settings_card = GlassCard(tr("card_settings"))
@@ -1343,6 +1377,48 @@ class MainWindow(QMainWindow):
         pause_duration_layout.addStretch()
         form.addLayout(pause_duration_layout)
         
+        # 分割线
+        divider3 = QFrame()
+        divider3.setFrameShape(QFrame.Shape.HLine)
+        divider3.setStyleSheet(f"background: {T.divider}; margin-top: 10px; margin-bottom: 5px;")
+        divider3.setFixedHeight(1)
+        form.addWidget(divider3)
+        
+        # 性能设置标题
+        self.lbl_performance_settings = QLabel(tr("label_performance_settings"))
+        self.lbl_performance_settings.setStyleSheet(f"""
+            color: {T.accent}; 
+            font-weight: bold;
+            font-size: 14px;
+            background: transparent;
+            padding-top: 8px;
+        """)
+        form.addWidget(self.lbl_performance_settings)
+        
+        # 流水线发送开关
+        self.cb_pipeline_batches = self._setting_checkbox(
+            form, "label_pipeline_batches", self.pipeline_batches, self._on_pipeline_toggled)
+        
+        # 按负载自动新建聊天开关
+        self.cb_auto_rotate_on_load = self._setting_checkbox(
+            form, "label_auto_rotate_on_load", self.auto_rotate_on_load, self._on_auto_rotate_toggled)
+        
+        # 自适应发送节奏开关
+        self.cb_rate_governor = self._setting_checkbox(
+            form, "label_rate_governor", self.rate_governor_enabled, self._on_rate_governor_toggled)
+        
+        # 对冲请求开关
+        self.cb_hedge_requests = self._setting_checkbox(
+            form, "label_hedge_requests", self.hedge_requests, self._on_hedge_toggled)
+        
+        # 失败转移开关
+        self.cb_failover_on_limit = self._setting_checkbox(
+            form, "label_failover_on_limit", self.failover_on_limit, self._on_failover_toggled)
+        
+        # 无头模式开关
+        self.cb_headless = self._setting_checkbox(
+            form, "label_headless", self.headless, self._on_headless_toggled)
+        
         settings_card.addLayout(form)
         space.addWidget(settings_card)
         
@@ -1454,6 +1530,56 @@ class MainWindow(QMainWindow):
         self.in_custom_pause.setEnabled(checked and is_custom)
         print(f"[DEBUG] auto_pause_on_limit = {checked}")
         
+    def _setting_checkbox(self, form, label_key: str, checked: bool, on_toggled) -> QCheckBox:
+        """创建设置区的开关并加入表单（性能设置各开关共用同一样式）"""
+        checkbox = QCheckBox(tr(label_key))
+        checkbox.setChecked(checked)
+        checkbox.setStyleSheet(f"""
+            QCheckBox {{
+                color: {T.text_primary};
+                font-size: 13px;
+                background: transparent;
+                padding: 4px 0;
+            }}
+            QCheckBox::indicator {{
+                width: 18px;
+                height: 18px;
+            }}
+        """)
+        checkbox.toggled.connect(on_toggled)
+        form.addWidget(checkbox)
+        return checkbox
+    
+    def _on_pipeline_toggled(self, checked: bool):
+        """流水线发送开关变化"""
+        self.pipeline_batches = checked
+        print(f"[DEBUG] pipeline_batches = {checked}")
+        
+    def _on_auto_rotate_toggled(self, checked: bool):
+        """按负载自动新建聊天开关变化"""
+        self.auto_rotate_on_load = checked
+        print(f"[DEBUG] auto_rotate_on_load = {checked}")
+        
+    def _on_rate_governor_toggled(self, checked: bool):
+        """自适应发送节奏开关变化"""
+        self.rate_governor_enabled = checked
+        print(f"[DEBUG] rate_governor_enabled = {checked}")
+        
+    def _on_hedge_toggled(self, checked: bool):
+        """对冲请求开关变化"""
+        self.hedge_requests = checked
+        print(f"[DEBUG] hedge_requests = {checked}")
+        
+    def _on_failover_toggled(self, checked: bool):
+        """失败转移开关变化"""
+        self.failover_on_limit = checked
+        print(f"[DEBUG] failover_on_limit = {checked}")
+        
+    def _on_headless_toggled(self, checked: bool):
+        """无头模式开关变化"""
+        self.headless = checked
+        print(f"[DEBUG] headless = {checked}")
+        
     def _on_pause_duration_changed(self, index: int):
         """暂停时长选择变化"""
         duration = self.combo_pause_duration.currentData()
@@ -1531,6 +1657,84 @@ class MainWindow(QMainWindow):
         
         return any(kw in error_str for kw in limit_keywords)
     
+    def _record_limit_signal(self, error: Exception) -> None:
+        """把上限错误反馈给自适应发送节奏（上传限额只温和退避）"""
+        if not self.rate_governor_enabled or self.bot is None or not self._is_rate_limit_error(error):
+            return
+        error_str = str(error).lower()
+        is_upload = "upload" in error_str or "上传" in error_str
+        self.bot.rate_governor.record_limit(upload=is_upload)
+        self.sig_log.emit(tr("msg_rate_limit_learned", self.bot.rate_governor.describe()), "info")
+    
+    def _chat_error_kind(self, error: Exception) -> Optional[str]:
+        """页面错误状态的类型（'error' / 'retry' / 'login'），其他异常返回 None"""
+        from src.base_automation import ChatErrorStateError
+        return error.kind if isinstance(error, ChatErrorStateError) else None
+    
+    async def _failover(self, error: Exception) -> bool:
+        """
+        当前平台触发上限时转到下一个可用平台
+        
+        Returns:
+            True 已切换（调用方在新平台上重试当前批次）；False 没有可用的平台，
+            此时 self._limit_reset_at 为最早解除上限的时间
+        """
+        self._limit_reset_at = None
+        router = self.platform_router
+        if not self.failover_on_limit or router is None or self.bot is None:
+            return False
+        if self.bot.staged_images is not None:
+            await self.bot.discard_staged()
+        reset_at = await self.bot.find_limit_reset(str(error))
+        router.mark_limited(self.bot, reset_at, self.pause_duration_minutes or 30)
+        
+        bot = await router.select()
+        if bot is None:
+            self._limit_reset_at = router.earliest_reset()
+            self.sig_log.emit(tr("msg_failover_exhausted"), "warning")
+            return False
+        self.sig_log.emit(tr("msg_failover_switched", self.bot.PLATFORM_NAME, bot.PLATFORM_NAME), "warning")
+        self._use_bot(bot)
+        return True
+    
+    async def _restore_preferred_platform(self) -> None:
+        """失败转移后每批次检查：优先级更高的平台上限已解除时切回"""
+        router = self.platform_router
+        if not self.failover_on_limit or router is None or self.bot is None:
+            return
+        bot = await router.select()
+        if bot is None or bot is self.bot:
+            return
+        if self.bot.staged_images is not None:
+            await self.bot.discard_staged()
+        self.sig_log.emit(tr("msg_failover_restored", bot.PLATFORM_NAME), "success")
+        self._use_bot(bot)
+    
+    def _use_bot(self, bot) -> None:
+        """切换当前平台实例，并把界面回调（流式文本、资源监测）接到该实例上"""
+        bot.on_stream_delta = lambda delta, text: self.sig_stream.emit(text)
+        bot.on_resource_sample = lambda sample: self.sig_resources.emit(
+            BrowserResourceMonitor.format_summary(sample)
+        )
+        self.bot = bot
+    
+    def _hedge_partner(self):
+        """对冲请求的备选平台实例（未启用失败转移或没有已打开的其他平台时为 None）"""
+        if not self.hedge_requests or self.platform_router is None:
+            return None
+        return self.platform_router.hedge_partner(self.bot)
+    
+    async def _close_fallback_platforms(self) -> None:
+        """任务结束时切回宿主平台，并关闭失败转移打开的备用平台（下次需要时重新打开）"""
+        router = self.platform_router
+        if router is None:
+            return
+        if self.bot is not None and self.bot is not router.host:
+            if self.bot.staged_images is not None:
+                await self.bot.discard_staged()
+            self._use_bot(router.host)
+        await router.close()
+    
     @Slot()
     def _on_limit_detected(self):
         """检测到 AI 上限时调用"""
@@ -1541,6 +1745,7 @@ class MainWindow(QMainWindow):
         
         self.is_running = False
         self._batch_was_paused = True
+        reset_at, self._limit_reset_at = self._limit_reset_at, None
         
         if self.pause_duration_minutes == 0:
             # 无限暂停
@@ -1548,21 +1753,28 @@ class MainWindow(QMainWindow):
             self._reset_ui(keep_progress=True)
             return
         
-        # 计算暂停时间
-        pause_seconds = self.pause_duration_minutes * 60
-        self._limit_pause_remaining = pause_seconds
-        
-        # 格式化时间显示（使用国际化）
-        from src.i18n import get_language
-        lang = get_language()
-        if self.pause_duration_minutes >= 60:
-            hours = self.pause_duration_minutes // 60
-            time_str = f"{hours} {'hour' if lang == 'en' else '小时'}"
+        if reset_at is not None:
+            # 平台给出了重置时间：在重置后稍等片刻恢复
+            pause_seconds = int((reset_at - datetime.now()).total_seconds()) + config.LIMIT_RESET_MARGIN
+            self._limit_pause_remaining = max(1, pause_seconds)
+            time_fmt = "%H:%M" if reset_at.date() == datetime.now().date() else "%m-%d %H:%M"
+            self._log(tr("msg_limit_reset_at", reset_at.strftime(time_fmt)), "warning")
         else:
-            time_str = f"{self.pause_duration_minutes} {'min' if lang == 'en' else '分钟'}"
-        
-        self._log(tr("msg_limit_detected", time_str), "warning")
-        self._log(tr("msg_auto_resume_in", time_str), "info")
+            # 计算暂停时间
+            pause_seconds = self.pause_duration_minutes * 60
+            self._limit_pause_remaining = pause_seconds
+            
+            # 格式化时间显示（使用国际化）
+            from src.i18n import get_language
+            lang = get_language()
+            if self.pause_duration_minutes >= 60:
+                hours = self.pause_duration_minutes // 60
+                time_str = f"{hours} {'hour' if lang == 'en' else '小时'}"
+            else:
+                time_str = f"{self.pause_duration_minutes} {'min' if lang == 'en' else '分钟'}"
+            
+            self._log(tr("msg_limit_detected", time_str), "warning")
+            self._log(tr("msg_auto_resume_in", time_str), "info")
         
         # 启动定时器（设置 self 为父对象，确保内存管理）
         from PySide6.QtCore import QTimer
@@ -1572,6 +1784,14 @@ class MainWindow(QMainWindow):
         
         self._reset_ui(keep_progress=True)
         
+    @Slot()
+    def _on_login_wall(self):
+        """回复期间页面跳转到登录页：保留进度并停止，重新登录后可继续"""
+        self.is_running = False
+        self._batch_was_paused = True
+        self._log(tr("msg_login_wall"), "error")
+        self._reset_ui(keep_progress=True)
+        
     def _on_pause_tick(self):
         """暂停倒计时"""
         self._limit_pause_remaining -= 1
@@ -1605,15 +1825,21 @@ class MainWindow(QMainWindow):
             print("[DEBUG] start() coroutine running")
             try:
                 from src.platform_factory import get_automation
-                self.bot = get_automation(platform_id)
+                self._use_bot(get_automation(platform_id))
                 print(f"[DEBUG] {platform_name} Automation created, calling start_browser...")
-                await self.bot.start_browser()
+                await self.bot.start_browser(headless=self.headless)
                 print("[DEBUG] start_browser completed, emitting signals...")
+                from src.platform_router import PlatformRouter
+                self.platform_router = PlatformRouter(platform_id, self.bot, config.FAILOVER_PLATFORMS)
                 
                 # 注册浏览器关闭事件监听器
                 def on_browser_close():
                     print("[DEBUG] Browser closed by user")
+                    # 备用平台的标签页随浏览器一起关闭，这里释放它们的实例（停止监测、保存统计）
+                    if self.platform_router is not None:
+                        asyncio.ensure_future(self.platform_router.close())
                     self.bot = None
+                    self.platform_router = None
                     # 检查是否有进度可以保留
                     has_progress = self.current_pdf_index > 0 or self.current_page_index > 0
                     if has_progress:
@@ -1745,6 +1971,14 @@ class MainWindow(QMainWindow):
                     total_batches = len(batches)
                     print(f"[DEBUG] process_batches: 开始处理，总批次 = {total_batches}")
                     
+                    # 会新建聊天时提前在后台预热备用标签页
+                    if self.new_chat_per_pdf or self.new_chat_per_pages or self.auto_rotate_on_load:
+                        self.bot.prepare_spare_tab()
+                    
+                    # 流水线发送：当前批次生成回复期间预先上传下一批
+                    if self.pipeline_batches and not self.bot.SUPPORTS_PIPELINING:
+                        self.sig_log.emit(tr("msg_pipeline_unsupported", self.bot.PLATFORM_NAME), "info")
+                    
                     for batch_idx in range(start_batch, total_batches):
                         print(f"[DEBUG] process_batches: 处理批次 {batch_idx + 1}/{total_batches}, is_running = {self.is_running}")
                         if not self.is_running:
@@ -1756,7 +1990,7 @@ class MainWindow(QMainWindow):
                         if batch_idx == 0 and current_pdf_idx > 0 and self.new_chat_per_pdf:
                             self.sig_log.emit(tr("msg_creating_new_chat"), "info")
                             try:
-                                await self.bot.create_new_chat()
+                                await self.bot.rotate_chat()
                                 self.sig_log.emit(tr("msg_new_chat_created"), "success")
                                 self.pages_since_last_new_chat = 0  # 重置页数计数
                                 await asyncio.sleep(0.5)  # 简短缓冲
@@ -1766,6 +2000,9 @@ class MainWindow(QMainWindow):
                         batch = batches[batch_idx]
                         batch_size = len(batch)
                         
+                        # 失败转移：原平台上限已解除时切回
+                        await self._restore_preferred_platform()
+                        
                         # 实时检查：跳过已禁用的页面
                         # 注意：在自动批量处理模式下，跳过此检查，因为 preview_dialog 的状态可能已被更新为其他 PDF 的数据
                         is_auto_mode = getattr(self, '_is_auto_next_pdf', False)
@@ -1802,6 +2039,7 @@ class MainWindow(QMainWindow):
                         retry_delay = config.EMPTY_RESPONSE_RETRY_DELAY
                         retry_count = 0
                         success = False
+                        regenerate = False  # 重试时先在当前轮重新生成，不重新上传图片
                         
                         while retry_count <= max_retries and not success:
                             if not self.is_running:
@@ -1811,18 +2049,52 @@ class MainWindow(QMainWindow):
                                 if retry_count > 0:
                                     self.sig_log.emit(tr("msg_retry", retry_count, max_retries, batch_idx+1), "warning")
                                 
-                                # 使用多图片上传方法
-                                await self.bot.upload_images_and_send(batch, prompt)
-                                response = await self.bot.wait_for_response_complete()
+                                if self.rate_governor_enabled:
+                                    await self.bot.rate_governor.acquire()
+                                
+                                if regenerate and await self.bot.regenerate_last_response():
+                                    self.sig_log.emit(tr("msg_regenerate_retry"), "info")
+                                elif self.bot.staged_images is not None and self.bot.staged_images == batch and retry_count == 0:
+                                    # 本批次已在上一条回复生成期间预先上传，直接发送
+                                    await self.bot.send_staged()
+                                else:
+                                    if self.bot.staged_images is not None:
+                                        await self.bot.discard_staged()
+                                    # 使用多图片上传方法
+                                    await self.bot.upload_images_and_send(batch, prompt)
+                                regenerate = False
+                                
+                                # 等待回复期间预先上传下一批（即将新建聊天时不预先上传；重新生成时下一批已在输入框中）
+                                stage_task = None
+                                will_new_chat = (self.new_chat_per_pages and
+                                                 self.pages_since_last_new_chat + batch_size >= self.new_chat_pages_threshold)
+                                # 按负载新建聊天：上次采样已接近阈值时，本批结束后很可能切换对话
+                                if self.auto_rotate_on_load and self.bot.health_monitor.near_limit():
+                                    will_new_chat = True
+                                # 失败转移可能切换了平台，每批按当前平台判断是否支持
+                                pipelining = self.pipeline_batches and self.bot.SUPPORTS_PIPELINING
+                                if (pipelining and batch_idx + 1 < total_batches and not will_new_chat
+                                        and self.bot.staged_images is None):
+                                    stage_task = asyncio.ensure_future(self.bot.stage_batch(batches[batch_idx + 1], prompt))
+                                # 失败转移已打开其他平台时，对冲请求优先发到该平台
+                                self.bot.hedge_partner = self._hedge_partner()
+                                try:
+                                    response = await self.bot.wait_for_reply(batch, prompt, hedge=self.hedge_requests)
+                                finally:
+                                    if stage_task is not None and await stage_task:
+                                        self.sig_log.emit(tr("msg_next_batch_staged"), "info")
                                 
                                 # 检测空白输出 - 使用改进的检测方法
                                 is_empty = False
                                 if response is None or (isinstance(response, str) and response.strip() == ""):
                                     is_empty = True
                                 
-                                # 如果有 _detect_empty_response 方法（ChatGPT），使用更精确的检测
-                                if hasattr(self.bot, '_detect_empty_response') and hasattr(self.bot, '_initial_message_count'):
-                                    is_empty = await self.bot._detect_empty_response(self.bot._initial_message_count)
+                                if self.bot.last_reply_hedged:
+                                    self.sig_log.emit(tr("msg_reply_hedged"), "info")
+                                
+                                # 按发送前记录的轮次标记检测本轮是否出现了新回复（对冲请求胜出时原标签页的回复已被停止）
+                                if not is_empty and not self.bot.last_reply_hedged:
+                                    is_empty = await self.bot._detect_empty_response()
                                 
                                 if is_empty:
                                     retry_count += 1
@@ -1830,6 +2102,7 @@ class MainWindow(QMainWindow):
                                     if retry_count <= max_retries:
                                         self.sig_log.emit(tr("msg_empty_response_retry", retry_delay), "warning")
                                         await asyncio.sleep(retry_delay)
+                                        regenerate = True
                                         continue
                                     else:
                                         self.sig_log.emit(tr("msg_retry_failed", max_retries), "error")
@@ -1837,14 +2110,26 @@ class MainWindow(QMainWindow):
                                 else:
                                     success = True
                                     self.current_batch_index = batch_idx + 1
+                                    if self.rate_governor_enabled:
+                                        self.bot.rate_governor.record_success()
                                     
                             except Exception as e:
                                 self.sig_log.emit(tr("msg_send_failed", str(e)), "error")
+                                self._record_limit_signal(e)
+                                
+                                # 失败转移：在下一个可用平台上重试本批次（不计入重试次数）
+                                if self._is_rate_limit_error(e) and await self._failover(e):
+                                    regenerate = False
+                                    continue
                                 
                                 # 检测是否是 API 上限错误
                                 if self.auto_pause_on_limit and self._is_rate_limit_error(e):
                                     # 保存当前批次位置以便恢复
                                     self.current_batch_index = batch_idx
+                                    if self.bot.staged_images is not None:
+                                        await self.bot.discard_staged()
+                                    if self._limit_reset_at is None:
+                                        self._limit_reset_at = await self.bot.find_limit_reset(str(e))
                                     # 使用信号在主线程触发暂停
                                     from PySide6.QtCore import QMetaObject, Qt as QtCoreQt
                                     QMetaObject.invokeMethod(
@@ -1853,14 +2138,39 @@ class MainWindow(QMainWindow):
                                     )
                                     return  # 退出处理循环
                                 
+                                # 回复期间出现登录墙：无法自动重试，保留进度并停止
+                                error_kind = self._chat_error_kind(e)
+                                if error_kind == 'login':
+                                    self.current_batch_index = batch_idx
+                                    from PySide6.QtCore import QMetaObject, Qt as QtCoreQt
+                                    QMetaObject.invokeMethod(self, "_on_login_wall", QtCoreQt.QueuedConnection)
+                                    return
+                                
                                 retry_count += 1
+                                # 页面报错或提示重试时先尝试在当前轮重新生成
+                                regenerate = error_kind is not None
                                 if retry_count <= max_retries:
-                                    self.sig_log.emit(tr("msg_wait_retry", retry_delay), "warning")
-                                    await asyncio.sleep(retry_delay)
+                                    # 页面已明确报错时立即重试
+                                    if error_kind is None:
+                                        self.sig_log.emit(tr("msg_wait_retry", retry_delay), "warning")
+                                        await asyncio.sleep(retry_delay)
                                 else:
                                     self.sig_log.emit(tr("msg_retry_failed", max_retries), "error")
                                     success = True
                         
+                        # 按浏览器负载新建聊天：内存或单轮耗时超过阈值
+                        if success and self.auto_rotate_on_load and self.is_running and batch_idx < total_batches - 1:
+                            reason = await self.bot.check_chat_health()
+                            if reason:
+                                self.sig_log.emit(tr("msg_rotate_for_load", reason), "info")
+                                try:
+                                    await self.bot.rotate_chat()
+                                    self.sig_log.emit(tr("msg_new_chat_created"), "success")
+                                    self.pages_since_last_new_chat = 0
+                                    await asyncio.sleep(0.5)
+                                except Exception as e:
+                                    self.sig_log.emit(tr("msg_new_chat_failed", str(e)), "warning")
+                        
                         # 每N页新建聊天：检查累计页数是否达到阈值
                         if success and self.new_chat_per_pages and self.is_running:
                             self.pages_since_last_new_chat += batch_size
@@ -1869,16 +2179,24 @@ class MainWindow(QMainWindow):
                                 if batch_idx < total_batches - 1:
                                     self.sig_log.emit(tr("msg_creating_new_chat"), "info")
                                     try:
-                                        await self.bot.create_new_chat()
+                                        await self.bot.rotate_chat()
                                         self.sig_log.emit(tr("msg_new_chat_created"), "success")
                                         self.pages_since_last_new_chat = 0  # 重置计数
                                         await asyncio.sleep(0.5)
                                     except Exception as e:
                                         self.sig_log.emit(tr("msg_new_chat_failed", str(e)), "warning")
                         
-                        if batch_idx < total_batches - 1 and self.is_running:
+                        # 启用自适应限速时由 acquire() 控制节奏；下一批已预先上传时直接发送
+                        staged_next = (batch_idx + 1 < total_batches and self.bot.staged_images is not None
+                                       and self.bot.staged_images == batches[batch_idx + 1])
+                        if (batch_idx < total_batches - 1 and self.is_running
+                                and not self.rate_governor_enabled and not staged_next):
                             await asyncio.sleep(delay)
                     
+                    # 停止时清空预先上传的下一批，避免续传时重复上传
+                    if self.bot.staged_images is not None:
+                        await self.bot.discard_staged()
+                    
                     # 批次循环结束后的调试信息
                     print(f"[DEBUG] 批次循环结束: 共处理 {total_batches} 批次, is_running={self.is_running}")
                     
@@ -1901,6 +2219,7 @@ class MainWindow(QMainWindow):
                         else:
                             self.sig_progress.emit(100, tr("msg_complete"))
                             self.sig_log.emit(tr("msg_all_complete"), "success")
+                            await self._close_fallback_platforms()
                     self.sig_reset_ui.emit()
                     
                 except Exception as e:
@@ -1975,10 +2294,14 @@ class MainWindow(QMainWindow):
                             pct = int((i/total + (j+1)/len(images)/total) * 100)
                             self.sig_progress.emit(pct, f"{name} - p.{j+1}/{len(images)}")
                             
+                            # 失败转移：原平台上限已解除时切回
+                            await self._restore_preferred_platform()
+                            
                             max_retries = config.EMPTY_RESPONSE_MAX_RETRIES
                             retry_delay = config.EMPTY_RESPONSE_RETRY_DELAY
                             retry_count = 0
                             success = False
+                            regenerate = False  # 重试时先在当前轮重新生成，不重新上传图片
                             
                             while retry_count <= max_retries and not success:
                                 if not self.is_running:
@@ -1988,17 +2311,28 @@ class MainWindow(QMainWindow):
                                     if retry_count > 0:
                                         self.sig_log.emit(tr("msg_retry_page", retry_count, max_retries, name, j+1), "warning")
                                     
-                                    await self.bot.upload_images_and_send([img], prompt)
-                                    response = await self.bot.wait_for_response_complete()
+                                    if self.rate_governor_enabled:
+                                        await self.bot.rate_governor.acquire()
+                                    if regenerate and await self.bot.regenerate_last_response():
+                                        self.sig_log.emit(tr("msg_regenerate_retry"), "info")
+                                    else:
+                                        await self.bot.upload_images_and_send([img], prompt)
+                                    regenerate = False
+                                    # 失败转移已打开其他平台时，对冲请求优先发到该平台
+                                    self.bot.hedge_partner = self._hedge_partner()
+                                    response = await self.bot.wait_for_reply([img], prompt, hedge=self.hedge_requests)
                                     
                                     # 检测空白输出 - 使用改进的检测方法
                                     is_empty = False
                                     if response is None or (isinstance(response, str) and response.strip() == ""):
                                         is_empty = True
                                     
-                                    # 如果有 _detect_empty_response 方法（ChatGPT），使用更精确的检测
-                                    if hasattr(self.bot, '_detect_empty_response') and hasattr(self.bot, '_initial_message_count'):
-                                        is_empty = await self.bot._detect_empty_response(self.bot._initial_message_count)
+                                    if self.bot.last_reply_hedged:
+                                        self.sig_log.emit(tr("msg_reply_hedged"), "info")
+                                    
+                                    # 按发送前记录的轮次标记检测本轮是否出现了新回复（对冲请求胜出时原标签页的回复已被停止）
+                                    if not is_empty and not self.bot.last_reply_hedged:
+                                        is_empty = await self.bot._detect_empty_response()
                                     
                                     if is_empty:
                                         retry_count += 1
@@ -2006,6 +2340,7 @@ class MainWindow(QMainWindow):
                                         if retry_count <= max_retries:
                                             self.sig_log.emit(tr("msg_empty_response_retry", retry_delay), "warning")
                                             await asyncio.sleep(retry_delay)
+                                            regenerate = True
                                             continue
                                         else:
                                             self.sig_log.emit(tr("msg_retry_page_failed", max_retries), "error")
@@ -2014,14 +2349,24 @@ class MainWindow(QMainWindow):
                                         success = True
                                         self.current_pdf_index = i
                                         self.current_page_index = j + 1
+                                        if self.rate_governor_enabled:
+                                            self.bot.rate_governor.record_success()
                                         
                                 except Exception as e:
                                     self.sig_log.emit(tr("msg_send_failed", str(e)), "error")
+                                    self._record_limit_signal(e)
+                                    
+                                    # 失败转移：在下一个可用平台上重试本页（不计入重试次数）
+                                    if self._is_rate_limit_error(e) and await self._failover(e):
+                                        regenerate = False
+                                        continue
                                     
                                     # 检测是否是 API 上限错误
                                     if self.auto_pause_on_limit and self._is_rate_limit_error(e):
                                         self.current_pdf_index = i
                                         self.current_page_index = j
+                                        if self._limit_reset_at is None:
+                                            self._limit_reset_at = await self.bot.find_limit_reset(str(e))
                                         from PySide6.QtCore import QMetaObject, Qt as QtCoreQt
                                         QMetaObject.invokeMethod(
                                             self, "_on_limit_detected",
@@ -2029,15 +2374,29 @@ class MainWindow(QMainWindow):
                                         )
                                         return
                                     
+                                    # 回复期间出现登录墙：无法自动重试，保留进度并停止
+                                    error_kind = self._chat_error_kind(e)
+                                    if error_kind == 'login':
+                                        self.current_pdf_index = i
+                                        self.current_page_index = j
+                                        from PySide6.QtCore import QMetaObject, Qt as QtCoreQt
+                                        QMetaObject.invokeMethod(self, "_on_login_wall", QtCoreQt.QueuedConnection)
+                                        return
+                                    
                                     retry_count += 1
+                                    # 页面报错或提示重试时先尝试在当前轮重新生成
+                                    regenerate = error_kind is not None
                                     if retry_count <= max_retries:
-                                        self.sig_log.emit(tr("msg_wait_retry", retry_delay), "warning")
-                                        await asyncio.sleep(retry_delay)
+                                        # 页面已明确报错时立即重试
+                                        if error_kind is None:
+                                            self.sig_log.emit(tr("msg_wait_retry", retry_delay), "warning")
+                                            await asyncio.sleep(retry_delay)
                                     else:
                                         self.sig_log.emit(tr("msg_retry_page_failed", max_retries), "error")
                                         success = True
                             
-                            if j < len(images) - 1 and self.is_running: 
+                            # 启用自适应限速时由 acquire() 控制节奏
+                            if j < len(images) - 1 and self.is_running and not self.rate_governor_enabled: 
                                 await asyncio.sleep(delay)
                         
                         if self.is_running:
@@ -2049,6 +2408,7 @@ class MainWindow(QMainWindow):
                         self.current_page_index = 0
                         self.sig_progress.emit(100, tr("msg_complete"))
                         self.sig_log.emit(tr("msg_all_complete"), "success")
+                        await self._close_fallback_platforms()
                     self.sig_reset_ui.emit()
                     
                 except Exception as e:
@@ -2065,6 +2425,12 @@ class MainWindow(QMainWindow):
         self.p_lbl.setText(f"{val}%")
         self.p_status.setText(txt)
         
+    def _upd_stream(self, text):
+        """显示流式回复的末尾部分"""
+        tail = " ".join(text.split())[-160:]
+        self.p_stream.setText(tail)
+        self.p_stream.setVisible(bool(tail))
+        
     def _stop(self):
         self.is_running = False
         self._batch_was_paused = True  # 标记用户暂停，下次可以续传
@@ -2158,6 +2524,22 @@ class MainWindow(QMainWindow):
             self.combo_pause_duration.setItemText(2, tr("pause_custom"))
             self.combo_pause_duration.setItemText(3, tr("pause_forever"))
         
+        # 更新性能设置标签
+        if hasattr(self, 'lbl_performance_settings'):
+            self.lbl_performance_settings.setText(tr("label_performance_settings"))
+        if hasattr(self, 'cb_pipeline_batches'):
+            self.cb_pipeline_batches.setText(tr("label_pipeline_batches"))
+        if hasattr(self, 'cb_auto_rotate_on_load'):
+            self.cb_auto_rotate_on_load.setText(tr("label_auto_rotate_on_load"))
+        if hasattr(self, 'cb_rate_governor'):
+            self.cb_rate_governor.setText(tr("label_rate_governor"))
+        if hasattr(self, 'cb_hedge_requests'):
+            self.cb_hedge_requests.setText(tr("label_hedge_requests"))
+        if hasattr(self, 'cb_failover_on_limit'):
+            self.cb_failover_on_limit.setText(tr("label_failover_on_limit"))
+        if hasattr(self, 'cb_headless'):
+            self.cb_headless.setText(tr("label_headless"))
+        
         # 更新状态
         if not self.is_running:
             self.p_status.setText(tr("msg_ready"))
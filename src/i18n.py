@@ -162,10 +162,30 @@ translations = {
         "label_custom_minutes": "分钟",
         "msg_limit_detected": "检测到 AI 上限，自动暂停 {}",
         "msg_auto_resume_in": "将在 {} 后自动恢复",
+        "msg_limit_reset_at": "检测到 AI 上限，将在 {} 重置后自动恢复",
         "msg_paused_forever": "已暂停，请手动恢复",
         "msg_auto_resumed": "自动恢复处理",
         "msg_limit_pause_countdown": "上限暂停中，剩余 {} 秒",
         
+        # 性能设置
+        "label_performance_settings": "⚡ 性能",
+        "label_pipeline_batches": "生成回复时预先上传下一批",
+        "msg_pipeline_unsupported": "{} 不支持预先上传，按顺序处理",
+        "msg_next_batch_staged": "下一批已预先上传",
+        "label_auto_rotate_on_load": "浏览器变慢时自动新建聊天",
+        "msg_rotate_for_load": "标签页负载过高（{}），新建聊天",
+        "label_rate_governor": "自适应发送节奏（按上限信号自动调整间隔）",
+        "label_hedge_requests": "回复过慢时在另一个标签页重发（对冲请求）",
+        "msg_reply_hedged": "原回复过慢，已采用对冲请求的回复",
+        "label_failover_on_limit": "触发上限时转到其他已登录平台（失败转移）",
+        "label_headless": "无头模式运行浏览器（需已登录，下次启动浏览器时生效）",
+        "msg_failover_switched": "{} 触发上限，剩余批次转到 {}",
+        "msg_failover_restored": "{} 上限已解除，切回该平台",
+        "msg_failover_exhausted": "所有可用平台都已触发上限",
+        "msg_regenerate_retry": "已在当前对话中重新生成回复（未重新上传图片）",
+        "msg_login_wall": "登录状态已失效，已保留进度并停止，请在浏览器中重新登录后继续",
+        "msg_rate_limit_learned": "已调整发送节奏: {}",
+        
         # 语言
         "language": "语言",
     },
@@ -324,10 +344,30 @@ translations = {
         "label_custom_minutes": "min",
         "msg_limit_detected": "Rate limit detected, pausing for {}",
         "msg_auto_resume_in": "Auto resume in {}",
+        "msg_limit_reset_at": "Rate limit detected, auto resume after it resets at {}",
         "msg_paused_forever": "Paused, click Start to resume",
         "msg_auto_resumed": "Auto resumed",
         "msg_limit_pause_countdown": "Rate limit pause, {} sec left",
         
+        # Performance settings
+        "label_performance_settings": "⚡ Performance",
+        "label_pipeline_batches": "Pre-upload next batch while generating",
+        "msg_pipeline_unsupported": "{} does not support pre-upload, processing sequentially",
+        "msg_next_batch_staged": "Next batch pre-uploaded",
+        "label_auto_rotate_on_load": "New chat when the browser slows down",
+        "msg_rotate_for_load": "Chat tab overloaded ({}), starting new chat",
+        "label_rate_governor": "Adaptive pacing (learn send interval from limit signals)",
+        "label_hedge_requests": "Resend slow replies in a second tab (hedged requests)",
+        "msg_reply_hedged": "Reply was slow, used the hedged request's answer",
+        "label_failover_on_limit": "Fail over to another logged-in platform on rate limits",
+        "label_headless": "Run the browser headless (needs a saved login, applies on next launch)",
+        "msg_failover_switched": "{} hit its limit, routing the remaining batches to {}",
+        "msg_failover_restored": "{} limit has reset, switching back",
+        "msg_failover_exhausted": "All available platforms have hit their limits",
+        "msg_regenerate_retry": "Regenerating the reply in place (images not re-uploaded)",
+        "msg_login_wall": "Logged out while waiting for a reply. Progress kept; log in again in the browser and continue",
+        "msg_rate_limit_learned": "Send pacing adjusted: {}",
+        
         # Language
         "language": "Language",
     }
@@ -0,0 +1,98 @@
+"""
+回复耗时统计模块
+
+记录每个平台最近若干轮回复的首字耗时与完成耗时（连同本轮图片数），跨运行持久化，
+按分位数给出"正常情况下应该多久出结果"的估计，用于对冲请求等按历史分布决策的场景
+"""
+import json
+from pathlib import Path
+from typing import Optional
+
+
+class LatencyStats:
+    """单个平台的回复耗时分布"""
+
+    def __init__(self, path: Path, name: str = "", history: int = 200):
+        """
+        Args:
+            path: 统计文件路径（JSON）
+            name: 平台名称（用于日志）
+            history: 保留的最近样本数
+        """
+        self.name = name
+        self.path = Path(path)
+        self.history = history
+        # [{"images": 图片数, "first": 首字耗时秒或 None, "total": 完成耗时秒}]
+        self._samples: list = []
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                self._samples = data[-self.history:]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[{self.name}] 读取耗时统计失败，将重新统计: {e}")
+
+    def save(self) -> None:
+        """写入统计文件"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._samples, f)
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[{self.name}] 保存耗时统计失败: {e}")
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, images: int, total: float, first: Optional[float] = None) -> None:
+        """
+        记录一轮回复
+
+        Args:
+            images: 本轮图片数
+            total: 从发送到回复完成的秒数
+            first: 从发送到出现第一段文字的秒数（未知时为 None）
+        """
+        if total <= 0:
+            return
+        self._samples.append({
+            'images': max(1, images),
+            'first': round(first, 2) if first is not None else None,
+            'total': round(total, 2),
+        })
+        del self._samples[:-self.history]
+        self.save()
+
+    def percentile(self, metric: str, pct: float, images: int = 1, min_samples: int = 8) -> Optional[float]:
+        """
+        某项耗时的分位数
+
+        同图片数的样本足够时直接使用；否则把全部样本按图片数线性折算后合并估计
+
+        Args:
+            metric: 'first' 或 'total'
+            pct: 分位（0-100）
+            images: 本轮图片数
+            min_samples: 样本少于此数时返回 None
+
+        Returns:
+            耗时（秒）；样本不足时返回 None
+        """
+        images = max(1, images)
+        values = [s[metric] for s in self._samples
+                  if s.get('images') == images and s.get(metric) is not None]
+        if len(values) < min_samples:
+            values = [s[metric] * images / s['images'] for s in self._samples
+                      if s.get(metric) is not None and s.get('images')]
+        if len(values) < min_samples:
+            return None
+        values.sort()
+        index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+        return values[index]
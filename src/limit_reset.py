@@ -0,0 +1,168 @@
+"""
+上限重置时间解析模块
+
+从平台的上限提示或错误信息中提取重置时间（中英文），例如:
+- "Your limit will reset at 3:00 PM" / "You can try again after 18:31"
+- "Please try again in 2 hours and 15 minutes" / "try again in 45s"
+- "将于下午3:00重置" / "请在 2 小时 15 分钟后重试" / "明天 09:00 恢复"
+- 接口返回的 resetsAt 时间戳或 ISO 时间
+
+返回本地时间（naive datetime），无法识别时返回 None
+"""
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+
+# 超过这个范围的解析结果视为误识别
+MAX_HORIZON = timedelta(days=7)
+
+# 时间点附近需要出现的上下文词（避免把无关数字当成时间）
+_CONTEXT_BEFORE = re.compile(
+    r'(reset|available|try again|until|after|back at|resume|'
+    r'重置|恢复|再试|重试|可用|之后|届时|将于|于)',
+    re.I,
+)
+_CONTEXT_AFTER = re.compile(r'^\s*(之后|以后|后|重置|恢复|再试|可用|\(|（)', re.I)
+
+_EPOCH_RE = re.compile(r'resets?_?at["\']?\s*[:=]\s*["\']?(\d{10})(\d{3})?', re.I)
+_ISO_RE = re.compile(r'(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)')
+
+# 相对时间："in 2 hours 15 minutes" / "2 小时 15 分钟后"
+_DURATION_UNITS = [
+    (re.compile(r'^(?:hours?|hrs?|h|小时|个小时|時間)$', re.I), 3600),
+    (re.compile(r'^(?:minutes?|mins?|m|分钟|分鐘|分)$', re.I), 60),
+    (re.compile(r'^(?:seconds?|secs?|s|秒钟|秒)$', re.I), 1),
+]
+_DURATION_PART = r'(\d+(?:\.\d+)?)\s*(hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?|s|个小时|小时|分钟|分|秒钟|秒)'
+_RELATIVE_EN = re.compile(
+    r'\b(?:in|after|wait(?:ing)?(?:\s+for)?)\s+(?:about\s+|approximately\s+|~\s*)?'
+    r'((?:' + _DURATION_PART + r'\b[\s,]*(?:and\s+)?)+)',
+    re.I,
+)
+_RELATIVE_ZH = re.compile(r'((?:' + _DURATION_PART + r'\s*)+)\s*(?:之后|以后|后)')
+
+# 时间点："3:00 PM" / "15:00" / "下午3点" / "3pm"
+_TIME_RE = re.compile(
+    r'(?P<period>凌晨|早上|上午|中午|下午|晚上)?\s*'
+    r'(?<![\d:])(?P<hour>\d{1,2})'
+    r'(?:\s*(?P<sep>[:：点])\s*(?P<minute>\d{2})?\s*分?)?'
+    r'(?:\s*(?P<ampm>[ap])\.?\s?m\b\.?)?',
+    re.I,
+)
+
+_MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+_DATE_EN = re.compile(r'\b(' + '|'.join(_MONTHS) + r')[a-z]*\.?\s+(\d{1,2})\b', re.I)
+_DATE_ZH = re.compile(r'(\d{1,2})\s*月\s*(\d{1,2})\s*[日号]')
+_TOMORROW = re.compile(r'tomorrow|明天|明日', re.I)
+
+
+def parse_reset_time(text: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    从文本中解析上限重置时间
+
+    Args:
+        text: 上限提示、错误信息或页面文本
+        now: 当前时间（默认 datetime.now()）
+
+    Returns:
+        重置时间（本地时间）；无法识别时返回 None
+    """
+    if not text:
+        return None
+    now = now or datetime.now()
+    for parser in (_parse_timestamp, _parse_relative, _parse_clock):
+        result = parser(text, now)
+        if result is not None and now < result <= now + MAX_HORIZON:
+            return result
+    return None
+
+
+def _parse_timestamp(text: str, now: datetime) -> Optional[datetime]:
+    match = _EPOCH_RE.search(text)
+    if match:
+        return datetime.fromtimestamp(int(match.group(1)))
+    match = _ISO_RE.search(text)
+    if match:
+        value = match.group(1).replace(' ', 'T')
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+    return None
+
+
+def _duration_seconds(fragment: str) -> float:
+    total = 0.0
+    for amount, unit in re.findall(_DURATION_PART, fragment, re.I):
+        for pattern, seconds in _DURATION_UNITS:
+            if pattern.match(unit):
+                total += float(amount) * seconds
+                break
+    return total
+
+
+def _parse_relative(text: str, now: datetime) -> Optional[datetime]:
+    for pattern in (_RELATIVE_EN, _RELATIVE_ZH):
+        match = pattern.search(text)
+        if match:
+            seconds = _duration_seconds(match.group(1))
+            if seconds > 0:
+                return now + timedelta(seconds=seconds)
+    return None
+
+
+def _parse_date(text: str, now: datetime) -> Optional[datetime]:
+    match = _DATE_EN.search(text)
+    if match:
+        month, day = _MONTHS.index(match.group(1)[:3].lower()) + 1, int(match.group(2))
+    else:
+        match = _DATE_ZH.search(text)
+        if not match:
+            return None
+        month, day = int(match.group(1)), int(match.group(2))
+    try:
+        date = now.replace(month=month, day=day, hour=0, minute=0, second=0, microsecond=0)
+    except ValueError:
+        return None
+    if date.date() < now.date():
+        date = date.replace(year=now.year + 1)
+    return date
+
+
+def _parse_clock(text: str, now: datetime) -> Optional[datetime]:
+    for match in _TIME_RE.finditer(text):
+        period, sep, ampm = match.group('period'), match.group('sep'), match.group('ampm')
+        if not (sep or ampm):
+            continue  # 单独的数字不是时间
+        before = text[max(0, match.start() - 40):match.start()]
+        after = text[match.end():match.end() + 10]
+        if not (_CONTEXT_BEFORE.search(before) or _CONTEXT_AFTER.search(after)):
+            continue
+
+        hour, minute = int(match.group('hour')), int(match.group('minute') or 0)
+        if ampm:
+            hour = hour % 12 + (12 if ampm.lower() == 'p' else 0)
+        elif period in ('下午', '晚上') and hour < 12:
+            hour += 12
+        elif period == '中午' and hour < 11:
+            hour += 12
+        elif period == '凌晨' and hour == 12:
+            hour = 0
+        if hour > 23 or minute > 59:
+            continue
+
+        date = _parse_date(text, now)
+        base = date or now
+        result = base.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if date is None:
+            if _TOMORROW.search(text):
+                result += timedelta(days=1)
+            elif result <= now:
+                result += timedelta(days=1)
+        return result
+    return None
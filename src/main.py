@@ -14,6 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.pdf_converter import convert_pdf_to_images
 from src.chatgpt_automation import ChatGPTAutomation
+from src.base_automation import LoginRequiredError
 import config
 
 
@@ -262,12 +263,13 @@ async def process_single_pdf(bot: ChatGPTAutomation, pdf_path: str, prompt: str,
     return True
 
 
-async def analyze_pdfs(pdf_files: List[str]) -> None:
+async def analyze_pdfs(pdf_files: List[str], headless: bool = False) -> None:
     """
     批量分析 PDF 文件
     
     Args:
         pdf_files: PDF 文件路径列表
+        headless: 无头模式（复用已保存的登录状态，跳过交互步骤，使用默认提示词）
     """
     total_pdfs = len(pdf_files)
     
@@ -282,10 +284,14 @@ async def analyze_pdfs(pdf_files: List[str]) -> None:
     bot = ChatGPTAutomation()
     
     try:
-        await bot.start_browser()
+        await bot.start_browser(headless=headless)
         
-        # 等待用户完成登录和设置
-        prompt = await wait_for_user_ready(bot)
+        if headless:
+            prompt = config.PROMPT_TEXT
+            print(f"无头模式，使用默认提示词: {prompt}")
+        else:
+            # 等待用户完成登录和设置
+            prompt = await wait_for_user_ready(bot)
         
         print("\n" + "="*60)
         print("开始批量处理")
@@ -318,6 +324,9 @@ async def analyze_pdfs(pdf_files: List[str]) -> None:
             for f in failed_files:
                 print(f"  - {f}")
         
+        if headless:
+            return
+        
         # 保持浏览器打开以便查看结果
         print("\n浏览器将保持打开，你可以查看和复制结果")
         print("按 Ctrl+C 或关闭窗口退出程序")
@@ -330,6 +339,9 @@ async def analyze_pdfs(pdf_files: List[str]) -> None:
     
     except KeyboardInterrupt:
         print("\n用户中断操作")
+    except LoginRequiredError as e:
+        print(f"\n错误: {e}")
+        sys.exit(2)
     except Exception as e:
         print(f"\n错误: {e}")
         import traceback
@@ -345,10 +357,18 @@ def main():
     print("="*60)
     
     # 检查命令行参数
-    if len(sys.argv) > 1:
+    args = sys.argv[1:]
+    headless = config.HEADLESS or '--headless' in args
+    args = [arg for arg in args if arg != '--headless']
+    
+    if headless and not args:
+        print("错误: 无头模式需要在命令行中提供 PDF 文件")
+        sys.exit(1)
+    
+    if len(args) > 0:
         # 命令行提供了文件
         pdf_files = []
-        for arg in sys.argv[1:]:
+        for arg in args:
             path = Path(arg.strip('"').strip("'"))
             if path.exists() and path.suffix.lower() == '.pdf':
                 pdf_files.append(str(path))
@@ -358,12 +378,13 @@ def main():
         
         if not pdf_files:
             print("错误: 没有有效的 PDF 文件")
-            input("按 Enter 退出...")
+            if not headless:
+                input("按 Enter 退出...")
             sys.exit(1)
         
         # 询问是否需要调整顺序
         print(f"\n已添加 {len(pdf_files)} 个文件")
-        choice = input("是否需要调整顺序或添加更多文件? (y/N): ").strip().lower()
+        choice = 'n' if headless else input("是否需要调整顺序或添加更多文件? (y/N): ").strip().lower()
         
         if choice == 'y':
             # 进入交互式管理
@@ -379,7 +400,7 @@ def main():
         input("按 Enter 退出...")
         sys.exit(1)
     
-    asyncio.run(analyze_pdfs(pdf_files))
+    asyncio.run(analyze_pdfs(pdf_files, headless=headless))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+"""
+网络层回复完成检测模块
+
+监听页面的网络请求，识别平台的流式回复接口（SSE / 分块响应），
+在流式响应结束时立即给出完成信号，替代基于 DOM 的启发式判断
+"""
+import asyncio
+import re
+from typing import Optional
+
+
+class ResponseStreamMonitor:
+    """流式回复接口监听器"""
+
+    def __init__(self, url_patterns: list, name: str = ""):
+        """
+        Args:
+            url_patterns: 流式接口 URL 的正则表达式列表
+            name: 平台名称（用于日志）
+        """
+        self.name = name
+        self._patterns = [re.compile(p, re.IGNORECASE) for p in url_patterns]
+        self._page = None
+        self._armed = False
+        self._in_flight = set()
+        self._started = asyncio.Event()
+        self._finished = asyncio.Event()
+        self.last_failure: Optional[str] = None
+
+    @property
+    def armed(self) -> bool:
+        return self._armed
+
+    def attach(self, page) -> None:
+        """在页面上注册网络事件监听"""
+        self.detach()
+        self._page = page
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_request_finished)
+        page.on("requestfailed", self._on_request_failed)
+
+    def detach(self) -> None:
+        """移除网络事件监听"""
+        if self._page is None:
+            return
+        for event, handler in (
+            ("request", self._on_request),
+            ("requestfinished", self._on_request_finished),
+            ("requestfailed", self._on_request_failed),
+        ):
+            try:
+                self._page.remove_listener(event, handler)
+            except:
+                pass
+        self._page = None
+
+    def arm(self) -> None:
+        """发送消息前调用：开始跟踪下一次流式回复"""
+        self._in_flight.clear()
+        self._started = asyncio.Event()
+        self._finished = asyncio.Event()
+        self.last_failure = None
+        self._armed = True
+
+    def disarm(self) -> None:
+        self._armed = False
+
+    def matches(self, url: str) -> bool:
+        return any(p.search(url) for p in self._patterns)
+
+    def _is_stream_request(self, request) -> bool:
+        try:
+            return request.method == "POST" and self.matches(request.url)
+        except:
+            return False
+
+    def _on_request(self, request) -> None:
+        if not self._armed or not self._is_stream_request(request):
+            return
+        self._in_flight.add(request)
+        self._started.set()
+        self._finished.clear()
+
+    def _on_request_finished(self, request) -> None:
+        if request not in self._in_flight:
+            return
+        self._in_flight.discard(request)
+        if not self._in_flight:
+            self._finished.set()
+
+    def _on_request_failed(self, request) -> None:
+        if request not in self._in_flight:
+            return
+        try:
+            self.last_failure = request.failure
+        except:
+            self.last_failure = "unknown"
+        print(f"[{self.name}] 流式请求失败: {self.last_failure}")
+        self._on_request_finished(request)
+
+    async def wait_started(self, timeout: float) -> bool:
+        """等待流式请求开始，返回是否在超时前开始"""
+        try:
+            await asyncio.wait_for(self._started.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_finished(self, timeout: float) -> bool:
+        """等待所有进行中的流式请求结束，返回是否在超时前结束"""
+        try:
+            await asyncio.wait_for(self._finished.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if self._finished.is_set():
+                self._armed = False
@@ -0,0 +1,395 @@
+"""
+页面端辅助运行时
+
+通过 context.add_init_script 为每个平台注入一次 window.__pdfai，
+把原先需要多次 IPC 往返的 DOM 探测（逐个选择器 count()、逐个元素
+is_visible()/text_content()、page.content() 等）合并为单次 evaluate
+"""
+import json
+
+RUNTIME_VERSION = 8
+
+# __PDFAI_CONFIG__ 会被替换为平台选择器等配置（JSON）
+_RUNTIME_TEMPLATE = '''
+(() => {
+    const CONFIG = __PDFAI_CONFIG__;
+    // 多个平台共用一个浏览器上下文时，只在本平台的域名下生效
+    if (CONFIG.host && location.hostname !== CONFIG.host &&
+        !location.hostname.endsWith('.' + CONFIG.host)) return;
+    if (window.__pdfai && window.__pdfai.version === CONFIG.version) return;
+
+    const S = CONFIG.selectors || {};
+    const MAX_ERRORS = 20;
+
+    // 返回 null 表示不是合法的 CSS 选择器（如 Playwright 的 :has-text）
+    const query = (sel) => {
+        try { return document.querySelectorAll(sel); } catch (e) { return null; }
+    };
+    const visible = (el) => !!el && el.isConnected && el.getClientRects().length > 0;
+    const enabled = (el) => !!el && !el.disabled && el.getAttribute('aria-disabled') !== 'true';
+
+    // 第一个有匹配元素的选择器（与 locator(sel).first 的语义一致）
+    const firstOf = (selectors, needVisible) => {
+        const unsupported = [];
+        for (const sel of selectors || []) {
+            const els = query(sel);
+            if (els === null) { unsupported.push(sel); continue; }
+            for (const el of els) {
+                if (!needVisible || visible(el)) return { selector: sel, element: el, unsupported };
+            }
+        }
+        return { selector: null, element: null, unsupported };
+    };
+    // 第一个有匹配元素的选择器对应的全部元素
+    const allOf = (selectors) => {
+        for (const sel of selectors || []) {
+            const els = query(sel);
+            if (els && els.length > 0) return { selector: sel, elements: els };
+        }
+        return { selector: null, elements: [] };
+    };
+    const anyVisible = (selectors) => {
+        for (const sel of selectors || []) {
+            const els = query(sel);
+            if (!els) continue;
+            for (const el of els) if (visible(el)) return true;
+        }
+        return false;
+    };
+    const lastResponse = () => {
+        const found = allOf(S.response_container);
+        const els = found.elements;
+        return { selector: found.selector, count: els.length, last: els.length > 0 ? els[els.length - 1] : null };
+    };
+    const insideAny = (el, selectors) => {
+        for (const sel of selectors || []) {
+            try { if (el.closest(sel)) return true; } catch (e) { /* 非 CSS 选择器 */ }
+        }
+        return false;
+    };
+    const insideResponse = (el) => insideAny(el, S.response_container);
+    // 输入框中的附件数：所有附件选择器匹配元素的并集（嵌套的只算最外层，回复中的不算）
+    // 不随“第一个有匹配的选择器”变化，发送前的基线与之后的计数口径一致
+    const countAttachments = () => {
+        const found = new Set();
+        for (const sel of S.attachment || []) {
+            const els = query(sel);
+            if (els) for (const el of els) if (!insideResponse(el)) found.add(el);
+        }
+        let count = 0;
+        for (const el of found) {
+            let nested = false;
+            for (let p = el.parentElement; p && !nested; p = p.parentElement) nested = found.has(p);
+            if (!nested) count++;
+        }
+        return count;
+    };
+
+    // 发送前记录的轮次基线：回复数与最后一条回复的节点，以及已有的错误元素和重试按钮
+    const turn = { count: 0, last: null, errors: new Set(), retries: new Set(), stop: null };
+    // 本轮的新回复节点：回复数增加或最后一条回复换成了新节点；尚未出现时为 null
+    const currentTurn = () => {
+        const resp = lastResponse();
+        if (!resp.last) return null;
+        return resp.count > turn.count || resp.last !== turn.last ? resp.last : null;
+    };
+    // 只包含本轮回复的最大祖先（再往上就会包含其它回复或输入框），即本轮的操作区域
+    const turnRegion = (node) => {
+        const all = allOf(S.response_container).elements;
+        const composer = firstOf(S.input_box, false).element;
+        const other = (p) => {
+            if (composer && p.contains(composer)) return true;
+            for (const el of all) if (el !== node && !node.contains(el) && p.contains(el)) return true;
+            return false;
+        };
+        let region = node;
+        while (region.parentElement && region.parentElement !== document.body && !other(region.parentElement)) {
+            region = region.parentElement;
+        }
+        return region;
+    };
+    // 元素是否属于本轮：第一个包含回复的祖先包含本轮回复（不在任何回复区域内的也算）
+    const belongsToTurn = (el, node) => {
+        const all = allOf(S.response_container).elements;
+        for (let p = el; p && p !== document.body; p = p.parentElement) {
+            for (const r of all) if (p.contains(r)) return p.contains(node);
+        }
+        return true;
+    };
+    const errorState = (opts) => {
+        const url = location.href.toLowerCase();
+        if ((opts.loginUrls || []).some((k) => url.includes(k.toLowerCase())) || anyVisible(opts.loggedOut)) {
+            return { kind: 'login', text: location.href };
+        }
+        for (const sel of S.error_state || []) {
+            const els = query(sel);
+            if (!els) continue;
+            for (const el of els) {
+                if (visible(el) && !turn.errors.has(el)) {
+                    return { kind: 'error', text: (el.textContent || '').trim().slice(0, 300) };
+                }
+            }
+        }
+        // 新出现的重试按钮只在本轮还没有回复内容时才表示出错（之前各轮的操作按钮不算）
+        const node = currentTurn();
+        if (!node || !(node.textContent || '').trim()) {
+            for (const sel of S.retry_button || []) {
+                const els = query(sel);
+                if (!els) continue;
+                for (const el of els) if (visible(el) && !turn.retries.has(el)) return { kind: 'retry', text: '' };
+            }
+        }
+        return null;
+    };
+    // 新增节点中的已知错误文本：只看错误提示 / 错误横幅内，或本轮区域中位于回复之后的节点
+    // （回复正文、侧边栏的对话标题、回显的用户提问都不算）
+    const errorText = (nodes, patterns) => {
+        const current = currentTurn();
+        const region = current ? turnRegion(current) : null;
+        for (const node of nodes) {
+            const el = node.nodeType === 1 ? node : node.parentElement;
+            if (!el || !el.isConnected) continue;
+            const text = (node.textContent || '').trim();
+            if (!text || text.length > 300) continue;
+            const lower = text.toLowerCase();
+            if (!patterns.some((p) => lower.includes(p)) || !visible(el)) continue;
+            if (insideAny(el, S.error_toast) || insideAny(el, S.error_state)) return text;
+            if (region && region.contains(el) && !insideResponse(el) &&
+                (current.compareDocumentPosition(el) & Node.DOCUMENT_POSITION_FOLLOWING)) return text;
+        }
+        return null;
+    };
+
+    window.__pdfai = {
+        version: CONFIG.version,
+
+        resolve(opts) {
+            const r = firstOf(opts.selectors, !!opts.visible);
+            const count = r.selector ? (query(r.selector) || []).length : 0;
+            return { selector: r.selector, unsupported: r.unsupported, count };
+        },
+
+        lastText() {
+            const r = lastResponse();
+            return r.last ? (r.last.textContent || '') : '';
+        },
+
+        assistantCount() {
+            return lastResponse().count;
+        },
+
+        // 本轮新回复的文本（尚未出现时为空，不会读到上一轮的回复）
+        turnText() {
+            const node = currentTurn();
+            return node ? (node.textContent || '') : '';
+        },
+
+        turnStarted() {
+            return !!currentTurn();
+        },
+
+        state(opts) {
+            opts = opts || {};
+            const composer = firstOf(S.input_box, false);
+            const send = firstOf(S.send_button, true);
+            const stop = firstOf(S.stop_button, true);
+            const resp = lastResponse();
+            const node = currentTurn();
+
+            const errors = [];
+            for (const sel of S.error_toast || []) {
+                const els = query(sel);
+                if (!els) continue;
+                for (const el of els) {
+                    if (errors.length >= MAX_ERRORS) break;
+                    if (!visible(el)) continue;
+                    const text = (el.textContent || '').trim().slice(0, 500);
+                    if (text && !errors.includes(text)) errors.push(text);
+                }
+            }
+
+            let textMatches = [];
+            if (opts.scanText && opts.scanText.length && document.body) {
+                const body = (document.body.textContent || '').toLowerCase();
+                textMatches = opts.scanText.filter((t) => body.includes(t.toLowerCase()));
+            }
+
+            return {
+                composer: !!composer.element,
+                composerSelector: composer.selector,
+                sendButton: !!send.element,
+                sendEnabled: enabled(send.element),
+                stopButton: !!stop.element,
+                assistantCount: resp.count,
+                responseSelector: resp.selector,
+                lastLength: resp.last ? (resp.last.textContent || '').length : 0,
+                turnStarted: !!node,
+                turnLength: node ? (node.textContent || '').trim().length : 0,
+                errors,
+                attachments: countAttachments(),
+                uploading: anyVisible(S.attachment_loading),
+                textMatches,
+            };
+        },
+
+        // 发送前调用：记录轮次基线（regenerate 时最后一条回复会被重新生成，视为本轮）
+        markTurn(opts) {
+            const snapshot = (selectors) => {
+                const found = new Set();
+                for (const sel of selectors || []) {
+                    const els = query(sel);
+                    if (els) for (const el of els) found.add(el);
+                }
+                return found;
+            };
+            const resp = lastResponse();
+            const regenerate = !!(opts && opts.regenerate);
+            turn.count = regenerate ? Math.max(0, resp.count - 1) : resp.count;
+            turn.last = regenerate ? null : resp.last;
+            turn.errors = snapshot(S.error_state);
+            turn.retries = snapshot(S.retry_button);
+            return resp.count;
+        },
+
+        // 等待本轮出现错误状态：页面变化时检查（合并 100ms 内的变化），另每秒兜底检查一次
+        // 返回 { kind: 'error' | 'retry' | 'login', text }；超时或 stopWatching() 时返回 null
+        watchErrors(opts) {
+            opts = opts || {};
+            const patterns = (opts.texts || []).map((t) => t.toLowerCase());
+            if (turn.stop) turn.stop(null);
+            return new Promise((resolve) => {
+                let added = [];
+                let pending = null;
+                let observer = null;
+                let poll = null;
+                let timer = null;
+                const finish = (result) => {
+                    if (turn.stop !== finish) return;
+                    turn.stop = null;
+                    if (observer) observer.disconnect();
+                    clearInterval(poll);
+                    clearTimeout(timer);
+                    clearTimeout(pending);
+                    resolve(result);
+                };
+                const check = () => {
+                    const nodes = added;
+                    added = [];
+                    let state = errorState(opts);
+                    if (!state && patterns.length) {
+                        const text = errorText(nodes, patterns);
+                        if (text) state = { kind: 'error', text };
+                    }
+                    if (state) finish(state);
+                };
+                turn.stop = finish;
+                check();
+                if (turn.stop !== finish) return;
+
+                observer = new MutationObserver((mutations) => {
+                    for (const m of mutations) for (const node of m.addedNodes) added.push(node);
+                    if (pending !== null) return;
+                    pending = setTimeout(() => { pending = null; check(); }, 100);
+                });
+                observer.observe(document.body, { childList: true, subtree: true });
+                poll = setInterval(check, 1000);
+                timer = setTimeout(() => finish(null), opts.timeout || 120000);
+            });
+        },
+
+        // 本轮回复对应的重试 / 重新生成按钮：优先本轮新出现的重试按钮，重新生成按钮只在本轮区域内查找
+        // 找到后给按钮加上 data-pdfai-target="control"（本轮回复为 "turn"）供 Playwright 点击，返回按钮类型
+        turnControl() {
+            for (const el of document.querySelectorAll('[data-pdfai-target]')) el.removeAttribute('data-pdfai-target');
+            const node = currentTurn();
+            if (!node) return null;
+            node.setAttribute('data-pdfai-target', 'turn');
+            const pick = (el, kind) => {
+                el.setAttribute('data-pdfai-target', 'control');
+                return kind;
+            };
+            for (const sel of S.retry_button || []) {
+                const els = query(sel);
+                if (!els) continue;
+                for (const el of els) {
+                    if (visible(el) && !turn.retries.has(el) && belongsToTurn(el, node)) return pick(el, 'retry');
+                }
+            }
+            const region = turnRegion(node);
+            for (const sel of S.regenerate_button || []) {
+                let els;
+                try { els = region.querySelectorAll(sel); } catch (e) { continue; }
+                for (const el of els) if (visible(el)) return pick(el, 'regenerate');
+            }
+            return null;
+        },
+
+        stopWatching() {
+            if (turn.stop) turn.stop(null);
+            return true;
+        },
+
+        // 附件就绪：数量达到 expected、没有加载指示器（requireSend 时发送按钮可用）
+        // 用 MutationObserver 在页面变化时检查，条件满足立即 resolve，不轮询
+        waitReady(opts) {
+            opts = opts || {};
+            const expected = opts.expected || 0;
+            const timeout = opts.timeout || 30000;
+            const isReady = () => {
+                if (countAttachments() < expected) return false;
+                if (anyVisible(S.attachment_loading)) return false;
+                if (opts.requireSend) {
+                    const send = firstOf(S.send_button, true).element;
+                    if (send && !enabled(send)) return false;
+                }
+                return true;
+            };
+
+            return new Promise((resolve) => {
+                const start = performance.now();
+                let done = false;
+                let pending = null;
+                let observer = null;
+                let timer = null;
+                const finish = (ready) => {
+                    if (done) return;
+                    done = true;
+                    if (observer) observer.disconnect();
+                    clearTimeout(timer);
+                    clearTimeout(pending);
+                    resolve({ ready, attachments: countAttachments(), elapsed: Math.round(performance.now() - start) });
+                };
+                if (isReady()) return finish(true);
+
+                observer = new MutationObserver(() => {
+                    // 合并同一批变化，50ms 内只检查一次
+                    if (pending !== null) return;
+                    pending = setTimeout(() => {
+                        pending = null;
+                        if (isReady()) finish(true);
+                    }, 50);
+                });
+                observer.observe(document.body, {
+                    childList: true, subtree: true, attributes: true,
+                    attributeFilter: ['class', 'style', 'src', 'disabled', 'aria-disabled', 'hidden'],
+                });
+                timer = setTimeout(() => finish(isReady()), timeout);
+            });
+        },
+    };
+})();
+'''
+
+
+def build_runtime_script(selectors: dict, host: str = None) -> str:
+    """
+    生成平台专属的运行时脚本
+
+    Args:
+        selectors: 平台 SELECTORS 字典（input_box / send_button / stop_button /
+                   response_container / error_toast / error_state / retry_button /
+                   regenerate_button / attachment / attachment_loading）
+        host: 只在该域名（及其子域名）下注入；为空时对所有页面生效
+    """
+    runtime_config = {'version': RUNTIME_VERSION, 'selectors': selectors, 'host': host or ""}
+    return _RUNTIME_TEMPLATE.replace('__PDFAI_CONFIG__', json.dumps(runtime_config, ensure_ascii=False))
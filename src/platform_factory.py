@@ -10,6 +10,7 @@ from typing import Dict, Type
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.base_automation import BaseAIAutomation
+import config
 
 
 # 平台配置
@@ -38,6 +39,12 @@ AI_PLATFORMS = {
         "module": "src.claude_automation",
         "class": "ClaudeAutomation",
     },
+    "api": {
+        "name": "OpenAI Compatible API",
+        "url": config.API_BASE_URL,
+        "module": "src.api_automation",
+        "class": "APIAutomation",
+    },
 }
 
 DEFAULT_PLATFORM = "chatgpt"
@@ -53,7 +60,7 @@ def get_automation(platform_id: str) -> BaseAIAutomation:
     根据平台 ID 获取对应的自动化实例
     
     Args:
-        platform_id: 平台标识符 (chatgpt, gemini, deepseek, claude)
+        platform_id: 平台标识符 (chatgpt, gemini, deepseek, claude, api)
     
     Returns:
         对应平台的自动化实例
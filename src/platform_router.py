@@ -0,0 +1,126 @@
+"""
+平台失败转移模块
+
+一个任务按优先级使用多个平台：当前平台触发上限时，剩余批次转到下一个可用平台，
+原平台的重置时间一到再切回。备用平台在首次需要时才在宿主的浏览器中打开新标签页
+（共用同一份登录数据），未登录的平台在本次运行中不再尝试
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.base_automation import BaseAIAutomation, LoginRequiredError
+from src.platform_factory import get_automation
+
+
+class PlatformRouter:
+    """按优先级在多个平台之间分配批次"""
+
+    def __init__(self, host_id: str, host: BaseAIAutomation, platform_ids: list):
+        """
+        Args:
+            host_id: 已启动浏览器的平台 ID（优先级最高）
+            host: 该平台的自动化实例
+            platform_ids: 备用平台 ID，按优先级排列（重复或等于 host_id 的会被忽略）
+        """
+        self.order = [host_id] + [pid for pid in dict.fromkeys(platform_ids) if pid != host_id]
+        self.host = host
+        self.bots: dict = {host_id: host}
+        self.limited_until: dict = {}  # 平台 ID -> 上限解除时间
+        self.unavailable: set = set()   # 未登录或打开失败的平台
+
+    def platform_id(self, bot: BaseAIAutomation) -> Optional[str]:
+        for pid, candidate in self.bots.items():
+            if candidate is bot:
+                return pid
+        return None
+
+    def is_limited(self, platform_id: str, now: Optional[datetime] = None) -> bool:
+        until = self.limited_until.get(platform_id)
+        return until is not None and (now or datetime.now()) < until
+
+    def mark_limited(self, bot: BaseAIAutomation, reset_at: Optional[datetime],
+                     cooldown_minutes: float) -> None:
+        """
+        记录平台触发上限
+
+        Args:
+            bot: 触发上限的平台实例
+            reset_at: 平台给出的重置时间；未知时按 cooldown_minutes 估计
+            cooldown_minutes: 无法获知重置时间时的冷却时长（分钟）
+        """
+        platform_id = self.platform_id(bot)
+        if platform_id is None:
+            return
+        self.limited_until[platform_id] = reset_at or datetime.now() + timedelta(minutes=cooldown_minutes)
+        print(f"[{bot.PLATFORM_NAME}] 上限解除前暂停使用，预计 "
+              f"{self.limited_until[platform_id]:%H:%M} 恢复")
+
+    def earliest_reset(self) -> Optional[datetime]:
+        """所有可用平台中最早解除上限的时间（全部受限时用于决定暂停多久）"""
+        candidates = [until for pid, until in self.limited_until.items() if pid not in self.unavailable]
+        return min(candidates) if candidates else None
+
+    async def select(self) -> Optional[BaseAIAutomation]:
+        """
+        返回当前应使用的平台：优先级最高、未处于上限且已登录的平台
+
+        Returns:
+            平台实例；所有平台都不可用时返回 None
+        """
+        now = datetime.now()
+        for platform_id in self.order:
+            if platform_id in self.unavailable or self.is_limited(platform_id, now):
+                continue
+            self.limited_until.pop(platform_id, None)
+            bot = self.bots.get(platform_id)
+            if bot is not None:
+                return bot
+            bot = get_automation(platform_id)
+            bot.on_stream_delta = self.host.on_stream_delta
+            try:
+                await bot.attach_to(self.host)
+            except LoginRequiredError as e:
+                print(f"[{bot.PLATFORM_NAME}] {e}")
+                self.unavailable.add(platform_id)
+                continue
+            except Exception as e:
+                print(f"[{bot.PLATFORM_NAME}] 打开备用平台失败: {e}")
+                self.unavailable.add(platform_id)
+                try:
+                    await bot.close()
+                except Exception:
+                    pass
+                continue
+            self.bots[platform_id] = bot
+            return bot
+        return None
+
+    def hedge_partner(self, bot: BaseAIAutomation) -> Optional[BaseAIAutomation]:
+        """
+        对冲请求的备选实例：已打开、未处于上限且没有预先上传批次的其他平台（按优先级）
+
+        Returns:
+            平台实例；没有合适的平台时返回 None（对冲在同平台的另一个标签页进行）
+        """
+        now = datetime.now()
+        for platform_id in self.order:
+            partner = self.bots.get(platform_id)
+            if (partner is None or partner is bot or platform_id in self.unavailable
+                    or self.is_limited(platform_id, now) or partner.staged_images is not None):
+                continue
+            return partner
+        return None
+
+    async def close(self) -> None:
+        """关闭备用平台（宿主平台由调用方负责）"""
+        for platform_id, bot in list(self.bots.items()):
+            if bot is not self.host:
+                try:
+                    await bot.close()
+                except Exception as e:
+                    print(f"[{bot.PLATFORM_NAME}] 关闭备用平台失败: {e}")
+                del self.bots[platform_id]
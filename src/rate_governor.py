@@ -0,0 +1,156 @@
+"""
+自适应发送节奏模块
+
+按平台（账号）学习可持续的发送速率，代替固定的批次间隔：
+- 令牌桶：两次发送开始之间至少间隔 interval 秒
+- 加性提速 / 乘性退避（AIMD）：每次成功缩短间隔，触发上限时间隔成倍放大
+- 窗口上限：记录触发上限时统计窗口（默认 1 小时）内已发送的条数，
+  之后把发送均匀分布在窗口内，在到达硬性上限之前平滑降速；长时间未触发上限时逐步放宽
+
+状态跨运行持久化（与选择器缓存、上传统计放在同一目录）
+"""
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class RateGovernor:
+    """单个平台（账号）的自适应发送节奏"""
+
+    def __init__(self, path: Path, name: str = "", initial_interval: float = 0,
+                 min_interval: float = 0, max_interval: float = 600,
+                 speedup_step: float = 1.0, backoff_factor: float = 2.0,
+                 window: float = 3600, safety: float = 0.9):
+        """
+        Args:
+            path: 状态文件路径（JSON）
+            name: 平台名称（用于日志）
+            initial_interval: 没有历史状态时的发送间隔（秒）
+            min_interval / max_interval: 发送间隔的上下限（秒）
+            speedup_step: 每次成功后间隔缩短的秒数
+            backoff_factor: 触发上限后间隔放大的倍数
+            window: 统计发送条数的窗口（秒）
+            safety: 按窗口上限的多少比例发送（留出余量）
+        """
+        self.name = name
+        self.path = Path(path)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speedup_step = speedup_step
+        self.backoff_factor = backoff_factor
+        self.window = window
+        self.safety = safety
+
+        self.interval = initial_interval
+        self.window_limit: Optional[int] = None  # 触发上限时窗口内的发送条数
+        self.last_limit_at: Optional[float] = None
+        self.last_relax_at: Optional[float] = None  # 上次放宽窗口上限的时间
+        self._sends: list = []  # 窗口内的发送时间（time.time()）
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[{self.name}] 读取发送节奏失败，将重新学习: {e}")
+            return
+        self.interval = float(data.get('interval', self.interval))
+        self.window_limit = data.get('window_limit')
+        self.last_limit_at = data.get('last_limit_at')
+        self.last_relax_at = data.get('last_relax_at')
+        self._sends = [t for t in data.get('sends', []) if isinstance(t, (int, float))]
+        self._prune()
+
+    def save(self) -> None:
+        """写入状态文件"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'interval': round(self.interval, 2),
+                    'window_limit': self.window_limit,
+                    'last_limit_at': self.last_limit_at,
+                    'last_relax_at': self.last_relax_at,
+                    'sends': self._sends,
+                }, f, indent=2)
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[{self.name}] 保存发送节奏失败: {e}")
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.window
+        self._sends = [t for t in self._sends if t >= cutoff]
+
+    def effective_interval(self) -> float:
+        """当前生效的发送间隔：AIMD 间隔与窗口上限折算间隔中的较大者"""
+        interval = self.interval
+        if self.window_limit:
+            allowed = max(1.0, self.window_limit * self.safety)
+            interval = max(interval, self.window / allowed)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def delay(self) -> float:
+        """距离允许下一次发送还需等待的秒数"""
+        if not self._sends:
+            return 0.0
+        return max(0.0, self._sends[-1] + self.effective_interval() - time.time())
+
+    async def acquire(self) -> float:
+        """
+        等待到允许发送时再返回，并记录本次发送
+
+        Returns:
+            实际等待的秒数
+        """
+        wait = self.delay()
+        if wait > 0:
+            print(f"[{self.name}] 发送节奏: 等待 {wait:.0f}s ({self.describe()})")
+            await asyncio.sleep(wait)
+        self._sends.append(time.time())
+        self._prune()
+        return wait
+
+    def record_success(self) -> None:
+        """一次回复成功：加性缩短间隔；整个窗口内未触发上限时放宽窗口上限（每个窗口最多放宽一次）"""
+        self.interval = max(self.min_interval, self.interval - self.speedup_step)
+        if self.window_limit and self.last_limit_at:
+            now = time.time()
+            since = max(self.last_limit_at, self.last_relax_at or 0)
+            if now - since >= self.window:
+                self.window_limit += 1
+                self.last_relax_at = now
+        self.save()
+
+    def record_limit(self, upload: bool = False) -> None:
+        """
+        触发平台上限：间隔成倍放大，并以窗口内的发送条数作为新的窗口上限
+
+        Args:
+            upload: 是否为上传限额（只退避间隔，不调整消息条数上限）
+        """
+        self._prune()
+        now = time.time()
+        # 最近实际的平均发送间隔
+        spacing = (now - self._sends[0]) / len(self._sends) if self._sends else self.interval
+        base = max(self.interval, min(spacing, self.max_interval), 1.0)
+        factor = self.backoff_factor if not upload else (1 + self.backoff_factor) / 2
+        self.interval = min(self.max_interval, base * factor)
+        if not upload and self._sends:
+            sent = len(self._sends)
+            self.window_limit = min(self.window_limit, sent) if self.window_limit else sent
+        self.last_limit_at = now
+        print(f"[{self.name}] 触发上限，放慢发送节奏: {self.describe()}")
+        self.save()
+
+    def describe(self) -> str:
+        """节奏摘要"""
+        text = f"间隔 {self.effective_interval():.0f}s"
+        if self.window_limit:
+            text += f", 每 {self.window / 60:.0f} 分钟上限约 {self.window_limit} 条"
+        return text
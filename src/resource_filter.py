@@ -0,0 +1,108 @@
+"""
+资源过滤模块
+
+通过 context.route 中止与聊天无关的请求（统计、遥测、第三方字体、媒体等），
+降低长时间无人值守运行时浏览器的 CPU、内存与带宽开销
+
+同一浏览器上下文中打开多个平台时（备用平台共用宿主的浏览器），路由注册在整个上下文上，
+各平台标签页的请求按该标签页所在站点的平台规则判断
+"""
+import re
+from collections import Counter
+from urllib.parse import urlparse
+
+
+class ResourceFilter:
+    """按 URL 正则拦截请求的资源过滤器"""
+
+    def __init__(self, url_patterns: list, name: str = ""):
+        """
+        Args:
+            url_patterns: 需要拦截的 URL 正则表达式列表
+            name: 平台名称（用于日志）
+        """
+        self.name = name
+        self.url_patterns = list(url_patterns)
+        self._own_pattern = _compile(self.url_patterns)
+        # 其他平台站点的规则: {站点域名: 正则}，这些站点标签页发出的请求按各自平台的规则判断
+        self._site_patterns = {}
+        self._context = None
+        self._route_pattern = None
+        self.blocked_count = 0
+        self.blocked_hosts = Counter()
+
+    async def install(self, context) -> None:
+        """在浏览器上下文上注册拦截路由（对上下文中所有页面生效）"""
+        self._context = context
+        await self._register()
+        if self.url_patterns:
+            print(f"[{self.name}] 已启用资源过滤 ({len(self.url_patterns)} 条规则)")
+
+    async def add_site_rules(self, site_url: str, url_patterns: list, name: str = "") -> None:
+        """
+        为共用上下文中另一个平台的站点使用该平台自己的拦截规则
+
+        Args:
+            site_url: 平台地址，按域名匹配发出请求的标签页
+            url_patterns: 该平台需要拦截的 URL 正则表达式列表
+            name: 平台名称（用于日志）
+        """
+        self._site_patterns[urlparse(site_url).netloc] = _compile(url_patterns)
+        await self._register()
+        print(f"[{self.name}] {name or site_url} 标签页使用该平台的资源过滤规则 ({len(url_patterns)} 条)")
+
+    async def _register(self) -> None:
+        """按当前所有规则的并集（重新）注册路由，只有命中并集的请求才会回调到 Python"""
+        if self._context is None:
+            return
+        if self._route_pattern is not None:
+            await self._context.unroute(self._route_pattern, self._handle)
+            self._route_pattern = None
+        patterns = [p for p in (self._own_pattern, *self._site_patterns.values()) if p is not None]
+        if not patterns:
+            return
+        self._route_pattern = re.compile("|".join(p.pattern for p in patterns), re.IGNORECASE)
+        await self._context.route(self._route_pattern, self._handle)
+
+    def _pattern_for(self, request):
+        """发出请求的标签页所在站点对应的规则（无法确定标签页时使用本平台规则）"""
+        if self._site_patterns:
+            try:
+                site = urlparse(request.frame.page.url).netloc
+            except Exception:
+                site = ""
+            if site in self._site_patterns:
+                return self._site_patterns[site]
+        return self._own_pattern
+
+    async def _handle(self, route) -> None:
+        pattern = self._pattern_for(route.request)
+        if pattern is None or not pattern.search(route.request.url):
+            try:
+                await route.fallback()
+            except:
+                pass
+            return
+        await self._abort(route)
+
+    async def _abort(self, route) -> None:
+        self.blocked_count += 1
+        self.blocked_hosts[urlparse(route.request.url).netloc] += 1
+        try:
+            await route.abort("blockedbyclient")
+        except:
+            pass
+
+    def summary(self, top: int = 5) -> str:
+        """拦截统计摘要"""
+        if not self.blocked_count:
+            return "未拦截任何请求"
+        hosts = ", ".join(f"{host} ×{n}" for host, n in self.blocked_hosts.most_common(top))
+        return f"共拦截 {self.blocked_count} 个请求 ({hosts})"
+
+
+def _compile(url_patterns: list):
+    """把多条规则合并为一个正则，没有规则时返回 None"""
+    if not url_patterns:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in url_patterns), re.IGNORECASE)
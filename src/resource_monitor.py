@@ -0,0 +1,224 @@
+"""
+浏览器资源监测模块
+
+定期采集受控浏览器（按 --user-data-dir 识别）的浏览器进程、渲染进程及其他子进程的
+CPU / 内存占用，以及每个标签页的 CDP 性能指标（JS 堆、DOM 节点），
+推送到界面并逐行写入运行指标文件（JSONL），便于发现泄漏、对照变慢时的浏览器状态
+
+进程信息依赖可选的 psutil，未安装时只采集 CDP 指标
+"""
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class BrowserResourceMonitor:
+    """受控浏览器的资源占用采样器"""
+
+    def __init__(self, user_data_dir: Path, name: str = "", interval: float = 10.0,
+                 metrics_path: Optional[Path] = None):
+        """
+        Args:
+            user_data_dir: 浏览器用户数据目录（用于在进程列表中识别受控浏览器）
+            name: 平台名称（用于日志与指标记录）
+            interval: 采样间隔（秒）
+            metrics_path: 运行指标文件路径（JSONL），为空则不写文件
+        """
+        self.name = name
+        self.user_data_dir = str(Path(user_data_dir).resolve())
+        self.interval = interval
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        # 每次采样后的回调，参数为采样结果
+        self.on_sample: Optional[Callable[[dict], None]] = None
+        self.last_sample: dict = {}
+        self._context = None
+        self._task: Optional[asyncio.Task] = None
+        self._root: Optional["psutil.Process"] = None
+        self._procs: dict = {}  # pid -> psutil.Process（保留以获得连续的 CPU 占用）
+        self._sessions: dict = {}  # page -> CDP 会话
+
+    def start(self, context) -> None:
+        """开始周期采样"""
+        self._context = context
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        if psutil is None:
+            print(f"[{self.name}] 未安装 psutil，资源监测只采集页面指标")
+
+    async def stop(self) -> None:
+        """停止采样并释放 CDP 会话"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+        for session in self._sessions.values():
+            try:
+                await session.detach()
+            except:
+                pass
+        self._sessions.clear()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sample = await self.sample()
+                self.last_sample = sample
+                self._write(sample)
+                if self.on_sample:
+                    self.on_sample(sample)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[{self.name}] 资源采样失败: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def sample(self) -> dict:
+        """采集一次进程与页面指标"""
+        sample = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'platform': self.name,
+        }
+        sample.update(self._sample_processes())
+        sample['pages'] = await self._sample_pages()
+        return sample
+
+    # ───────────────────────── 进程 ─────────────────────────
+
+    def _find_root(self) -> Optional["psutil.Process"]:
+        """按命令行中的 --user-data-dir 找到浏览器主进程"""
+        if self._root is not None and self._root.is_running():
+            return self._root
+        self._root = None
+        for proc in psutil.process_iter(['cmdline']):
+            try:
+                cmdline = proc.info.get('cmdline') or []
+                if any(arg.startswith('--type=') for arg in cmdline):
+                    continue
+                for arg in cmdline:
+                    if arg.startswith('--user-data-dir=') and \
+                            str(Path(arg.split('=', 1)[1]).resolve()) == self.user_data_dir:
+                        self._root = proc
+                        return proc
+            except (psutil.Error, OSError):
+                continue
+        return None
+
+    def _sample_processes(self) -> dict:
+        if psutil is None:
+            return {}
+        root = self._find_root()
+        if root is None:
+            return {}
+        try:
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return {}
+
+        groups = {
+            'browser': {'cpu': 0.0, 'rss_mb': 0.0, 'count': 0},
+            'renderer': {'cpu': 0.0, 'rss_mb': 0.0, 'count': 0},
+            'other': {'cpu': 0.0, 'rss_mb': 0.0, 'count': 0},
+        }
+        alive = {}
+        for proc in procs:
+            # 复用同一个 Process 对象，cpu_percent 才是两次采样之间的占用
+            proc = self._procs.get(proc.pid, proc)
+            try:
+                cpu = proc.cpu_percent(None)
+                rss = proc.memory_info().rss
+                if proc is root:
+                    group = 'browser'
+                elif '--type=renderer' in proc.cmdline():
+                    group = 'renderer'
+                else:
+                    group = 'other'
+            except psutil.Error:
+                continue
+            alive[proc.pid] = proc
+            groups[group]['cpu'] += cpu
+            groups[group]['rss_mb'] += rss / (1024 * 1024)
+            groups[group]['count'] += 1
+        self._procs = alive
+
+        for values in groups.values():
+            values['cpu'] = round(values['cpu'], 1)
+            values['rss_mb'] = round(values['rss_mb'], 1)
+        return {
+            **groups,
+            'total': {
+                'cpu': round(sum(g['cpu'] for g in groups.values()), 1),
+                'rss_mb': round(sum(g['rss_mb'] for g in groups.values()), 1),
+            },
+        }
+
+    # ───────────────────────── 页面 ─────────────────────────
+
+    async def _sample_pages(self) -> list:
+        if self._context is None:
+            return []
+        pages = [p for p in self._context.pages if not p.is_closed()]
+        # 清理已关闭页面的会话
+        for page in list(self._sessions):
+            if page not in pages:
+                self._sessions.pop(page, None)
+
+        results = []
+        for page in pages:
+            session = self._sessions.get(page)
+            try:
+                if session is None:
+                    session = await self._context.new_cdp_session(page)
+                    await session.send("Performance.enable")
+                    self._sessions[page] = session
+                result = await session.send("Performance.getMetrics")
+            except Exception:
+                self._sessions.pop(page, None)
+                continue
+            raw = {m['name']: m['value'] for m in result.get('metrics', [])}
+            results.append({
+                'url': page.url,
+                'heap_mb': round(raw.get('JSHeapUsedSize', 0) / (1024 * 1024), 1),
+                'nodes': int(raw.get('Nodes', 0)),
+                'listeners': int(raw.get('JSEventListeners', 0)),
+            })
+        return results
+
+    # ───────────────────────── 输出 ─────────────────────────
+
+    def _write(self, sample: dict) -> None:
+        if self.metrics_path is None:
+            return
+        try:
+            self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.metrics_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"[{self.name}] 写入运行指标失败: {e}")
+            self.metrics_path = None
+
+    @staticmethod
+    def format_summary(sample: dict) -> str:
+        """一行摘要（用于界面状态栏，不含需翻译的文字）"""
+        parts = []
+        total = sample.get('total')
+        if total:
+            parts.append(f"CPU {total['cpu']:.0f}%")
+            parts.append(f"RAM {total['rss_mb']:.0f}MB")
+        renderer = sample.get('renderer')
+        if renderer and renderer.get('count'):
+            parts.append(f"Renderer ×{renderer['count']}")
+        pages = sample.get('pages') or []
+        if pages:
+            parts.append(f"JS {sum(p['heap_mb'] for p in pages):.0f}MB")
+            parts.append(f"DOM {sum(p['nodes'] for p in pages)}")
+        return " · ".join(parts)
@@ -0,0 +1,117 @@
+"""
+选择器解析缓存模块
+
+平台的选择器列表按固定顺序逐个尝试，靠前的选择器常常失效。
+本模块记住每个逻辑元素（input_box / send_button 等）上次命中的选择器，
+下次优先尝试它，并跨运行持久化命中统计；只有在记住的选择器失效时才重新解析
+
+匹配到多个元素的后备选择器（如 [class*="preview"]）不会被记住：它命中一次后若排在最前，
+即使靠前的精确选择器恢复可用也不会再被尝试；已记住的后备选择器开始匹配多个元素时清除记录
+"""
+import json
+from pathlib import Path
+from typing import Optional
+
+
+class SelectorCache:
+    """按逻辑元素记录选择器命中情况的缓存"""
+
+    # 累计多少次更新后写盘一次（关闭浏览器时总会写盘）
+    SAVE_EVERY = 20
+
+    def __init__(self, path: Path, name: str = ""):
+        """
+        Args:
+            path: 统计文件路径（JSON）
+            name: 平台名称（用于日志）
+        """
+        self.name = name
+        self.path = Path(path)
+        # key -> {"last": 选择器, "hits": {选择器: 命中次数}, "misses": 失效次数}
+        self._stats: dict = {}
+        self._pending = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._stats = data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[{self.name}] 读取选择器统计失败，将重新统计: {e}")
+
+    def save(self) -> None:
+        """写入统计文件"""
+        if not self._stats:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._stats, f, ensure_ascii=False, indent=2)
+            tmp.replace(self.path)
+            self._pending = 0
+        except Exception as e:
+            print(f"[{self.name}] 保存选择器统计失败: {e}")
+
+    def last(self, key: str) -> Optional[str]:
+        """上次命中的选择器"""
+        entry = self._stats.get(key)
+        return entry.get('last') if entry else None
+
+    def order(self, key: str, selectors: list) -> list:
+        """
+        按命中情况重排选择器：上次命中的排最前，其余按历史命中次数降序，
+        同等情况下保持原有优先级
+        """
+        entry = self._stats.get(key)
+        if not entry:
+            return list(selectors)
+        last = entry.get('last')
+        hits = entry.get('hits', {})
+        ranked = sorted(
+            enumerate(selectors),
+            key=lambda item: (item[1] != last, -hits.get(item[1], 0), item[0]),
+        )
+        return [selector for _, selector in ranked]
+
+    def record_hit(self, key: str, selector: str, ambiguous: bool = False) -> None:
+        """
+        记录一次命中
+
+        Args:
+            key: 逻辑元素名
+            selector: 命中的选择器
+            ambiguous: 命中的是匹配到多个元素的后备选择器（不记住，已记住时清除记录）
+        """
+        if ambiguous:
+            entry = self._stats.get(key)
+            if entry and entry.get('last') == selector:
+                print(f"[{self.name}] 后备选择器匹配到多个元素，恢复 {key} 的默认顺序: {selector}")
+                entry['last'] = None
+                entry.get('hits', {}).pop(selector, None)
+                self._mark_dirty()
+            return
+        entry = self._stats.setdefault(key, {'last': None, 'hits': {}, 'misses': 0})
+        if entry.get('last') not in (None, selector):
+            # 记住的选择器失效，本次重新解析到了其他选择器
+            entry['misses'] = entry.get('misses', 0) + 1
+        entry['last'] = selector
+        entry['hits'][selector] = entry['hits'].get(selector, 0) + 1
+        self._mark_dirty()
+
+    def record_miss(self, key: str) -> None:
+        """所有选择器均未命中（元素可能只是暂时不存在，保留上次命中的记录）"""
+        entry = self._stats.get(key)
+        if not entry:
+            return
+        entry['misses'] = entry.get('misses', 0) + 1
+        self._mark_dirty()
+
+    def _mark_dirty(self) -> None:
+        self._pending += 1
+        if self._pending >= self.SAVE_EVERY:
+            self.save()
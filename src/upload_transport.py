@@ -0,0 +1,98 @@
+"""
+图片上传方式统计模块
+
+记录每个平台各上传方式（file input / 剪贴板 / DataTransfer / 拖放）的成功率与耗时，
+跨运行持久化，按实测耗时决定下次的尝试顺序：
+最快的成功方式优先，其次是尚未尝试的方式，最近连续失败的方式排在最后
+"""
+import json
+from pathlib import Path
+
+
+class UploadTransportStats:
+    """单个平台的上传方式统计"""
+
+    # 耗时的指数移动平均系数
+    ALPHA = 0.3
+    # 连续失败多少次后降到最后尝试
+    DEMOTE_AFTER_FAILURES = 2
+
+    def __init__(self, path: Path, name: str = ""):
+        """
+        Args:
+            path: 统计文件路径（JSON）
+            name: 平台名称（用于日志）
+        """
+        self.name = name
+        self.path = Path(path)
+        # transport -> {"success": n, "failure": n, "streak": 连续失败次数, "avg_ms": 平均耗时}
+        self._stats: dict = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._stats = data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[{self.name}] 读取上传统计失败，将重新统计: {e}")
+
+    def save(self) -> None:
+        """写入统计文件"""
+        if not self._stats:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._stats, f, ensure_ascii=False, indent=2)
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[{self.name}] 保存上传统计失败: {e}")
+
+    def order(self, transports: list) -> list:
+        """按实测结果排列上传方式（transports 为平台默认顺序）"""
+        def rank(item):
+            index, transport = item
+            entry = self._stats.get(transport)
+            if not entry:
+                return (1, 0, index)
+            if entry.get('streak', 0) >= self.DEMOTE_AFTER_FAILURES or not entry.get('success'):
+                return (2, 0, index)
+            return (0, entry.get('avg_ms', 0), index)
+
+        return [transport for _, transport in sorted(enumerate(transports), key=rank)]
+
+    def record(self, transport: str, ok: bool, elapsed: float) -> None:
+        """
+        记录一次上传结果
+
+        Args:
+            transport: 上传方式
+            ok: 是否成功（附件已出现在输入框中）
+            elapsed: 耗时（秒）
+        """
+        entry = self._stats.setdefault(
+            transport, {'success': 0, 'failure': 0, 'streak': 0, 'avg_ms': 0}
+        )
+        if ok:
+            ms = elapsed * 1000
+            entry['avg_ms'] = round(ms if not entry['success'] else
+                                    entry['avg_ms'] * (1 - self.ALPHA) + ms * self.ALPHA)
+            entry['success'] += 1
+            entry['streak'] = 0
+        else:
+            entry['failure'] += 1
+            entry['streak'] = entry.get('streak', 0) + 1
+        self.save()
+
+    def summary(self) -> str:
+        """统计摘要"""
+        parts = []
+        for transport, entry in self._stats.items():
+            parts.append(f"{transport} {entry.get('success', 0)}✓/{entry.get('failure', 0)}✗"
+                         f" ~{entry.get('avg_ms', 0)}ms")
+        return ", ".join(parts) if parts else "暂无统计"
@@ -0,0 +1,59 @@
+"""回复耗时分布"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.latency_stats import LatencyStats
+
+
+def make_stats(tmp_path, history: int = 200) -> LatencyStats:
+    return LatencyStats(tmp_path / "latency.json", "Test", history=history)
+
+
+def test_too_few_samples_returns_none(tmp_path):
+    stats = make_stats(tmp_path)
+    for total in range(1, 5):
+        stats.record(1, total)
+    assert stats.percentile('total', 90, images=1, min_samples=8) is None
+
+
+def test_percentile_of_matching_image_count(tmp_path):
+    stats = make_stats(tmp_path)
+    for total in range(1, 11):
+        stats.record(2, total, first=total / 10)
+    assert stats.percentile('total', 50, images=2, min_samples=5) == 5
+    assert stats.percentile('total', 90, images=2, min_samples=5) == 9
+    assert stats.percentile('total', 100, images=2, min_samples=5) == 10
+    assert stats.percentile('first', 0, images=2, min_samples=5) == 0.1
+
+
+def test_other_image_counts_are_scaled_linearly(tmp_path):
+    stats = make_stats(tmp_path)
+    for total in (10, 20, 30, 40):
+        stats.record(1, total)
+    for total in (40, 80, 120, 160):
+        stats.record(4, total)
+    # 2 张图片没有样本：1 张的样本 ×2、4 张的样本 ×0.5 合并估计
+    assert stats.percentile('total', 100, images=2, min_samples=8) == 80
+    assert stats.percentile('total', 0, images=2, min_samples=8) == 20
+
+
+def test_missing_first_token_samples_are_skipped(tmp_path):
+    stats = make_stats(tmp_path)
+    for total in range(1, 9):
+        stats.record(1, total, first=None)
+    assert stats.percentile('total', 50, min_samples=8) is not None
+    assert stats.percentile('first', 50, min_samples=8) is None
+
+
+def test_history_is_bounded_and_persisted(tmp_path):
+    stats = make_stats(tmp_path, history=5)
+    for total in range(1, 11):
+        stats.record(1, total)
+    stats.record(1, 0)  # 无效样本不记录
+    assert len(stats) == 5
+
+    restored = make_stats(tmp_path, history=5)
+    assert len(restored) == 5
+    assert restored.percentile('total', 0, min_samples=5) == 6
@@ -0,0 +1,53 @@
+"""上限重置时间解析"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.limit_reset import parse_reset_time
+
+NOW = datetime(2026, 3, 10, 14, 0)
+
+
+def test_english_clock_time():
+    assert parse_reset_time("Your limit will reset at 3:00 PM", NOW) == datetime(2026, 3, 10, 15, 0)
+    assert parse_reset_time("You can try again after 18:31", NOW) == datetime(2026, 3, 10, 18, 31)
+
+
+def test_clock_time_already_passed_rolls_to_next_day():
+    assert parse_reset_time("Your limit will reset at 9:00 AM", NOW) == datetime(2026, 3, 11, 9, 0)
+
+
+def test_english_relative_duration():
+    assert parse_reset_time("Please try again in 2 hours and 15 minutes", NOW) == NOW + timedelta(hours=2, minutes=15)
+    assert parse_reset_time("try again in 45s", NOW) == NOW + timedelta(seconds=45)
+
+
+def test_english_date_and_time():
+    assert parse_reset_time("You've reached your usage limit. Resets Mar 12, 9:00 AM", NOW) == datetime(2026, 3, 12, 9, 0)
+
+
+def test_chinese_clock_time():
+    assert parse_reset_time("已达到使用上限，将于下午3:00重置", NOW) == datetime(2026, 3, 10, 15, 0)
+    assert parse_reset_time("明天 09:00 恢复", NOW) == datetime(2026, 3, 11, 9, 0)
+
+
+def test_chinese_relative_duration():
+    assert parse_reset_time("请在 2 小时 15 分钟后重试", NOW) == NOW + timedelta(hours=2, minutes=15)
+
+
+def test_timestamps():
+    assert parse_reset_time('{"resetsAt": "2026-03-10T16:30:00"}', NOW) == datetime(2026, 3, 10, 16, 30)
+    epoch = int(datetime(2026, 3, 10, 17, 0).timestamp())
+    assert parse_reset_time(f'{{"resets_at": {epoch}}}', NOW) == datetime(2026, 3, 10, 17, 0)
+
+
+def test_unrelated_numbers_are_ignored():
+    assert parse_reset_time("Page 3 of 12 analysed", NOW) is None
+    assert parse_reset_time("The meeting on page 4 starts at 10:30", NOW) is None
+    assert parse_reset_time("", NOW) is None
+
+
+def test_result_beyond_horizon_is_rejected():
+    assert parse_reset_time("try again in 400 hours", NOW) is None
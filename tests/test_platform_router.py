@@ -0,0 +1,101 @@
+"""平台失败转移"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("playwright")
+
+from src import platform_router
+from src.base_automation import LoginRequiredError
+from src.platform_router import PlatformRouter
+
+
+class FakeBot:
+    """只实现路由用到的接口"""
+
+    def __init__(self, name: str, logged_in: bool = True):
+        self.PLATFORM_NAME = name
+        self.logged_in = logged_in
+        self.staged_images = None
+        self.on_stream_delta = None
+        self.closed = False
+
+    async def attach_to(self, host) -> None:
+        if not self.logged_in:
+            raise LoginRequiredError(f"{self.PLATFORM_NAME} 未登录")
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def bots(monkeypatch):
+    bots = {'claude': FakeBot('Claude'), 'gemini': FakeBot('Gemini'), 'deepseek': FakeBot('DeepSeek', logged_in=False)}
+    monkeypatch.setattr(platform_router, 'get_automation', lambda platform_id: bots[platform_id])
+    return bots
+
+
+def make_router(platform_ids) -> PlatformRouter:
+    return PlatformRouter('chatgpt', FakeBot('ChatGPT'), platform_ids)
+
+
+def test_order_drops_duplicates_and_host():
+    router = make_router(['claude', 'chatgpt', 'claude', 'gemini'])
+    assert router.order == ['chatgpt', 'claude', 'gemini']
+
+
+def test_host_is_selected_while_not_limited(bots):
+    router = make_router(['claude'])
+    assert asyncio.run(router.select()) is router.host
+
+
+def test_fails_over_in_priority_order_and_skips_logged_out(bots):
+    router = make_router(['deepseek', 'claude'])
+    router.mark_limited(router.host, datetime.now() + timedelta(hours=1), cooldown_minutes=30)
+    assert asyncio.run(router.select()) is bots['claude']
+    assert 'deepseek' in router.unavailable
+
+
+def test_returns_to_host_after_reset(bots):
+    router = make_router(['claude'])
+    router.mark_limited(router.host, datetime.now() - timedelta(seconds=1), cooldown_minutes=30)
+    assert asyncio.run(router.select()) is router.host
+    assert 'chatgpt' not in router.limited_until
+
+
+def test_all_limited_reports_earliest_reset(bots):
+    router = make_router(['claude'])
+    soon = datetime.now() + timedelta(minutes=10)
+    router.mark_limited(router.host, datetime.now() + timedelta(hours=1), cooldown_minutes=30)
+    claude = asyncio.run(router.select())
+    router.mark_limited(claude, soon, cooldown_minutes=30)
+    assert asyncio.run(router.select()) is None
+    assert router.earliest_reset() == soon
+
+
+def test_hedge_partner_is_another_open_unlimited_platform(bots):
+    router = make_router(['claude', 'gemini'])
+    assert router.hedge_partner(router.host) is None
+    router.mark_limited(router.host, datetime.now() + timedelta(hours=1), cooldown_minutes=30)
+    claude = asyncio.run(router.select())
+    # 宿主处于上限，不能作为对冲实例
+    assert router.hedge_partner(claude) is None
+    router.limited_until.clear()
+    assert router.hedge_partner(claude) is router.host
+    router.host.staged_images = ['page.png']
+    assert router.hedge_partner(claude) is None
+
+
+def test_close_releases_fallback_platforms_only(bots):
+    router = make_router(['claude'])
+    router.mark_limited(router.host, None, cooldown_minutes=30)
+    asyncio.run(router.select())
+    asyncio.run(router.close())
+    assert bots['claude'].closed
+    assert not router.host.closed
+    assert router.bots == {'chatgpt': router.host}
@@ -0,0 +1,111 @@
+"""自适应发送节奏（AIMD 与窗口上限）"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import rate_governor
+from src.rate_governor import RateGovernor
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_governor, 'time', clock)
+    return clock
+
+
+def make_governor(tmp_path, **kwargs) -> RateGovernor:
+    options = dict(initial_interval=10, min_interval=0, max_interval=600,
+                   speedup_step=2, backoff_factor=2, window=3600, safety=0.9)
+    options.update(kwargs)
+    return RateGovernor(tmp_path / "rate.json", "Test", **options)
+
+
+def send(governor: RateGovernor, clock: FakeClock, count: int, spacing: float) -> None:
+    for _ in range(count):
+        asyncio.run(governor.acquire())
+        clock.now += spacing
+
+
+def test_success_shrinks_interval_additively(tmp_path, clock):
+    governor = make_governor(tmp_path)
+    governor.record_success()
+    governor.record_success()
+    assert governor.interval == 6
+    for _ in range(5):
+        governor.record_success()
+    assert governor.interval == 0
+
+
+def test_limit_backs_off_multiplicatively_and_learns_window(tmp_path, clock):
+    governor = make_governor(tmp_path, max_interval=3600)
+    send(governor, clock, 4, spacing=30)
+    governor.record_limit()
+    # 最近平均间隔 30s × 2
+    assert governor.interval == 60
+    assert governor.window_limit == 4
+    # 窗口上限 4 × 0.9 条 / 小时
+    assert governor.effective_interval() == pytest.approx(3600 / 3.6)
+    # 不超过间隔上限
+    governor.max_interval = 600
+    assert governor.effective_interval() == 600
+
+
+def test_upload_limit_does_not_touch_window_limit(tmp_path, clock):
+    governor = make_governor(tmp_path)
+    send(governor, clock, 3, spacing=20)
+    governor.record_limit(upload=True)
+    assert governor.window_limit is None
+    assert governor.interval == pytest.approx(20 * 1.5)
+
+
+def test_window_limit_relaxes_once_per_window(tmp_path, clock):
+    governor = make_governor(tmp_path)
+    send(governor, clock, 5, spacing=60)
+    governor.record_limit()
+    assert governor.window_limit == 5
+
+    clock.now += 3600
+    governor.record_success()
+    assert governor.window_limit == 6
+    # 同一窗口内的后续成功不再放宽
+    for _ in range(10):
+        clock.now += 60
+        governor.record_success()
+    assert governor.window_limit == 6
+
+    clock.now += 3600
+    governor.record_success()
+    assert governor.window_limit == 7
+
+
+def test_delay_spaces_sends_by_effective_interval(tmp_path, clock):
+    governor = make_governor(tmp_path, initial_interval=30)
+    assert governor.delay() == 0
+    send(governor, clock, 1, spacing=10)
+    assert governor.delay() == pytest.approx(20)
+
+
+def test_state_persists_across_instances(tmp_path, clock):
+    governor = make_governor(tmp_path)
+    send(governor, clock, 4, spacing=30)
+    governor.record_limit()
+    clock.now += 3600
+    governor.record_success()
+
+    restored = make_governor(tmp_path)
+    assert restored.interval == governor.interval
+    assert restored.window_limit == governor.window_limit
+    assert restored.last_relax_at == governor.last_relax_at
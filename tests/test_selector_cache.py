@@ -0,0 +1,62 @@
+"""选择器解析缓存"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.selector_cache import SelectorCache
+
+SELECTORS = ['#prompt-textarea', 'div[contenteditable="true"]', 'textarea']
+
+
+def make_cache(tmp_path) -> SelectorCache:
+    return SelectorCache(tmp_path / "selectors.json", "Test")
+
+
+def test_unknown_key_keeps_default_order(tmp_path):
+    assert make_cache(tmp_path).order('input_box', SELECTORS) == SELECTORS
+
+
+def test_last_hit_is_tried_first(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.record_hit('input_box', 'textarea')
+    assert cache.order('input_box', SELECTORS) == ['textarea', '#prompt-textarea', 'div[contenteditable="true"]']
+
+
+def test_other_selectors_ranked_by_hits_then_priority(tmp_path):
+    cache = make_cache(tmp_path)
+    for _ in range(3):
+        cache.record_hit('input_box', 'div[contenteditable="true"]')
+    cache.record_hit('input_box', 'textarea')
+    assert cache.order('input_box', SELECTORS) == ['textarea', 'div[contenteditable="true"]', '#prompt-textarea']
+    assert cache._stats['input_box']['misses'] == 1
+
+
+def test_ambiguous_fallback_is_not_remembered(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.record_hit('input_box', 'textarea', ambiguous=True)
+    assert cache.last('input_box') is None
+    assert cache.order('input_box', SELECTORS) == SELECTORS
+
+
+def test_remembered_fallback_is_cleared_when_it_becomes_ambiguous(tmp_path):
+    cache = make_cache(tmp_path)
+    for _ in range(5):
+        cache.record_hit('input_box', 'textarea')
+    cache.record_hit('input_box', 'textarea', ambiguous=True)
+    assert cache.last('input_box') is None
+    assert cache.order('input_box', SELECTORS) == SELECTORS
+
+
+def test_miss_keeps_last_hit(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.record_hit('input_box', 'textarea')
+    cache.record_miss('input_box')
+    assert cache.last('input_box') == 'textarea'
+
+
+def test_stats_persist_across_runs(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.record_hit('send_button', 'button[type="submit"]')
+    cache.save()
+    assert make_cache(tmp_path).last('send_button') == 'button[type="submit"]'
@@ -0,0 +1,62 @@
+"""图片上传方式统计"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.upload_transport import UploadTransportStats
+
+DEFAULT = ['file_input', 'clipboard', 'datatransfer', 'drag_drop']
+
+
+def make_stats(tmp_path) -> UploadTransportStats:
+    return UploadTransportStats(tmp_path / "upload.json", "Test")
+
+
+def test_no_stats_keeps_default_order(tmp_path):
+    assert make_stats(tmp_path).order(DEFAULT) == DEFAULT
+
+
+def test_fastest_successful_transport_first_then_untried(tmp_path):
+    stats = make_stats(tmp_path)
+    stats.record('clipboard', True, 0.5)
+    stats.record('datatransfer', True, 0.2)
+    assert stats.order(DEFAULT) == ['datatransfer', 'clipboard', 'file_input', 'drag_drop']
+
+
+def test_average_is_exponential_moving_average(tmp_path):
+    stats = make_stats(tmp_path)
+    stats.record('file_input', True, 1.0)
+    stats.record('file_input', True, 2.0)
+    assert stats._stats['file_input']['avg_ms'] == round(1000 * 0.7 + 2000 * 0.3)
+
+
+def test_demoted_after_consecutive_failures(tmp_path):
+    stats = make_stats(tmp_path)
+    stats.record('file_input', True, 0.1)
+    stats.record('clipboard', True, 0.3)
+    stats.record('file_input', False, 5.0)
+    # 一次失败仍按耗时排序
+    assert stats.order(DEFAULT)[0] == 'file_input'
+    stats.record('file_input', False, 5.0)
+    assert stats.order(DEFAULT) == ['clipboard', 'datatransfer', 'drag_drop', 'file_input']
+
+
+def test_success_resets_failure_streak(tmp_path):
+    stats = make_stats(tmp_path)
+    stats.record('file_input', False, 5.0)
+    stats.record('file_input', False, 5.0)
+    stats.record('file_input', True, 0.1)
+    assert stats.order(DEFAULT)[0] == 'file_input'
+
+
+def test_never_successful_transport_goes_last(tmp_path):
+    stats = make_stats(tmp_path)
+    stats.record('file_input', False, 5.0)
+    assert stats.order(DEFAULT)[-1] == 'file_input'
+
+
+def test_stats_persist_across_runs(tmp_path):
+    stats = make_stats(tmp_path)
+    stats.record('drag_drop', True, 0.1)
+    assert make_stats(tmp_path).order(DEFAULT)[0] == 'drag_drop'